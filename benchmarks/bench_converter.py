@@ -0,0 +1,163 @@
+# benchmarks/bench_converter.py
+"""
+Benchmarks the lxml fast-path converter against the MarkItDown pipeline.
+
+First, every document of the committed corpus (benchmarks/converter_corpus,
+bedesten-shaped article HTML with golden Markdown produced by MarkItDown)
+is converted by both MarkItDown and the fast path with its fallback, and
+each output must equal the golden file exactly; any difference exits with
+status 1. Then recorded getDocumentContent payloads, if any, are compared
+(after whitespace normalization) and timed; without recordings the corpus
+is timed instead.
+
+    python benchmarks/bench_converter.py
+    python benchmarks/record_fixtures.py 5237 6098
+    python benchmarks/bench_converter.py --repeat 20 --show-diff
+    python benchmarks/bench_converter.py --write-golden   # after a MarkItDown upgrade
+
+Exits with status 1 when --strict is given and any recorded document differs.
+"""
+
+import argparse
+import base64
+import difflib
+import glob
+import json
+import os
+import re
+import statistics
+import sys
+import time
+from typing import Callable, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mevzuat_converter import UnsupportedHtml, fast_markdown_from_html_bytes, markdown_from_html, markdown_from_html_bytes
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "converter_corpus")
+_SPACE_RE = re.compile(r"[\s\xa0]+")
+
+def load_payloads(fixtures_dir: str) -> List[Tuple[str, str]]:
+    """Returns (madde_id, base64 content) pairs for every recorded getDocumentContent response."""
+    payloads = []
+    for path in sorted(glob.glob(os.path.join(fixtures_dir, "getDocumentContent", "*.json"))):
+        with open(path, encoding="utf-8") as f:
+            recorded = json.load(f)
+        content = recorded["response"].get("data", {}).get("content")
+        if content:
+            payloads.append((os.path.splitext(os.path.basename(path))[0], content))
+    return payloads
+
+def load_corpus(corpus_dir: str) -> List[Tuple[str, bytes, str]]:
+    """Returns (name, html bytes, golden path) for every corpus document."""
+    corpus = []
+    for path in sorted(glob.glob(os.path.join(corpus_dir, "*.html"))):
+        with open(path, "rb") as f:
+            corpus.append((os.path.basename(path), f.read(), os.path.splitext(path)[0] + ".md"))
+    return corpus
+
+def check_corpus(corpus_dir: str = CORPUS_DIR, write_golden: bool = False, show_diff: bool = False) -> List[str]:
+    """
+    Converts every corpus document with MarkItDown and with the fast path (falling back to MarkItDown
+    where it must) and returns the names of documents whose output is not byte-for-byte the golden Markdown.
+    """
+    failures = []
+    for name, html_bytes, golden_path in load_corpus(corpus_dir):
+        expected_now = markdown_from_html(html_bytes.decode("utf-8"))
+        if write_golden:
+            with open(golden_path, "w", encoding="utf-8") as f:
+                f.write(expected_now + "\n")
+        with open(golden_path, encoding="utf-8") as f:
+            golden = f.read()[:-1]
+        for converter, actual in (("markitdown", expected_now), ("fast", markdown_from_html_bytes(html_bytes))):
+            if actual != golden:
+                failures.append(f"{name} ({converter})")
+                if show_diff:
+                    print(f"--- {name}: golden vs {converter}")
+                    print("\n".join(difflib.unified_diff(golden.split("\n"), actual.split("\n"), "golden", converter, lineterm="")))
+    return failures
+
+def normalize_markdown(text: str) -> List[str]:
+    """Collapses whitespace inside lines and drops blank lines, so only meaningful differences remain."""
+    lines = (_SPACE_RE.sub(" ", line).strip() for line in text.split("\n"))
+    return [line for line in lines if line]
+
+def legacy_convert(b64_content: str) -> str:
+    # The pre-fast-path pipeline: bytes -> str -> bytes -> BytesIO -> MarkItDown.
+    return markdown_from_html(base64.b64decode(b64_content).decode("utf-8"))
+
+def fast_convert(b64_content: str) -> str:
+    return fast_markdown_from_html_bytes(base64.b64decode(b64_content))
+
+def time_per_call(fn: Callable[[str], str], payload: str, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(payload)
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixtures", default=FIXTURES_DIR, help="Directory with recorded responses.")
+    parser.add_argument("--repeat", type=int, default=10, help="Timed conversions per document and converter.")
+    parser.add_argument("--show-diff", action="store_true", help="Print a diff for every mismatching document.")
+    parser.add_argument("--strict", action="store_true", help="Exit with status 1 if any recorded document differs.")
+    parser.add_argument("--corpus", default=CORPUS_DIR, help="Directory with corpus HTML and golden Markdown.")
+    parser.add_argument("--write-golden", action="store_true", help="Regenerate the golden Markdown with MarkItDown before checking.")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    if not corpus:
+        sys.exit(f"No corpus documents under {args.corpus}.")
+    failures = check_corpus(args.corpus, write_golden=args.write_golden, show_diff=args.show_diff)
+    fast_path_served = 0
+    for _, html_bytes, _ in corpus:
+        try:
+            fast_markdown_from_html_bytes(html_bytes)
+            fast_path_served += 1
+        except UnsupportedHtml:
+            pass
+    print(f"corpus:           {len(corpus)} documents, {fast_path_served} served by the fast path, {len(failures)} differ from golden {failures}")
+    if failures:
+        sys.exit(1)
+
+    # Without recordings, the corpus itself is timed.
+    payloads = load_payloads(args.fixtures) or [(name, base64.b64encode(html_bytes).decode("ascii")) for name, html_bytes, _ in corpus]
+
+    legacy_total = fast_total = 0.0
+    matches, mismatches, unsupported = 0, [], []
+    for madde_id, payload in payloads:
+        expected = legacy_convert(payload)
+        try:
+            actual = fast_convert(payload)
+        except UnsupportedHtml as e:
+            unsupported.append((madde_id, str(e)))
+            continue
+        if normalize_markdown(actual) == normalize_markdown(expected):
+            matches += 1
+        else:
+            mismatches.append(madde_id)
+            if args.show_diff:
+                print(f"--- {madde_id}")
+                print("\n".join(difflib.unified_diff(normalize_markdown(expected), normalize_markdown(actual), "markitdown", "fast", lineterm="")))
+        legacy_total += time_per_call(legacy_convert, payload, args.repeat)
+        fast_total += time_per_call(fast_convert, payload, args.repeat)
+
+    timed = len(payloads) - len(unsupported)
+    print(f"documents:        {len(payloads)} ({sum(len(p) for _, p in payloads) / 1024:.1f} KiB base64)")
+    print(f"golden matches:   {matches}")
+    print(f"mismatches:       {len(mismatches)} {mismatches[:10]}")
+    print(f"unsupported html: {len(unsupported)} (served by the MarkItDown fallback)")
+    for madde_id, reason in unsupported[:10]:
+        print(f"    {madde_id}: {reason}")
+    if timed:
+        print(f"markitdown:       {legacy_total / timed * 1000:.3f} ms/doc (median of {args.repeat})")
+        print(f"fast path:        {fast_total / timed * 1000:.3f} ms/doc (median of {args.repeat})")
+        print(f"speedup:          {legacy_total / fast_total:.1f}x")
+    if args.strict and mismatches:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
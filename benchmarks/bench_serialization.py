@@ -0,0 +1,118 @@
+# benchmarks/bench_serialization.py
+"""
+Validation and encoding benchmark for search pages and article trees.
+Compares the old per-document validation and FastAPI's jsonable_encoder +
+json.dumps response path with the batched TypeAdapter, the flat article tree
+and the single-pass mevzuat_json encoder, on synthetic responses from the
+FakeBedesten stand-in.
+
+    python benchmarks/bench_serialization.py --page-size 50 --tree-articles 2000
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Any, Callable, Dict, List
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [os.path.dirname(BENCH_DIR), BENCH_DIR]
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+import fake_bedesten
+import mevzuat_json
+from mevzuat_models import MevzuatArticleNode, MevzuatDocument, MevzuatSearchResult
+from mevzuat_tree import FlatArticleTree
+
+def measure(fn: Callable[[], Any], repeat: int) -> float:
+    """Best-of-three mean seconds per call over `repeat` calls."""
+    best = float("inf")
+    for _ in range(3):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            fn()
+        best = min(best, (time.perf_counter() - started) / repeat)
+    return best
+
+def fastapi_encode(content: Any) -> bytes:
+    # What FastAPI does for a returned dict: jsonable_encoder, then JSONResponse.render.
+    return json.dumps(jsonable_encoder(content), ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+def find_in_nodes(nodes: List[MevzuatArticleNode], madde_no: int) -> Any:
+    # What a client without the number index has to do: walk the whole tree.
+    stack = list(nodes)
+    while stack:
+        node = stack.pop()
+        if node.madde_no == madde_no and not node.children:
+            return node
+        stack.extend(node.children)
+    return None
+
+def compare(name: str, baseline: Callable[[], Any], candidate: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    old, new = measure(baseline, repeat), measure(candidate, repeat)
+    print(f"{name:34} {old * 1e6:>11.1f} µs {new * 1e6:>11.1f} µs {old / new:>8.1f}x")
+    return {"baseline_us": round(old * 1e6, 1), "candidate_us": round(new * 1e6, 1), "speedup": round(old / new, 2)}
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--page-size", type=int, default=50, help="Documents per search page.")
+    parser.add_argument("--tree-articles", type=int, default=2000, help="Articles in the synthetic article tree.")
+    parser.add_argument("--repeat", type=int, default=200, help="Calls per measurement.")
+    parser.add_argument("--json", help="Write the results to this file.")
+    args = parser.parse_args()
+
+    fake = fake_bedesten.FakeBedesten(fixtures_dir=None, articles_per_document=args.tree_articles)
+    page = fake.respond("searchDocuments", {"data": {"mevzuatAdi": "kanun", "pageSize": args.page_size, "pageNumber": 1}})["data"]
+    documents: List[Dict[str, Any]] = page["mevzuatList"]
+    children: List[Dict[str, Any]] = fake.respond("mevzuatMaddeTree", {"data": {"mevzuatId": "100000"}})["data"]["children"]
+    document_list = TypeAdapter(List[MevzuatDocument])
+    node_list = TypeAdapter(List[MevzuatArticleNode])
+    result = MevzuatSearchResult(
+        documents=document_list.validate_python(documents), total_results=page["total"], current_page=1,
+        page_size=args.page_size, total_pages=1, query_used={"mevzuat_adi": "kanun"}
+    )
+    flat = FlatArticleTree.from_raw("100000", children)
+    nodes = flat.to_nodes()
+    tree_repeat = max(1, args.repeat // 20)
+    encoder = "orjson" if mevzuat_json._Fragment is not None else "pydantic-core"
+
+    print(f"{args.page_size} documents per page, {args.tree_articles} articles per tree, encoder: {encoder}")
+    print(f"{'':34} {'baseline':>14} {'candidate':>14} {'speedup':>9}")
+    results = {
+        "search_validate": compare(
+            "search page: validate", lambda: [MevzuatDocument.model_validate(doc) for doc in documents],
+            lambda: document_list.validate_python(documents), args.repeat),
+        "search_encode": compare(
+            "search page: encode envelope", lambda: fastapi_encode({"success": True, "data": result}),
+            lambda: mevzuat_json.dumps({"success": True, "data": result}), args.repeat),
+        "tree_build": compare(
+            "article tree: first build", lambda: node_list.validate_python(children),
+            lambda: FlatArticleTree.from_raw("100000", children).to_nodes(), tree_repeat),
+        "tree_repeat": compare(
+            "article tree: repeated call", lambda: node_list.validate_python(children),
+            lambda: flat.to_nodes(), args.repeat),
+        "tree_lookup": compare(
+            "article tree: find madde", lambda: find_in_nodes(node_list.validate_python(children), args.tree_articles),
+            lambda: flat.find_article(args.tree_articles), args.repeat),
+        "tree_encode": compare(
+            "article tree: encode envelope", lambda: fastapi_encode({"success": True, "data": nodes}),
+            lambda: mevzuat_json.dumps({"success": True, "data": nodes}), tree_repeat),
+        "tree_outline": compare(
+            "article tree: outline page", lambda: mevzuat_json.dumps(nodes),
+            lambda: mevzuat_json.dumps(flat.page(max_depth=1, fields=["title"], limit=50)), args.repeat),
+    }
+    full_bytes, outline_bytes = len(mevzuat_json.dumps(nodes)), len(mevzuat_json.dumps(flat.page(max_depth=1, fields=["title"], limit=50)))
+    print(f"article tree: {full_bytes} bytes in full, {outline_bytes} bytes as an outline page")
+    results["tree_outline"].update({"full_bytes": full_bytes, "outline_bytes": outline_bytes})
+    # The two encoders must produce the same document.
+    assert json.loads(fastapi_encode({"data": result})) == json.loads(mevzuat_json.dumps({"data": result}))
+    assert node_list.dump_python(nodes, by_alias=True) == jsonable_encoder(nodes)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"encoder": encoder, **results}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
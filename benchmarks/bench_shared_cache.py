@@ -0,0 +1,110 @@
+# benchmarks/bench_shared_cache.py
+"""
+Cross-process cache benchmark.
+Starts several worker processes that fetch the same articles at the same time,
+as uvicorn workers or per-session stdio servers on one host would, and counts
+how many times the articles were downloaded and converted in total:
+
+    python benchmarks/bench_shared_cache.py --backend memory   # every process converts every article
+    python benchmarks/bench_shared_cache.py --backend sqlite   # shared SQLite (WAL) tier with leases
+    python benchmarks/bench_shared_cache.py --backend redis    # RedisBackend against fake_redis.py
+
+Each process talks to its own in-process FakeBedesten, so upstream latency is
+simulated but the loads are counted on the client side (cache stores).
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+
+def child(args: argparse.Namespace) -> Dict[str, Any]:
+    sys.path[:0] = [REPO_DIR, BENCH_DIR]
+    import httpx
+    import fake_bedesten
+    from mevzuat_cache import ResponseCache
+    from mevzuat_client import MevzuatApiClient
+    from mevzuat_models import MevzuatArticleRef
+
+    async def run() -> Dict[str, Any]:
+        fake = fake_bedesten.FakeBedesten(fixtures_dir=None, latency_ms=args.latency_ms)
+        client = MevzuatApiClient(cache=ResponseCache.from_env(), base_url="http://bedesten.test/mevzuat", transport=httpx.ASGITransport(app=fake))
+        articles = [MevzuatArticleRef(mevzuat_id="100000", madde_id=str(1000000001 + index)) for index in range(args.articles)]
+        random.Random(os.getpid()).shuffle(articles)
+        await asyncio.sleep(max(0.0, args.start_at - time.time()))
+        started = time.perf_counter()
+        results = await client.get_article_contents(articles, max_concurrency=args.concurrency)
+        elapsed = time.perf_counter() - started
+        stats = client.cache.stats()
+        await client.close()
+        return {"elapsed_s": elapsed, "errors": sum(bool(result.error_message) for result in results),
+                "loads": stats["stores"], "lease_waits": stats["lease_waits"], "shared_fills": stats["shared_fills"]}
+    return asyncio.run(run())
+
+def start_fake_redis() -> int:
+    import fake_redis
+    ready = threading.Event()
+    port: List[int] = []
+
+    def serve() -> None:
+        async def main() -> None:
+            server = await fake_redis.FakeRedis().start()
+            port.append(server.sockets[0].getsockname()[1])
+            ready.set()
+            await server.serve_forever()
+        asyncio.run(main())
+    threading.Thread(target=serve, daemon=True).start()
+    ready.wait()
+    return port[0]
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", choices=["memory", "sqlite", "redis"], default="sqlite")
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--articles", type=int, default=60)
+    parser.add_argument("--concurrency", type=int, default=8, help="Articles in flight per process.")
+    parser.add_argument("--latency-ms", type=float, default=40.0, help="Simulated upstream latency.")
+    parser.add_argument("--json", help="Write the results to this file.")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--start-at", type=float, default=0.0, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        print(json.dumps(child(args)))
+        return
+
+    sys.path.insert(0, BENCH_DIR)
+    with tempfile.TemporaryDirectory() as cache_dir:
+        env = {**os.environ, "MEVZUAT_CACHE_DIR": cache_dir, "MEVZUAT_CACHE_BACKEND": args.backend, "MEVZUAT_LOG_LEVEL": "ERROR"}
+        if args.backend == "redis":
+            env["MEVZUAT_REDIS_URL"] = f"redis://127.0.0.1:{start_fake_redis()}/0"
+        command = [sys.executable, os.path.abspath(__file__), "--child", "--start-at", str(time.time() + 1.0),
+                   "--articles", str(args.articles), "--concurrency", str(args.concurrency), "--latency-ms", str(args.latency_ms)]
+        processes = [subprocess.Popen(command, env=env, cwd=REPO_DIR, stdout=subprocess.PIPE, text=True) for _ in range(args.processes)]
+        runs = [json.loads(process.communicate()[0].strip().splitlines()[-1]) for process in processes]
+
+    loads = sum(run["loads"] for run in runs)
+    results = {
+        "backend": args.backend, "processes": args.processes, "articles": args.articles, "loads": loads,
+        "loads_per_article": round(loads / args.articles, 2), "errors": sum(run["errors"] for run in runs),
+        "lease_waits": sum(run["lease_waits"] for run in runs), "shared_fills": sum(run["shared_fills"] for run in runs),
+        "max_elapsed_s": round(max(run["elapsed_s"] for run in runs), 3),
+    }
+    print(f"{args.backend}: {args.processes} processes x {args.articles} articles -> {loads} loads "
+          f"({results['loads_per_article']} per article), {results['shared_fills']} filled from other processes, "
+          f"slowest process {results['max_elapsed_s']} s, {results['errors']} errors")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
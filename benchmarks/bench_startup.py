@@ -0,0 +1,122 @@
+# benchmarks/bench_startup.py
+"""
+Cold start benchmark for the MCP server.
+Each measurement runs in a fresh interpreter:
+
+* import:          time to import mevzuat_mcp_server, and which heavy modules it pulled in
+* first_response:  process start until the first get_mevzuat_article_content answer, served
+                   in-process against the FakeBedesten stand-in
+* stdio_list_tools: spawning the server over stdio until its tool list arrives, as an MCP
+                   client launching a per-session server would see it
+
+    python benchmarks/bench_startup.py --repeat 5
+    python benchmarks/bench_startup.py --max-import-ms 800
+
+Exits with status 1 if the median import time exceeds --max-import-ms or a lazily loaded
+dependency (markitdown, bs4, lxml) is imported eagerly.
+"""
+
+import time
+
+PROCESS_STARTED = time.perf_counter()
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Any, Dict, List
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+LAZY_MODULES = ("markitdown", "bs4", "lxml")
+# Keep the children away from the user's cache, index and metrics port.
+CHILD_ENV = {**os.environ, "MEVZUAT_CACHE": "0", "MEVZUAT_SEARCH_INDEX": "0", "MEVZUAT_METRICS_PORT": "", "MEVZUAT_LOG_FILE": ""}
+
+def child_import() -> Dict[str, Any]:
+    sys.path.insert(0, REPO_DIR)
+    started = time.perf_counter()
+    import mevzuat_mcp_server  # noqa: F401
+    return {
+        "import_ms": (time.perf_counter() - started) * 1000,
+        "eager_modules": [name for name in LAZY_MODULES if name in sys.modules],
+    }
+
+def child_first_response() -> Dict[str, Any]:
+    sys.path[:0] = [REPO_DIR, BENCH_DIR]
+    import httpx
+    from fastmcp import Client
+    import fake_bedesten
+    import mevzuat_mcp_server
+    from mevzuat_client import MevzuatApiClient
+
+    async def first_call() -> None:
+        transport = httpx.ASGITransport(app=fake_bedesten.FakeBedesten(fixtures_dir=None))
+        mevzuat_mcp_server.set_client(MevzuatApiClient(base_url="http://bedesten.test/mevzuat", transport=transport))
+        async with Client(mevzuat_mcp_server.app) as mcp:
+            await mcp.call_tool("get_mevzuat_article_content", {"mevzuat_id": "100000", "madde_id": "1000000001"})
+    asyncio.run(first_call())
+    return {"first_response_ms": (time.perf_counter() - PROCESS_STARTED) * 1000}
+
+def run_child(mode: str) -> Dict[str, Any]:
+    started = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child", mode],
+        env=CHILD_ENV, cwd=REPO_DIR, capture_output=True, text=True, check=True
+    ).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    result["process_ms"] = (time.perf_counter() - started) * 1000
+    return result
+
+async def stdio_list_tools() -> float:
+    from fastmcp import Client
+    from fastmcp.client.transports import PythonStdioTransport
+    transport = PythonStdioTransport(os.path.join(REPO_DIR, "mevzuat_mcp_server.py"), env=CHILD_ENV, cwd=REPO_DIR)
+    started = time.perf_counter()
+    async with Client(transport) as mcp:
+        await mcp.list_tools()
+    return (time.perf_counter() - started) * 1000
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    return {"median_ms": round(statistics.median(samples), 1), "min_ms": round(min(samples), 1), "max_ms": round(max(samples), 1)}
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--child", choices=["import", "first-response"], help=argparse.SUPPRESS)
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh processes per measurement.")
+    parser.add_argument("--skip-stdio", action="store_true", help="Do not spawn the server over stdio.")
+    parser.add_argument("--max-import-ms", type=float, default=None, help="Fail if the median import time exceeds this.")
+    parser.add_argument("--json", help="Write the results to this file.")
+    args = parser.parse_args()
+    if args.child:
+        print(json.dumps(child_import() if args.child == "import" else child_first_response()))
+        return
+
+    imports = [run_child("import") for _ in range(args.repeat)]
+    first_responses = [run_child("first-response") for _ in range(args.repeat)]
+    results = {
+        "import": summarize([run["import_ms"] for run in imports]),
+        "import_process": summarize([run["process_ms"] for run in imports]),
+        "first_response": summarize([run["first_response_ms"] for run in first_responses]),
+    }
+    if not args.skip_stdio:
+        results["stdio_list_tools"] = summarize([asyncio.run(stdio_list_tools()) for _ in range(args.repeat)])
+    eager = sorted({name for run in imports for name in run["eager_modules"]})
+
+    for name, row in results.items():
+        print(f"{name:20} median {row['median_ms']:>8} ms   min {row['min_ms']:>8} ms   max {row['max_ms']:>8} ms")
+    print(f"eagerly imported heavy modules: {', '.join(eager) or 'none'}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({**results, "eager_modules": eager}, f, indent=2)
+    failed = bool(eager)
+    if args.max_import_ms is not None and results["import"]["median_ms"] > args.max_import_ms:
+        print(f"REGRESSION import median {results['import']['median_ms']} ms > {args.max_import_ms} ms")
+        failed = True
+    if failed:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+# benchmarks/bench_store.py
+"""
+Size and lookup benchmark for the compressed article store.
+Converts synthetic FakeBedesten articles to Markdown, stores them (plus a
+share of duplicate bodies under other ids, as amended laws repeat articles
+verbatim) and compares the footprint with keeping the Markdown as Python
+strings, then measures lookups from the memory-mapped index:
+
+    python benchmarks/bench_store.py --articles 5000 --duplicates 0.2
+"""
+
+import argparse
+import base64
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Tuple
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [os.path.dirname(BENCH_DIR), BENCH_DIR]
+
+import fake_bedesten
+from mevzuat_converter import markdown_from_html_bytes
+from mevzuat_store import ArticleStore
+
+def make_articles(count: int, duplicates: float) -> List[Tuple[str, str, str]]:
+    fake = fake_bedesten.FakeBedesten(fixtures_dir=None)
+    articles: List[Tuple[str, str, str]] = []
+    rng = random.Random(0)
+    for index in range(count):
+        mevzuat_id, madde_id = str(100000 + index // 60), str(1000000000 + index)
+        if articles and rng.random() < duplicates:
+            markdown = rng.choice(articles)[2]
+        else:
+            content = fake.respond("getDocumentContent", {"data": {"id": madde_id}})["data"]["content"]
+            markdown = markdown_from_html_bytes(base64.b64decode(content))
+        articles.append((mevzuat_id, madde_id, markdown))
+    return articles
+
+def directory_size(path: str) -> int:
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--articles", type=int, default=5000)
+    parser.add_argument("--duplicates", type=float, default=0.2, help="Share of articles repeating an earlier body.")
+    parser.add_argument("--codec", choices=["zlib", "zstd"], default="zlib")
+    parser.add_argument("--block-kb", type=int, default=64)
+    parser.add_argument("--lookups", type=int, default=20000)
+    parser.add_argument("--json", help="Write the results to this file.")
+    args = parser.parse_args()
+
+    articles = make_articles(args.articles, args.duplicates)
+    string_bytes = sum(sys.getsizeof(markdown) for _, _, markdown in articles)
+    utf8_bytes = sum(len(markdown.encode("utf-8")) for _, _, markdown in articles)
+    with tempfile.TemporaryDirectory() as directory:
+        store = ArticleStore(directory, codec=args.codec, block_size=args.block_kb * 1024)
+        started = time.perf_counter()
+        for mevzuat_id, madde_id, markdown in articles:
+            store.put(mevzuat_id, madde_id, markdown)
+        store.flush()
+        write_s = time.perf_counter() - started
+        stats = store.stats()
+        disk_bytes = directory_size(directory)
+        rng = random.Random(1)
+        # Sequential reads within a legislation mostly hit the decompressed block LRU; random ones do not.
+        sample = [articles[rng.randrange(len(articles))] for _ in range(args.lookups)]
+        started = time.perf_counter()
+        for mevzuat_id, madde_id, markdown in sample:
+            assert store.get(mevzuat_id, madde_id) == markdown
+        random_us = (time.perf_counter() - started) / len(sample) * 1e6
+        started = time.perf_counter()
+        for mevzuat_id, madde_id, _ in articles:
+            store.get(mevzuat_id, madde_id)
+        sequential_us = (time.perf_counter() - started) / len(articles) * 1e6
+        store.close()
+
+    results: Dict[str, Any] = {
+        "articles": len(articles), "unique_bodies": stats["unique_bodies"], "python_str_bytes": string_bytes,
+        "utf8_bytes": utf8_bytes, "block_bytes": stats["stored_bytes"], "disk_bytes": disk_bytes,
+        "ratio_vs_str": round(disk_bytes / string_bytes, 3), "dictionary": stats["dictionary"],
+        "write_us_per_article": round(write_s / len(articles) * 1e6, 1),
+        "random_get_us": round(random_us, 1), "sequential_get_us": round(sequential_us, 1),
+    }
+    print(f"{results['articles']} articles, {results['unique_bodies']} unique bodies, codec {args.codec}, dictionary {results['dictionary']}")
+    print(f"python strings {string_bytes / 1e6:.2f} MB, utf-8 {utf8_bytes / 1e6:.2f} MB, "
+          f"store on disk {disk_bytes / 1e6:.2f} MB (blocks {results['block_bytes'] / 1e6:.2f} MB) = {results['ratio_vs_str']:.1%} of the strings")
+    print(f"write {results['write_us_per_article']} µs/article, get random {results['random_get_us']} µs, sequential {results['sequential_get_us']} µs")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
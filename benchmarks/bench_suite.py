@@ -0,0 +1,178 @@
+# benchmarks/bench_suite.py
+"""
+Offline benchmark suite for the MCP tools and the HTML-to-Markdown path.
+Every tool is called through an in-memory FastMCP client while the Mevzuat
+client talks to the local FakeBedesten stand-in, so the numbers cover the
+whole server stack without touching the live service.
+
+    python benchmarks/bench_suite.py --requests 200 --concurrency 16 --latency-ms 40
+    python benchmarks/bench_suite.py --json results.json
+    python benchmarks/bench_suite.py --baseline results.json --tolerance 0.2
+
+With --baseline, the run exits with status 1 if any scenario's p95 latency
+or throughput regressed by more than the tolerance.
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import logging
+import os
+import resource
+import sys
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+# Keep the benchmark away from the user's cache and local index.
+os.environ.setdefault("MEVZUAT_CACHE", "0")
+os.environ.setdefault("MEVZUAT_SEARCH_INDEX", "0")
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+import httpx
+from fastmcp import Client
+
+import fake_bedesten
+import mevzuat_mcp_server
+from mevzuat_cache import MemoryLRU, ResponseCache
+from mevzuat_client import MevzuatApiClient
+from mevzuat_converter import markdown_from_html_bytes, markdown_from_html_bytes_markitdown
+
+FAKE_BASE_URL = "http://bedesten.test/mevzuat"
+
+ToolCall = Callable[[int], Tuple[str, Dict[str, Any]]]
+TOOL_SCENARIOS: Dict[str, ToolCall] = {
+    "search_mevzuat": lambda i: ("search_mevzuat", {"mevzuat_adi": f"kanun {i % 50}", "page_size": 50}),
+    "get_mevzuat_article_tree": lambda i: ("get_mevzuat_article_tree", {"mevzuat_id": str(100000 + i % 200)}),
+    "get_mevzuat_article_content": lambda i: ("get_mevzuat_article_content", {"mevzuat_id": "100000", "madde_id": f"100000{i % 500:04d}"}),
+    "get_mevzuat_full_text": lambda i: ("get_mevzuat_full_text", {"mevzuat_id": str(200000 + i % 20)}),
+}
+
+def percentile(samples: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of samples (seconds)."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, max(0, int(round(fraction * len(ordered))) - 1))]
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in KiB on Linux and in bytes on macOS.
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> Dict[str, float]:
+    return {
+        "requests": len(latencies), "errors": errors,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+        "throughput_per_s": round(len(latencies) / elapsed, 2) if elapsed > 0 else 0.0,
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+
+async def run_load(call: Callable[[int], Awaitable[bool]], requests: int, concurrency: int) -> Dict[str, float]:
+    """Runs `requests` calls with at most `concurrency` in flight; call returns False on a failed request."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors = 0
+    async def one(index: int) -> None:
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            ok = await call(index)
+            latencies.append(time.perf_counter() - started)
+            errors += 0 if ok else 1
+    started = time.perf_counter()
+    await asyncio.gather(*(one(index) for index in range(requests)))
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+def build_client(fake: fake_bedesten.FakeBedesten, use_cache: bool) -> MevzuatApiClient:
+    cache = ResponseCache(memory=MemoryLRU(10000)) if use_cache else None
+    return MevzuatApiClient(cache=cache, base_url=FAKE_BASE_URL, transport=httpx.ASGITransport(app=fake))
+
+async def bench_tools(args: argparse.Namespace, fake: fake_bedesten.FakeBedesten) -> Dict[str, Dict[str, float]]:
+    results = {}
+    for name in args.scenarios:
+        if name not in TOOL_SCENARIOS:
+            continue
+        # The server's lifespan closes the client when the in-memory session ends.
+        mevzuat_mcp_server.set_client(build_client(fake, args.cache))
+        scenario = TOOL_SCENARIOS[name]
+        async with Client(mevzuat_mcp_server.app) as mcp:
+            async def call(index: int) -> bool:
+                tool, arguments = scenario(index)
+                result = await mcp.call_tool(tool, arguments, raise_on_error=False)
+                return not result.is_error and '"error_message":"' not in (result.content[0].text if result.content else "")
+            requests = max(1, args.requests // 10) if name == "get_mevzuat_full_text" else args.requests
+            results[name] = await run_load(call, requests, args.concurrency)
+    return results
+
+def bench_conversion(args: argparse.Namespace, fake: fake_bedesten.FakeBedesten) -> Dict[str, Dict[str, float]]:
+    payloads = []
+    for index in range(min(args.requests, 200)):
+        content = fake.respond("getDocumentContent", {"data": {"id": f"300000{index:04d}"}})["data"]["content"]
+        payloads.append(base64.b64decode(content))
+    results = {}
+    for name, convert in (("html_to_markdown_fast", markdown_from_html_bytes), ("html_to_markdown_markitdown", markdown_from_html_bytes_markitdown)):
+        if name not in args.scenarios:
+            continue
+        latencies = []
+        started = time.perf_counter()
+        for payload in payloads:
+            call_started = time.perf_counter()
+            convert(payload)
+            latencies.append(time.perf_counter() - call_started)
+        results[name] = summarize(latencies, 0, time.perf_counter() - started)
+    return results
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]], tolerance: float) -> List[str]:
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        if previous["p95_ms"] and current["p95_ms"] > previous["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {previous['p95_ms']} ms -> {current['p95_ms']} ms")
+        if previous["throughput_per_s"] and current["throughput_per_s"] < previous["throughput_per_s"] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {previous['throughput_per_s']}/s -> {current['throughput_per_s']}/s")
+    return regressions
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    fake_bedesten.add_arguments(parser)
+    all_scenarios = list(TOOL_SCENARIOS) + ["html_to_markdown_fast", "html_to_markdown_markitdown"]
+    parser.add_argument("--scenarios", nargs="+", default=all_scenarios, choices=all_scenarios)
+    parser.add_argument("--requests", type=int, default=200, help="Calls per scenario (full text uses a tenth).")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent tool calls.")
+    parser.add_argument("--cache", action="store_true", help="Enable the in-memory response cache.")
+    parser.add_argument("--json", help="Write the results to this file.")
+    parser.add_argument("--baseline", help="Results file of an earlier run to compare against.")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative regression against the baseline.")
+    args = parser.parse_args()
+    # Per-call tool logging would dominate the timings.
+    logging.disable(logging.INFO)
+
+    fake = fake_bedesten.from_arguments(args)
+    results = asyncio.run(bench_tools(args, fake))
+    results.update(bench_conversion(args, fake))
+
+    print(f"{'scenario':32} {'n':>6} {'err':>5} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'req/s':>9} {'rss MB':>8}")
+    for name, row in results.items():
+        print(f"{name:32} {row['requests']:>6} {row['errors']:>5} {row['p50_ms']:>9} {row['p95_ms']:>9} {row['p99_ms']:>9} {row['throughput_per_s']:>9} {row['peak_rss_mb']:>8}")
+    print(f"upstream: {fake.stats()}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
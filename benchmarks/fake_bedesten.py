@@ -0,0 +1,189 @@
+# benchmarks/fake_bedesten.py
+"""
+Local stand-in for the bedesten.adalet.gov.tr Mevzuat API.
+Replays responses recorded with record_fixtures.py and synthesizes
+deterministic ones for anything not recorded, with configurable latency and
+error injection. It is a plain ASGI app, so it can be mounted in-process
+through httpx.ASGITransport or served over HTTP:
+
+    python benchmarks/fake_bedesten.py --port 8765 --latency-ms 80 --error-rate 0.02
+    MEVZUAT_BASE_URL=http://127.0.0.1:8765/mevzuat mevzuat-mcp
+"""
+
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import random
+import sys
+from typing import Any, Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from record_fixtures import FIXTURES_DIR, fixture_path
+
+ENDPOINTS = ("searchDocuments", "mevzuatMaddeTree", "getDocumentContent")
+_TUR_NAMES = ["KANUN", "CB_KARARNAME", "YONETMELIK", "CB_YONETMELIK", "KHK", "TUZUK", "TEBLIGLER"]
+
+def _seed(*parts: Any) -> int:
+    return int(hashlib.sha256("|".join(str(part) for part in parts).encode("utf-8")).hexdigest()[:12], 16)
+
+def _success(data: Dict[str, Any]) -> Dict[str, Any]:
+    return {"data": data, "metadata": {"FMTY": "SUCCESS", "FMTE": None}}
+
+class FakeBedesten:
+    """ASGI application answering searchDocuments, mevzuatMaddeTree and getDocumentContent."""
+    def __init__(self, fixtures_dir: Optional[str] = FIXTURES_DIR, latency_ms: float = 0.0, latency_jitter_ms: float = 0.0,
+                 error_rate: float = 0.0, error_status: int = 503, retry_after: Optional[float] = None,
+                 articles_per_document: int = 60, article_paragraphs: int = 6, seed: int = 0):
+        self.fixtures_dir = fixtures_dir
+        self.latency_ms = latency_ms
+        self.latency_jitter_ms = latency_jitter_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.retry_after = retry_after
+        self.articles_per_document = articles_per_document
+        self.article_paragraphs = article_paragraphs
+        self._random = random.Random(seed)
+        self.requests: Dict[str, int] = {endpoint: 0 for endpoint in ENDPOINTS}
+        self.errors = 0
+        self.replayed = 0
+
+    def _recorded(self, endpoint: str, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        if not self.fixtures_dir:
+            return None
+        path = fixture_path(self.fixtures_dir, endpoint, payload)
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding="utf-8") as f:
+            self.replayed += 1
+            return json.load(f)["response"]
+
+    def _search(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        page_size, page_number = data.get("pageSize", 10), data.get("pageNumber", 1)
+        query = data.get("mevzuatAdi") or data.get("phrase") or data.get("mevzuatNo") or ""
+        total = 20 + _seed("total", query) % 480
+        title = query.strip('"').upper() or "ÖRNEK"
+        documents = []
+        # A number search lists the legislation of that number, of the requested (or first) type, first.
+        number = int(data["mevzuatNo"]) if str(data.get("mevzuatNo") or "").isdigit() else None
+        turler = data.get("mevzuatTurList") or _TUR_NAMES
+        for index in range((page_number - 1) * page_size, min(total, page_number * page_size)):
+            mevzuat_id = str(100000 + _seed("doc", query, index) % 900000)
+            tur = turler[0] if number is not None and index == 0 else _TUR_NAMES[_seed("tur", mevzuat_id) % len(_TUR_NAMES)]
+            documents.append({
+                "mevzuatId": mevzuat_id, "mevzuatNo": number if number is not None and index == 0 else 1000 + _seed("no", mevzuat_id) % 6000,
+                "mevzuatAdi": f"{title} HAKKINDA KANUN {index + 1}",
+                "mevzuatTur": {"id": 1, "name": tur, "description": "Kanun"},
+                "resmiGazeteTarihi": "2004-10-12T00:00:00", "resmiGazeteSayisi": str(25000 + index), "url": None,
+            })
+        return _success({"mevzuatList": documents, "total": total, "start": (page_number - 1) * page_size})
+
+    def _tree(self, mevzuat_id: str) -> Dict[str, Any]:
+        sections: List[Dict[str, Any]] = []
+        madde_no = 1
+        for section_index in range(max(1, self.articles_per_document // 10)):
+            articles = []
+            for _ in range(min(10, self.articles_per_document - (madde_no - 1))):
+                articles.append({
+                    "maddeId": f"{mevzuat_id}{madde_no:04d}", "maddeNo": madde_no, "title": f"Madde {madde_no}",
+                    "description": f"Örnek madde başlığı {madde_no}", "children": [], "mevzuatId": mevzuat_id,
+                })
+                madde_no += 1
+            sections.append({
+                "maddeId": f"{mevzuat_id}S{section_index + 1}", "maddeNo": None, "title": f"{section_index + 1}. BÖLÜM",
+                "description": None, "children": articles, "mevzuatId": mevzuat_id,
+            })
+        return _success({"maddeId": mevzuat_id, "title": "root", "children": sections, "mevzuatId": mevzuat_id})
+
+    def _content(self, madde_id: str) -> Dict[str, Any]:
+        rng = random.Random(_seed("content", madde_id))
+        words = ["kişi", "hapis", "cezası", "kanun", "hükmü", "uygulanır", "yıldan", "ile", "cezalandırılır", "işçi", "işveren", "sözleşme", "Bakanlık"]
+        paragraphs = [f"<p class='MsoNormal'><b>Madde başlığı {madde_id}</b></p>"]
+        for index in range(self.article_paragraphs):
+            sentence = " ".join(rng.choice(words) for _ in range(rng.randint(15, 45)))
+            paragraphs.append(f"<p class='MsoNormal'><span style='font-size:12pt'>({index + 1}) {sentence}.</span></p>")
+        if rng.random() < 0.1:
+            paragraphs.append("<table><tr><td>Sütun A</td><td>Sütun B</td></tr><tr><td>1</td><td>2</td></tr></table>")
+        html = f"<html><head><meta charset='utf-8'></head><body>{''.join(paragraphs)}</body></html>"
+        return _success({"content": base64.b64encode(html.encode("utf-8")).decode("ascii"), "mimeType": "text/html"})
+
+    def respond(self, endpoint: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        recorded = self._recorded(endpoint, payload)
+        if recorded is not None:
+            return recorded
+        data = payload.get("data", {})
+        if endpoint == "searchDocuments":
+            return self._search(data)
+        if endpoint == "mevzuatMaddeTree":
+            return self._tree(str(data.get("mevzuatId")))
+        return self._content(str(data.get("id")))
+
+    async def __call__(self, scope: Dict[str, Any], receive, send) -> None:
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+        body = b""
+        while True:
+            message = await receive()
+            body += message.get("body", b"")
+            if not message.get("more_body"):
+                break
+        endpoint = scope["path"].rstrip("/").rsplit("/", 1)[-1]
+        if scope["method"] != "POST" or endpoint not in ENDPOINTS:
+            await self._send(send, 404, {"error": "not found"})
+            return
+        self.requests[endpoint] += 1
+        delay = self.latency_ms + self._random.uniform(-self.latency_jitter_ms, self.latency_jitter_ms)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+        if self.error_rate and self._random.random() < self.error_rate:
+            self.errors += 1
+            headers = [(b"retry-after", str(self.retry_after).encode())] if self.retry_after is not None else []
+            await self._send(send, self.error_status, {"error": "injected"}, headers)
+            return
+        await self._send(send, 200, self.respond(endpoint, json.loads(body or b"{}")))
+
+    async def _send(self, send, status: int, body: Dict[str, Any], headers: Optional[List] = None) -> None:
+        encoded = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        await send({"type": "http.response.start", "status": status, "headers": [(b"content-type", b"application/json; charset=utf-8"), (b"content-length", str(len(encoded)).encode()), *(headers or [])]})
+        await send({"type": "http.response.body", "body": encoded})
+
+    def stats(self) -> Dict[str, Any]:
+        return {"requests": dict(self.requests), "errors": self.errors, "replayed": self.replayed}
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """Adds the fake server's knobs to a command line parser."""
+    parser.add_argument("--fixtures", default=FIXTURES_DIR, help="Directory with recorded responses to replay.")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Added latency per request.")
+    parser.add_argument("--latency-jitter-ms", type=float, default=0.0, help="Uniform jitter around --latency-ms.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with --error-status.")
+    parser.add_argument("--error-status", type=int, default=503, help="HTTP status used for injected errors.")
+    parser.add_argument("--retry-after", type=float, default=None, help="Retry-After seconds sent with injected errors.")
+    parser.add_argument("--articles", type=int, default=60, help="Articles per synthesized legislation.")
+
+def from_arguments(args: argparse.Namespace) -> FakeBedesten:
+    return FakeBedesten(
+        fixtures_dir=args.fixtures, latency_ms=args.latency_ms, latency_jitter_ms=args.latency_jitter_ms,
+        error_rate=args.error_rate, error_status=args.error_status, retry_after=args.retry_after,
+        articles_per_document=args.articles,
+    )
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_arguments(parser)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    import uvicorn
+    uvicorn.run(from_arguments(args), host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+# benchmarks/fake_redis.py
+"""
+Local stand-in for a Redis server, enough to exercise the RedisBackend cache.
+Speaks RESP2 over TCP and implements PING, AUTH, SELECT, GET, SET (with EX, PX,
+NX and XX), DEL, EXISTS, DBSIZE, FLUSHDB and QUIT on a single in-memory keyspace:
+
+    python benchmarks/fake_redis.py --port 6390
+    MEVZUAT_CACHE_BACKEND=redis MEVZUAT_REDIS_URL=redis://127.0.0.1:6390/0 mevzuat-mcp
+"""
+
+import argparse
+import asyncio
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+class FakeRedis:
+    """In-memory keyspace served over RESP2; each command is handled atomically on the event loop."""
+    def __init__(self, latency_ms: float = 0.0):
+        self.latency_ms = latency_ms
+        self._data: Dict[bytes, Tuple[bytes, Optional[float]]] = {}
+        self.commands: Counter = Counter()
+
+    def _alive(self, key: bytes) -> Optional[bytes]:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        value, expires_at = item
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        return value
+
+    def execute(self, args: List[bytes]) -> Any:
+        """Runs one command and returns its reply (bytes, str for status, int, None or an Exception)."""
+        name = args[0].upper().decode("ascii")
+        self.commands[name] += 1
+        if name == "PING":
+            return "PONG"
+        if name in ("AUTH", "SELECT", "QUIT"):
+            return "OK"
+        if name == "GET":
+            return self._alive(args[1])
+        if name == "SET":
+            key, value, expires_at, condition = args[1], args[2], None, None
+            options = [arg.upper() for arg in args[3:]]
+            for index, option in enumerate(options):
+                if option in (b"EX", b"PX"):
+                    amount = float(args[3 + index + 1])
+                    expires_at = time.monotonic() + (amount if option == b"EX" else amount / 1000)
+                elif option in (b"NX", b"XX"):
+                    condition = option
+            exists = self._alive(key) is not None
+            if (condition == b"NX" and exists) or (condition == b"XX" and not exists):
+                return None
+            self._data[key] = (value, expires_at)
+            return "OK"
+        if name == "DEL":
+            return sum(self._data.pop(key, None) is not None for key in args[1:])
+        if name == "EXISTS":
+            return sum(self._alive(key) is not None for key in args[1:])
+        if name == "DBSIZE":
+            return sum(self._alive(key) is not None for key in list(self._data))
+        if name == "FLUSHDB":
+            self._data.clear()
+            return "OK"
+        return Exception(f"ERR unknown command '{name}'")
+
+    def stats(self) -> Dict[str, Any]:
+        return {"keys": len(self._data), "commands": dict(self.commands)}
+
+    async def _read_command(self, reader: asyncio.StreamReader) -> Optional[List[bytes]]:
+        line = await reader.readline()
+        if not line:
+            return None
+        if not line.startswith(b"*"):
+            return line.split()  # inline command, e.g. from telnet or redis-cli ping checks
+        args = []
+        for _ in range(int(line[1:-2])):
+            length = int((await reader.readline())[1:-2])
+            args.append((await reader.readexactly(length + 2))[:-2])
+        return args
+
+    @staticmethod
+    def _encode(reply: Any) -> bytes:
+        if reply is None:
+            return b"$-1\r\n"
+        if isinstance(reply, Exception):
+            return b"-%s\r\n" % str(reply).encode("utf-8")
+        if isinstance(reply, str):
+            return b"+%s\r\n" % reply.encode("utf-8")
+        if isinstance(reply, int):
+            return b":%d\r\n" % reply
+        return b"$%d\r\n%s\r\n" % (len(reply), reply)
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                args = await self._read_command(reader)
+                if not args:
+                    break
+                if self.latency_ms:
+                    await asyncio.sleep(self.latency_ms / 1000)
+                writer.write(self._encode(self.execute(args)))
+                await writer.drain()
+                if args[0].upper() == b"QUIT":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> asyncio.AbstractServer:
+        """Starts serving; with port=0 the chosen port is server.sockets[0].getsockname()[1]."""
+        return await asyncio.start_server(self.handle, host, port)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6390)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Delay added to every reply.")
+    args = parser.parse_args()
+
+    async def serve() -> None:
+        server = await FakeRedis(latency_ms=args.latency_ms).start(args.host, args.port)
+        async with server:
+            await server.serve_forever()
+    asyncio.run(serve())
+
+if __name__ == "__main__":
+    main()
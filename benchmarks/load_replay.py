@@ -0,0 +1,413 @@
+# benchmarks/load_replay.py
+"""
+Trace-replay load generator for the MCP server and the REST gateway.
+Replays agent sessions against one server instance whose upstream is a local
+FakeBedesten. Sessions come from a trace recorded with MEVZUAT_TRACE_FILE or
+are synthesized as search -> tree of a top hit -> first articles. The run
+steps through concurrent sessions (closed loop) or session arrival rates
+(open loop) and reports throughput, latency percentiles and error rates per
+endpoint, plus the level at which throughput stops growing:
+
+    MEVZUAT_TRACE_FILE=trace.jsonl mevzuat-mcp        # record real sessions
+    python benchmarks/load_replay.py --target mcp --transport memory --concurrency 1 4 16 64
+    python benchmarks/load_replay.py --target mcp --transport http --trace trace.jsonl --latency-ms 40
+    python benchmarks/load_replay.py --target rest --transport http --workers 2 --rate 2 5 10 --think-scale 1
+
+Servers run with their default (SQLite) cache in a temporary directory
+unless --cache says otherwise; all levels run against the same instance.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path[:0] = [REPO_DIR, BENCH_DIR]
+
+# Replayed calls must not be recorded again.
+os.environ.pop("MEVZUAT_TRACE_FILE", None)
+
+import httpx
+import uvicorn
+
+import fake_bedesten
+
+# (tool, arguments, seconds the agent spent before the call)
+Call = Tuple[str, Dict[str, Any], float]
+Session = List[Call]
+# Calls one tool and returns (endpoint label, ok), or None if the target has no equivalent.
+CallFn = Callable[[str, Dict[str, Any]], Awaitable[Optional[Tuple[str, bool]]]]
+
+SYNTHETIC_QUERIES = ["kanun", "vergi", "iş", "ceza", "ticaret", "sağlık", "eğitim", "enerji", "imar", "tüketici"]
+
+def percentile(samples: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of samples (seconds)."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, max(0, int(round(fraction * len(ordered))) - 1))]
+
+def load_trace(path: str, session_gap: float) -> List[Session]:
+    """Groups trace lines into sessions; a pause longer than session_gap starts a new one."""
+    by_session: Dict[str, List[Dict[str, Any]]] = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                entry = json.loads(line)
+                by_session.setdefault(entry["session"], []).append(entry)
+    sessions: List[Session] = []
+    for entries in by_session.values():
+        entries.sort(key=lambda entry: entry["ts"])
+        session: Session = []
+        previous_end: Optional[float] = None
+        for entry in entries:
+            # ts is taken when the call finished.
+            start = entry["ts"] - entry.get("latency_ms", 0.0) / 1000
+            think = max(0.0, start - previous_end) if previous_end is not None else 0.0
+            if think > session_gap and session:
+                sessions.append(session)
+                session, think = [], 0.0
+            session.append((entry["tool"], entry["arguments"], think))
+            previous_end = entry["ts"]
+        if session:
+            sessions.append(session)
+    return sessions
+
+def synthetic_sessions(fake: fake_bedesten.FakeBedesten, count: int, max_articles: int, seed: int = 0) -> List[Session]:
+    """Sessions of one search, the tree of one of its top hits and a few of its first articles, one second apart."""
+    rng = random.Random(seed)
+    sessions: List[Session] = []
+    for index in range(count):
+        query = f"{rng.choice(SYNTHETIC_QUERIES)} {index % 40}"
+        documents = fake.respond("searchDocuments", {"data": {"mevzuatAdi": query, "pageSize": 10, "pageNumber": 1}})["data"]["mevzuatList"]
+        mevzuat_id = str(rng.choice(documents[:3])["mevzuatId"])
+        stack = list(fake.respond("mevzuatMaddeTree", {"data": {"mevzuatId": mevzuat_id}})["data"]["children"])[::-1]
+        leaves: List[str] = []
+        while stack and len(leaves) < max_articles:
+            node = stack.pop()
+            if node.get("children"):
+                stack.extend(node["children"][::-1])
+            else:
+                leaves.append(str(node["maddeId"]))
+        session: Session = [
+            ("search_mevzuat", {"mevzuat_adi": query, "page_size": 10}, 0.0),
+            ("get_mevzuat_article_tree", {"mevzuat_id": mevzuat_id}, 1.0),
+        ]
+        session += [("get_mevzuat_article_content", {"mevzuat_id": mevzuat_id, "madde_id": madde_id}, 1.0)
+                    for madde_id in leaves[:rng.randint(1, max_articles)]]
+        sessions.append(session)
+    return sessions
+
+def rest_request(tool: str, arguments: Dict[str, Any]) -> Optional[Tuple[str, str, Dict[str, Any]]]:
+    """Maps an MCP tool call to the REST gateway: (method, path, JSON body or query parameters)."""
+    if tool == "search_mevzuat":
+        query = arguments.get("mevzuat_adi") or arguments.get("phrase")
+        if not query:
+            params = {name: arguments[name] for name in ("mevzuat_no", "resmi_gazete_sayisi", "page_number", "page_size") if arguments.get(name)}
+            return "GET", "/v1/search", params
+        body: Dict[str, Any] = {"query": query, "page_size": arguments.get("page_size", 10), "search_in_title": bool(arguments.get("mevzuat_adi"))}
+        if isinstance(arguments.get("mevzuat_turleri"), list):
+            body["mevzuat_turleri"] = arguments["mevzuat_turleri"]
+        return "POST", "/webhook/search", body
+    if tool == "get_mevzuat_article_tree":
+        options = {name: value for name, value in arguments.items() if name != "mevzuat_id" and value not in (None, 0)}
+        if options:
+            return "GET", f"/v1/mevzuat/{arguments['mevzuat_id']}/tree", options
+        return "POST", "/webhook/article-tree", {"mevzuat_id": arguments["mevzuat_id"]}
+    if tool == "get_mevzuat_article_content":
+        return "POST", "/webhook/article-content", {"mevzuat_id": arguments["mevzuat_id"], "madde_id": arguments["madde_id"]}
+    if tool == "get_mevzuat_changes":
+        return "GET", "/v1/changes", {name: value for name, value in arguments.items() if value is not None}
+    return None
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def serve_upstream(fake: fake_bedesten.FakeBedesten) -> str:
+    """Serves the fake API over local HTTP from a background thread; returns its base URL."""
+    server = uvicorn.Server(uvicorn.Config(fake, host="127.0.0.1", port=free_port(), log_level="warning", lifespan="off"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return f"http://127.0.0.1:{server.config.port}/mevzuat"
+
+def wait_until_listening(port: int, process: subprocess.Popen, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f"Server exited with status {process.returncode}")
+        with contextlib.suppress(OSError), socket.create_connection(("127.0.0.1", port), timeout=0.2):
+            return
+        time.sleep(0.1)
+    raise SystemExit(f"Server did not start listening on port {port}")
+
+def call_ok(result: Any) -> bool:
+    text = result.content[0].text if result.content else ""
+    return not result.is_error and '"error_message":"' not in text
+
+class McpTarget:
+    """The FastMCP server, in process (memory), as one stdio subprocess or as one HTTP subprocess."""
+    def __init__(self, transport: str, env: Dict[str, str]):
+        self.transport = transport
+        self.env = env
+        self._process: Optional[subprocess.Popen] = None
+        self._shared: Any = None
+        self._url = ""
+
+    async def start(self) -> None:
+        from fastmcp import Client
+        if self.transport == "memory":
+            import mevzuat_mcp_server
+            self._shared = Client(mevzuat_mcp_server.app)
+        elif self.transport == "stdio":
+            from fastmcp.client.transports import PythonStdioTransport
+            self._shared = Client(PythonStdioTransport(os.path.join(REPO_DIR, "mevzuat_mcp_server.py"), env=self.env, cwd=REPO_DIR))
+        else:
+            port = free_port()
+            code = ("import mevzuat_mcp_server as s; s.configure_log_pipeline(); "
+                    f"s.app.run(transport='http', host='127.0.0.1', port={port}, show_banner=False, log_level='warning', uvicorn_config={{'access_log': False}})")
+            self._process = subprocess.Popen([sys.executable, "-c", code], env=self.env, cwd=REPO_DIR)
+            wait_until_listening(port, self._process)
+            self._url = f"http://127.0.0.1:{port}/mcp/"
+        if self._shared is not None:
+            await self._shared.__aenter__()
+
+    @contextlib.asynccontextmanager
+    async def session(self, record: Callable[[str, float, bool], None]) -> AsyncIterator[CallFn]:
+        async def call_with(client: Any, tool: str, arguments: Dict[str, Any]) -> Tuple[str, bool]:
+            return tool, call_ok(await client.call_tool(tool, arguments, raise_on_error=False))
+        if self._shared is not None:
+            yield lambda tool, arguments: call_with(self._shared, tool, arguments)
+            return
+        # Over HTTP every agent session is its own MCP session, initialization included.
+        from fastmcp import Client
+        started = time.perf_counter()
+        async with Client(self._url) as client:
+            record("session_open", time.perf_counter() - started, True)
+            yield lambda tool, arguments: call_with(client, tool, arguments)
+
+    async def stop(self) -> None:
+        if self._shared is not None:
+            await self._shared.__aexit__(None, None, None)
+        if self._process is not None:
+            self._process.terminate()
+            self._process.wait()
+
+class RestTarget:
+    """simple_mevzuat_api, in process through ASGITransport (memory) or under uvicorn with --workers (http)."""
+    def __init__(self, transport: str, env: Dict[str, str], workers: int):
+        self.transport = transport
+        self.env = env
+        self.workers = workers
+        self._process: Optional[subprocess.Popen] = None
+        self._lifespan: Any = None
+        self._http: Optional[httpx.AsyncClient] = None
+
+    async def start(self) -> None:
+        if self.transport == "memory":
+            import simple_mevzuat_api
+            self._lifespan = simple_mevzuat_api.lifespan(simple_mevzuat_api.app)
+            await self._lifespan.__aenter__()
+            self._http = httpx.AsyncClient(transport=httpx.ASGITransport(app=simple_mevzuat_api.app), base_url="http://api.test", timeout=60)
+            return
+        port = free_port()
+        command = [sys.executable, "-m", "uvicorn", "simple_mevzuat_api:app", "--host", "127.0.0.1", "--port", str(port),
+                   "--workers", str(self.workers), "--log-level", "warning", "--no-access-log"]
+        self._process = subprocess.Popen(command, env=self.env, cwd=REPO_DIR)
+        wait_until_listening(port, self._process)
+        # Without TCP_NODELAY, Nagle's algorithm holds the request body behind the headers for a delayed ACK (~40 ms).
+        transport = httpx.AsyncHTTPTransport(limits=httpx.Limits(max_connections=1000, max_keepalive_connections=1000),
+                                             socket_options=[(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)])
+        self._http = httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=60, transport=transport)
+
+    @contextlib.asynccontextmanager
+    async def session(self, record: Callable[[str, float, bool], None]) -> AsyncIterator[CallFn]:
+        async def call(tool: str, arguments: Dict[str, Any]) -> Optional[Tuple[str, bool]]:
+            request = rest_request(tool, arguments)
+            if request is None:
+                return None
+            method, path, payload = request
+            if method == "GET":
+                response = await self._http.get(path, params=payload)
+            else:
+                response = await self._http.post(path, json=payload)
+            ok = response.status_code < 400
+            if ok and method == "POST":
+                ok = response.json().get("success", False)
+            # Label by route, not by id, so every article counts towards one endpoint.
+            label = f"{method} {path}" if not path.startswith("/v1/mevzuat/") else f"{method} /v1/mevzuat/{{id}}/tree"
+            return label, ok
+        yield call
+
+    async def stop(self) -> None:
+        if self._http is not None:
+            await self._http.aclose()
+        if self._lifespan is not None:
+            await self._lifespan.__aexit__(None, None, None)
+        if self._process is not None:
+            self._process.terminate()
+            self._process.wait()
+
+class LevelStats:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+        self.sessions = 0
+        self.skipped = 0
+
+    def record(self, endpoint: str, latency: float, ok: bool) -> None:
+        self.latencies.setdefault(endpoint, []).append(latency)
+        self.errors[endpoint] = self.errors.get(endpoint, 0) + (0 if ok else 1)
+
+    def summary(self, elapsed: float) -> Dict[str, Any]:
+        def row(latencies: List[float], errors: int) -> Dict[str, Any]:
+            return {
+                "calls": len(latencies), "errors": errors, "error_rate": round(errors / len(latencies), 4) if latencies else 0.0,
+                "p50_ms": round(percentile(latencies, 0.50) * 1000, 2), "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+                "p99_ms": round(percentile(latencies, 0.99) * 1000, 2), "per_s": round(len(latencies) / elapsed, 2),
+            }
+        calls = [latency for endpoint, latencies in self.latencies.items() if endpoint != "session_open" for latency in latencies]
+        errors = sum(count for endpoint, count in self.errors.items() if endpoint != "session_open")
+        return {
+            "elapsed_s": round(elapsed, 3), "sessions": self.sessions, "sessions_per_s": round(self.sessions / elapsed, 2),
+            "skipped_calls": self.skipped, **row(calls, errors),
+            "endpoints": {endpoint: row(latencies, self.errors[endpoint]) for endpoint, latencies in sorted(self.latencies.items())},
+        }
+
+async def run_level(target: Any, sessions: List[Session], duration: float, think_scale: float,
+                    concurrency: Optional[int] = None, rate: Optional[float] = None, seed: int = 0) -> Dict[str, Any]:
+    """
+    Closed loop (concurrency): that many sessions are always in flight, each starting the next when done.
+    Open loop (rate): sessions arrive as a Poisson process regardless of how fast earlier ones finish.
+    New sessions start only within `duration`; sessions in flight are allowed to finish.
+    """
+    stats = LevelStats()
+    rng = random.Random(seed)
+    next_session = iter(range(1 << 62))
+
+    async def play(session: Session) -> None:
+        async with target.session(stats.record) as call:
+            for tool, arguments, think in session:
+                if think and think_scale:
+                    await asyncio.sleep(think * think_scale)
+                started = time.perf_counter()
+                try:
+                    outcome = await call(tool, arguments)
+                except Exception:
+                    outcome = (tool, False)
+                if outcome is None:
+                    stats.skipped += 1
+                    continue
+                stats.record(outcome[0], time.perf_counter() - started, outcome[1])
+        stats.sessions += 1
+
+    started = time.perf_counter()
+    deadline = started + duration
+    if concurrency is not None:
+        async def worker() -> None:
+            while time.perf_counter() < deadline:
+                await play(sessions[next(next_session) % len(sessions)])
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    else:
+        tasks = []
+        while time.perf_counter() < deadline:
+            tasks.append(asyncio.ensure_future(play(sessions[next(next_session) % len(sessions)])))
+            await asyncio.sleep(rng.expovariate(rate))
+        await asyncio.gather(*tasks)
+    return stats.summary(time.perf_counter() - started)
+
+def saturation(levels: List[Tuple[float, Dict[str, Any]]], knee: float) -> Dict[str, Any]:
+    """Peak throughput, and the first level after which one more step adds less than `knee` throughput."""
+    peak_level, peak = max(levels, key=lambda item: item[1]["per_s"])
+    saturated_at = levels[-1][0]
+    for (level, current), (_, following) in zip(levels, levels[1:]):
+        if following["per_s"] < current["per_s"] * (1 + knee):
+            saturated_at = level
+            break
+    return {"peak_calls_per_s": peak["per_s"], "peak_sessions_per_s": peak["sessions_per_s"], "peak_level": peak_level, "saturated_at": saturated_at}
+
+def print_level(label: str, level: float, result: Dict[str, Any]) -> None:
+    print(f"{label} {level:g}: {result['sessions']} sessions ({result['sessions_per_s']}/s), {result['calls']} calls "
+          f"({result['per_s']}/s), errors {result['error_rate']:.2%}, p50 {result['p50_ms']} ms, p95 {result['p95_ms']} ms, p99 {result['p99_ms']} ms")
+    for endpoint, row in result["endpoints"].items():
+        print(f"    {endpoint:36} {row['calls']:>7} {row['per_s']:>9}/s {row['error_rate']:>8.2%} {row['p50_ms']:>9} {row['p95_ms']:>9} {row['p99_ms']:>9}")
+
+async def run(args: argparse.Namespace, sessions: List[Session], env: Dict[str, str]) -> Dict[str, Any]:
+    target = McpTarget(args.transport, env) if args.target == "mcp" else RestTarget(args.transport, env, args.workers)
+    await target.start()
+    label, steps = ("rate", args.rate) if args.rate else ("concurrency", args.concurrency)
+    print(f"{args.target}/{args.transport}: {len(sessions)} distinct sessions, {sum(map(len, sessions))} calls; "
+          f"endpoint {'calls':>7} {'calls/s':>11} {'errors':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    levels: List[Tuple[float, Dict[str, Any]]] = []
+    try:
+        if args.warmup:
+            await run_level(target, sessions, args.warmup, 0.0, concurrency=1)
+        for step in steps:
+            result = await run_level(target, sessions, args.duration, args.think_scale, seed=args.seed,
+                                     **({"rate": step} if args.rate else {"concurrency": int(step)}))
+            print_level(label, step, result)
+            levels.append((step, result))
+    finally:
+        await target.stop()
+    summary = saturation(levels, args.knee)
+    print(f"peak {summary['peak_calls_per_s']} calls/s ({summary['peak_sessions_per_s']} sessions/s) at {label} {summary['peak_level']:g}; "
+          f"throughput stops growing by {args.knee:.0%} per step after {label} {summary['saturated_at']:g}")
+    return {"target": args.target, "transport": args.transport, "mode": label, "levels": {f"{step:g}": result for step, result in levels}, **summary}
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    fake_bedesten.add_arguments(parser)
+    parser.add_argument("--target", choices=["mcp", "rest"], default="mcp")
+    parser.add_argument("--transport", choices=["memory", "stdio", "http"], default="memory",
+                        help="memory: in this process; stdio (mcp only): one server subprocess; http: one server subprocess over HTTP.")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers for --target rest --transport http.")
+    parser.add_argument("--trace", help="JSONL trace recorded with MEVZUAT_TRACE_FILE; synthetic sessions are used without it.")
+    parser.add_argument("--session-gap", type=float, default=300.0, help="Pause (s) that splits a recorded session in two.")
+    parser.add_argument("--sessions", type=int, default=200, help="Distinct synthetic sessions.")
+    parser.add_argument("--max-articles", type=int, default=5, help="Most articles read per synthetic session.")
+    parser.add_argument("--concurrency", type=float, nargs="+", default=[1, 4, 16, 64], help="Closed loop: concurrent sessions per step.")
+    parser.add_argument("--rate", type=float, nargs="+", help="Open loop: session arrivals per second per step (overrides --concurrency).")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per step during which new sessions start.")
+    parser.add_argument("--warmup", type=float, default=0.0, help="Seconds of single-session replay before the first step.")
+    parser.add_argument("--think-scale", type=float, default=0.0, help="Multiplier for the pauses between calls (0 = back to back).")
+    parser.add_argument("--cache", choices=["sqlite", "memory", "none"], default="sqlite", help="Server cache tier, in a temporary directory.")
+    parser.add_argument("--knee", type=float, default=0.1, help="Relative throughput gain below which a step counts as saturated.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Write the results to this file.")
+    args = parser.parse_args()
+    if args.target == "rest" and args.transport == "stdio":
+        parser.error("the REST gateway has no stdio transport")
+
+    fake = fake_bedesten.from_arguments(args)
+    sessions = load_trace(args.trace, args.session_gap) if args.trace else synthetic_sessions(fake, args.sessions, args.max_articles, args.seed)
+    if not sessions:
+        raise SystemExit(f"No sessions in {args.trace}")
+    with tempfile.TemporaryDirectory() as cache_dir:
+        env = {**os.environ, "MEVZUAT_BASE_URL": serve_upstream(fake), "MEVZUAT_CACHE_DIR": cache_dir, "MEVZUAT_LOG_LEVEL": "WARNING",
+               "MEVZUAT_CACHE": "0" if args.cache == "none" else "1", "MEVZUAT_CACHE_BACKEND": args.cache if args.cache != "none" else "sqlite"}
+        # In-process targets read the same settings from this process's environment.
+        os.environ.update(env)
+        if args.transport == "memory":
+            logging.disable(logging.INFO)
+        results = asyncio.run(run(args, sessions, env))
+    print(f"upstream: {fake.stats()}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({**results, "upstream": fake.stats()}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# benchmarks/record_fixtures.py
+"""
+Records raw bedesten.adalet.gov.tr responses for one or more legislations so
+benchmarks can run offline.
+
+    python benchmarks/record_fixtures.py 5237 6098 --max-articles 200
+
+For each legislation number the search response, the article tree and the
+content of its articles are written under benchmarks/fixtures/<endpoint>/.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+from typing import Any, Dict, List
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mevzuat_cache import make_cache_key
+from mevzuat_client import MevzuatApiClient
+from mevzuat_concurrency import gather_bounded
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+def fixture_path(fixtures_dir: str, endpoint: str, payload: Dict[str, Any]) -> str:
+    """Returns the file a recorded response for endpoint/payload is stored in."""
+    data = payload.get("data", {})
+    if endpoint == "mevzuatMaddeTree":
+        name = data["mevzuatId"]
+    elif endpoint == "getDocumentContent":
+        name = data["id"]
+    else:
+        name = make_cache_key(endpoint, payload).split(":", 1)[1]
+    return os.path.join(fixtures_dir, endpoint, f"{name}.json")
+
+async def record(http_client: httpx.AsyncClient, fixtures_dir: str, endpoint: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+    response = await http_client.post(f"{MevzuatApiClient.BASE_URL}/{endpoint}", json=payload)
+    response.raise_for_status()
+    data = response.json()
+    path = fixture_path(fixtures_dir, endpoint, payload)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"request": payload, "response": data}, f, ensure_ascii=False)
+    return data
+
+def leaf_ids(nodes: List[Dict[str, Any]]) -> List[str]:
+    ids = []
+    for node in nodes:
+        if node.get("children"):
+            ids.extend(leaf_ids(node["children"]))
+        else:
+            ids.append(node["maddeId"])
+    return ids
+
+async def record_mevzuat(http_client: httpx.AsyncClient, fixtures_dir: str, mevzuat_no: str, max_articles: int, concurrency: int) -> None:
+    search_payload = {
+        "data": {"pageSize": 10, "pageNumber": 1, "mevzuatTurList": ["KANUN"], "sortFields": ["RESMI_GAZETE_TARIHI"], "sortDirection": "desc", "mevzuatNo": mevzuat_no},
+        "applicationName": "UyapMevzuat", "paging": True
+    }
+    search = await record(http_client, fixtures_dir, "searchDocuments", search_payload)
+    documents = search.get("data", {}).get("mevzuatList", [])
+    if not documents:
+        print(f"{mevzuat_no}: no documents found")
+        return
+    mevzuat_id = documents[0]["mevzuatId"]
+    tree = await record(http_client, fixtures_dir, "mevzuatMaddeTree", {"data": {"mevzuatId": mevzuat_id}, "applicationName": "UyapMevzuat"})
+    madde_ids = leaf_ids(tree.get("data", {}).get("children", []))[:max_articles]
+    await gather_bounded(
+        [lambda madde_id=madde_id: record(http_client, fixtures_dir, "getDocumentContent", {"data": {"id": madde_id, "documentType": "MADDE"}, "applicationName": "UyapMevzuat"}) for madde_id in madde_ids],
+        concurrency
+    )
+    print(f"{mevzuat_no}: recorded mevzuat {mevzuat_id} with {len(madde_ids)} articles")
+
+async def main_async(args: argparse.Namespace) -> None:
+    async with httpx.AsyncClient(headers=MevzuatApiClient.HEADERS, timeout=30.0, follow_redirects=True) as http_client:
+        for mevzuat_no in args.mevzuat_no:
+            await record_mevzuat(http_client, args.fixtures, mevzuat_no, args.max_articles, args.concurrency)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("mevzuat_no", nargs="+", help="Legislation numbers to record, e.g. 5237.")
+    parser.add_argument("--fixtures", default=FIXTURES_DIR, help="Directory the responses are written to.")
+    parser.add_argument("--max-articles", type=int, default=500, help="Maximum number of articles recorded per legislation.")
+    parser.add_argument("--concurrency", type=int, default=4, help="Concurrent content requests.")
+    asyncio.run(main_async(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
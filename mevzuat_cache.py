@@ -0,0 +1,484 @@
+# mevzuat_cache.py
+"""
+Tiered response cache for the Mevzuat API client.
+A bounded in-process LRU sits in front of a pluggable backend so that
+repeated upstream calls are answered locally and survive restarts. The
+default SQLite backend (WAL mode) and the Redis backend are shared by every
+process on the host, which also coordinate through short leases so that an
+entry missing everywhere is loaded (and converted) by one process only.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional, Set, Tuple
+from urllib.parse import unquote, urlparse
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTLS: Dict[str, float] = {
+    "searchDocuments": 15 * 60,
+    "mevzuatMaddeTree": 24 * 60 * 60,
+    "getDocumentContent": 7 * 24 * 60 * 60,
+}
+DEFAULT_STALE_TTL = 24 * 60 * 60
+DEFAULT_LEASE_TTL = 30.0
+LEASE_POLL_INTERVAL = 0.05
+
+def default_cache_dir() -> str:
+    """Directory for persistent local state, configurable through MEVZUAT_CACHE_DIR."""
+    return os.environ.get("MEVZUAT_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "mevzuat-mcp"))
+
+def make_cache_key(endpoint: str, payload: Dict[str, Any]) -> str:
+    """Builds a stable key from the endpoint name and the canonical JSON form of the payload."""
+    canonical = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return f"{endpoint}:{hashlib.sha256(canonical.encode('utf-8')).hexdigest()}"
+
+class CacheEntry(NamedTuple):
+    value: Any
+    expires_at: float
+    stale_until: float
+
+class MemoryLRU:
+    """Bounded least-recently-used mapping of cache keys to entries."""
+    def __init__(self, max_entries: int = 2048):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def set(self, key: str, entry: CacheEntry) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+class CacheBackend:
+    """
+    Second cache tier behind the in-process LRU.
+    Methods are coroutines so that remote backends do not block the event loop.
+    Backends with shared=True are visible to other processes, which then use
+    acquire_lease/release_lease to load a missing entry only once.
+    """
+    shared = False
+
+    async def get(self, key: str) -> Optional[CacheEntry]:
+        raise NotImplementedError
+
+    async def set(self, key: str, endpoint: str, entry: CacheEntry) -> None:
+        raise NotImplementedError
+
+    async def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    async def acquire_lease(self, key: str, ttl: float) -> bool:
+        """Claims the right to load key for ttl seconds; False if another process holds it."""
+        return True
+
+    async def release_lease(self, key: str) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+class MemoryBackend(CacheBackend):
+    """In-process backend, e.g. a larger second tier in front of which a small LRU is kept hot."""
+    def __init__(self, max_entries: int = 100000):
+        self._entries = MemoryLRU(max_entries)
+
+    async def get(self, key: str) -> Optional[CacheEntry]:
+        return self._entries.get(key)
+
+    async def set(self, key: str, endpoint: str, entry: CacheEntry) -> None:
+        self._entries.set(key, entry)
+
+    async def delete(self, key: str) -> None:
+        self._entries.delete(key)
+
+class SQLiteStore(CacheBackend):
+    """
+    Persistent key/value store for cache entries, values are kept as JSON text.
+    The database runs in WAL mode, so any number of processes on the host can
+    read it while one writes. Statements run on a dedicated thread: waiting up
+    to busy_timeout for another process's write lock, or for an fsync, never
+    blocks the event loop.
+    """
+    shared = True
+
+    def __init__(self, path: str, busy_timeout: float = 5.0):
+        directory = os.path.dirname(os.path.abspath(path))
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        self.path = path
+        # One thread owns the connection, so statements are serialized without a lock.
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="mevzuat-sqlite-cache")
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=busy_timeout)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "key TEXT PRIMARY KEY, endpoint TEXT NOT NULL, value TEXT NOT NULL, "
+            "expires_at REAL NOT NULL, stale_until REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE TABLE IF NOT EXISTS leases (key TEXT PRIMARY KEY, expires_at REAL NOT NULL)")
+
+    async def _run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    def _get(self, key: str) -> Optional[CacheEntry]:
+        row = self._conn.execute("SELECT value, expires_at, stale_until FROM cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        return CacheEntry(json.loads(row[0]), row[1], row[2])
+
+    def _set(self, key: str, endpoint: str, entry: CacheEntry) -> None:
+        self._conn.execute(
+            "INSERT OR REPLACE INTO cache (key, endpoint, value, expires_at, stale_until) VALUES (?, ?, ?, ?, ?)",
+            (key, endpoint, json.dumps(entry.value, ensure_ascii=False), entry.expires_at, entry.stale_until)
+        )
+
+    def _acquire_lease(self, key: str, ttl: float) -> bool:
+        now = time.time()
+        # Leases left behind by a crashed process expire on their own.
+        self._conn.execute("DELETE FROM leases WHERE key = ? AND expires_at < ?", (key, now))
+        return self._conn.execute("INSERT OR IGNORE INTO leases (key, expires_at) VALUES (?, ?)", (key, now + ttl)).rowcount == 1
+
+    async def get(self, key: str) -> Optional[CacheEntry]:
+        return await self._run(self._get, key)
+
+    async def set(self, key: str, endpoint: str, entry: CacheEntry) -> None:
+        await self._run(self._set, key, endpoint, entry)
+
+    async def delete(self, key: str) -> None:
+        await self._run(self._conn.execute, "DELETE FROM cache WHERE key = ?", (key,))
+
+    async def acquire_lease(self, key: str, ttl: float) -> bool:
+        return await self._run(self._acquire_lease, key, ttl)
+
+    async def release_lease(self, key: str) -> None:
+        await self._run(self._conn.execute, "DELETE FROM leases WHERE key = ?", (key,))
+
+    def purge_expired(self, now: Optional[float] = None) -> int:
+        """Deletes entries past their stale window; blocking, meant for maintenance scripts."""
+        def purge() -> int:
+            at = now or time.time()
+            self._conn.execute("DELETE FROM leases WHERE expires_at < ?", (at,))
+            return self._conn.execute("DELETE FROM cache WHERE stale_until < ?", (at,)).rowcount
+        return self._executor.submit(purge).result()
+
+    async def close(self) -> None:
+        await self._run(self._conn.close)
+        self._executor.shutdown(wait=False)
+
+class RedisError(Exception):
+    """Error reply or protocol failure from the Redis server."""
+    pass
+
+_REDIS_ERRORS = (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, RedisError)
+
+class RedisBackend(CacheBackend):
+    """
+    Backend on a Redis (or Redis-protocol compatible) server, spoken over RESP2 with asyncio streams.
+    Entries are stored as JSON with a PX expiry at the end of their stale window; leases are SET NX PX keys.
+    Connection failures are treated as misses so that the cache never takes the client down with it.
+    """
+    shared = True
+
+    def __init__(self, url: str = "redis://127.0.0.1:6379/0", prefix: str = "mevzuat:", pool_size: int = 4, timeout: float = 2.0):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "127.0.0.1"
+        self.port = parsed.port or 6379
+        self.password = unquote(parsed.password) if parsed.password else None
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.prefix = prefix
+        self.timeout = timeout
+        self._pool: "asyncio.Queue[Tuple[asyncio.StreamReader, asyncio.StreamWriter]]" = asyncio.Queue()
+        self._slots = asyncio.Semaphore(pool_size)
+        self._writers: List[asyncio.StreamWriter] = []
+
+    async def _connect(self) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(self.host, self.port), self.timeout)
+        self._writers.append(writer)
+        if self.password:
+            await self._roundtrip(reader, writer, "AUTH", self.password)
+        if self.db:
+            await self._roundtrip(reader, writer, "SELECT", str(self.db))
+        return reader, writer
+
+    async def _roundtrip(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, *args: Any) -> Any:
+        parts = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode("utf-8")
+            parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        writer.write(b"".join(parts))
+        await writer.drain()
+        return await asyncio.wait_for(self._read_reply(reader), self.timeout)
+
+    async def _read_reply(self, reader: asyncio.StreamReader) -> Any:
+        line = await reader.readline()
+        if not line:
+            raise ConnectionError("Redis connection closed")
+        kind, rest = line[:1], line[1:-2]
+        if kind == b"+":
+            return rest.decode("utf-8")
+        if kind == b"-":
+            raise RedisError(rest.decode("utf-8"))
+        if kind == b":":
+            return int(rest)
+        if kind == b"$":
+            length = int(rest)
+            return None if length < 0 else (await reader.readexactly(length + 2))[:-2]
+        if kind == b"*":
+            count = int(rest)
+            return None if count < 0 else [await self._read_reply(reader) for _ in range(count)]
+        raise RedisError(f"Unexpected reply: {line!r}")
+
+    async def execute(self, *args: Any) -> Any:
+        """Runs one command on a pooled connection; a broken connection is dropped, not returned to the pool."""
+        async with self._slots:
+            reader, writer = self._pool.get_nowait() if not self._pool.empty() else await self._connect()
+            try:
+                reply = await self._roundtrip(reader, writer, *args)
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError):
+                writer.close()
+                self._writers.remove(writer)
+                raise
+            self._pool.put_nowait((reader, writer))
+            return reply
+
+    async def _execute_or_none(self, *args: Any) -> Any:
+        try:
+            return await self.execute(*args)
+        except _REDIS_ERRORS as e:
+            logger.warning("Redis cache command %s failed: %s", args[0], e)
+            return None
+
+    async def get(self, key: str) -> Optional[CacheEntry]:
+        raw = await self._execute_or_none("GET", self.prefix + key)
+        if raw is None:
+            return None
+        value, expires_at, stale_until = json.loads(raw)
+        return CacheEntry(value, expires_at, stale_until)
+
+    async def set(self, key: str, endpoint: str, entry: CacheEntry) -> None:
+        ttl_ms = int((entry.stale_until - time.time()) * 1000)
+        if ttl_ms > 0:
+            data = json.dumps([entry.value, entry.expires_at, entry.stale_until], ensure_ascii=False)
+            await self._execute_or_none("SET", self.prefix + key, data, "PX", ttl_ms)
+
+    async def delete(self, key: str) -> None:
+        await self._execute_or_none("DEL", self.prefix + key)
+
+    async def acquire_lease(self, key: str, ttl: float) -> bool:
+        try:
+            return await self.execute("SET", f"{self.prefix}lease:{key}", str(os.getpid()), "NX", "PX", int(ttl * 1000)) is not None
+        except _REDIS_ERRORS as e:
+            # Load locally rather than wait on a lease nobody can grant.
+            logger.warning("Redis cache lease failed: %s", e)
+            return True
+
+    async def release_lease(self, key: str) -> None:
+        await self._execute_or_none("DEL", f"{self.prefix}lease:{key}")
+
+    async def close(self) -> None:
+        for writer in self._writers:
+            writer.close()
+        self._writers.clear()
+
+def backend_from_env() -> Optional[CacheBackend]:
+    """Builds the second cache tier selected by MEVZUAT_CACHE_BACKEND, or None."""
+    name = os.environ.get("MEVZUAT_CACHE_BACKEND", "sqlite").lower()
+    if name == "none" or os.environ.get("MEVZUAT_CACHE_PERSISTENT", "1") == "0":
+        return None
+    if name == "sqlite":
+        return SQLiteStore(os.path.join(default_cache_dir(), "responses.sqlite3"))
+    if name == "redis":
+        return RedisBackend(os.environ.get("MEVZUAT_REDIS_URL", "redis://127.0.0.1:6379/0"))
+    if name == "memory":
+        return MemoryBackend(int(os.environ.get("MEVZUAT_CACHE_BACKEND_ENTRIES", "100000")))
+    raise ValueError(f"Unknown MEVZUAT_CACHE_BACKEND: {name!r} (expected sqlite, redis, memory or none)")
+
+class ResponseCache:
+    """
+    Two-tier cache with per-endpoint TTLs and stale-while-revalidate.
+    Entries past their TTL but inside the stale window are served immediately
+    while a background task reloads them. When the second tier is shared, a
+    miss waits (up to lease_ttl) for another process already loading the same
+    key instead of loading it again.
+    """
+    def __init__(
+        self,
+        memory: Optional[MemoryLRU] = None,
+        persistent: Optional[CacheBackend] = None,
+        ttls: Optional[Dict[str, float]] = None,
+        stale_ttl: float = DEFAULT_STALE_TTL,
+        lease_ttl: float = DEFAULT_LEASE_TTL,
+    ):
+        self.memory = memory if memory is not None else MemoryLRU()
+        self.persistent = persistent
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.stale_ttl = stale_ttl
+        self.lease_ttl = lease_ttl
+        self._revalidating: Set[str] = set()
+        self._tasks: Set[asyncio.Task] = set()
+        self._stats: Dict[str, int] = {
+            "memory_hits": 0, "persistent_hits": 0, "misses": 0, "stale_hits": 0,
+            "stores": 0, "revalidations": 0, "revalidation_errors": 0, "lease_waits": 0, "shared_fills": 0,
+        }
+
+    @classmethod
+    def from_env(cls) -> "ResponseCache":
+        """
+        Builds a cache from MEVZUAT_CACHE_* environment variables.
+        MEVZUAT_CACHE_BACKEND selects the second tier: 'sqlite' (default), 'redis' (MEVZUAT_REDIS_URL),
+        'memory' or 'none'; MEVZUAT_CACHE_PERSISTENT=0 is the same as 'none'.
+        """
+        ttls = {}
+        for endpoint, env_name in (("searchDocuments", "SEARCH"), ("mevzuatMaddeTree", "TREE"), ("getDocumentContent", "CONTENT")):
+            value = os.environ.get(f"MEVZUAT_CACHE_TTL_{env_name}")
+            if value:
+                ttls[endpoint] = float(value)
+        return cls(
+            memory=MemoryLRU(int(os.environ.get("MEVZUAT_CACHE_MEMORY_ENTRIES", "2048"))),
+            persistent=backend_from_env(),
+            ttls=ttls,
+            stale_ttl=float(os.environ.get("MEVZUAT_CACHE_STALE_TTL", str(DEFAULT_STALE_TTL))),
+            lease_ttl=float(os.environ.get("MEVZUAT_CACHE_LEASE_TTL", str(DEFAULT_LEASE_TTL))),
+        )
+
+    def stats(self) -> Dict[str, int]:
+        stats = dict(self._stats)
+        stats["memory_entries"] = len(self.memory)
+        return stats
+
+    async def _lookup(self, key: str) -> Optional[CacheEntry]:
+        entry = self.memory.get(key)
+        if entry is not None:
+            self._stats["memory_hits"] += 1
+            return entry
+        if self.persistent is not None:
+            entry = await self.persistent.get(key)
+            if entry is not None:
+                self._stats["persistent_hits"] += 1
+                self.memory.set(key, entry)
+                return entry
+        return None
+
+    async def peek(self, key: str) -> Optional[CacheEntry]:
+        """Returns whatever entry is stored for key, however old, without counting a hit or miss."""
+        entry = self.memory.get(key)
+        if entry is None and self.persistent is not None:
+            entry = await self.persistent.get(key)
+        return entry
+
+    async def get(self, key: str) -> Optional[CacheEntry]:
+        """Returns the entry for key if it is still servable (fresh or stale), otherwise None."""
+        entry = await self._lookup(key)
+        if entry is None or entry.stale_until < time.time():
+            self._stats["misses"] += 1
+            return None
+        return entry
+
+    async def set(self, endpoint: str, key: str, value: Any) -> None:
+        now = time.time()
+        ttl = self.ttls.get(endpoint, 0)
+        entry = CacheEntry(value, now + ttl, now + ttl + self.stale_ttl)
+        self.memory.set(key, entry)
+        if self.persistent is not None:
+            await self.persistent.set(key, endpoint, entry)
+        self._stats["stores"] += 1
+
+    async def invalidate(self, key: str) -> None:
+        self.memory.delete(key)
+        if self.persistent is not None:
+            await self.persistent.delete(key)
+
+    async def get_or_load(self, endpoint: str, key: str, loader: Callable[[], Awaitable[Any]], refresh: bool = False,
+                          fill: Optional[Callable[[], Awaitable[Any]]] = None) -> Any:
+        """
+        Serves key from cache, loading (and storing) it on a miss and revalidating it in the background when stale.
+        fill, if given, is a second-level source tried on a miss before loader; its value is returned without
+        being cached, and it is never used to revalidate. With refresh=True the cached entry is ignored and
+        replaced by a fresh load.
+        """
+        entry = None if refresh else await self.get(key)
+        if entry is not None:
+            if entry.expires_at < time.time():
+                self._stats["stale_hits"] += 1
+                self._schedule_revalidation(endpoint, key, loader)
+            return entry.value
+        if fill is not None and not refresh:
+            value = await fill()
+            if value is not None:
+                return value
+        if not refresh and self.persistent is not None and self.persistent.shared:
+            return await self._load_once(endpoint, key, loader)
+        value = await loader()
+        await self.set(endpoint, key, value)
+        return value
+
+    async def _load_once(self, endpoint: str, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        # Take the backend's lease for key, or wait for the process holding it to store a fresh entry.
+        deadline = time.monotonic() + self.lease_ttl
+        leased = await self.persistent.acquire_lease(key, self.lease_ttl)
+        if not leased:
+            self._stats["lease_waits"] += 1
+        while not leased and time.monotonic() < deadline:
+            await asyncio.sleep(LEASE_POLL_INTERVAL)
+            entry = await self.persistent.get(key)
+            if entry is not None and entry.expires_at >= time.time():
+                self._stats["shared_fills"] += 1
+                self.memory.set(key, entry)
+                return entry.value
+            leased = await self.persistent.acquire_lease(key, self.lease_ttl)
+        try:
+            value = await loader()
+            await self.set(endpoint, key, value)
+            return value
+        finally:
+            if leased:
+                await self.persistent.release_lease(key)
+
+    def _schedule_revalidation(self, endpoint: str, key: str, loader: Callable[[], Awaitable[Any]]) -> None:
+        if key in self._revalidating:
+            return
+        self._revalidating.add(key)
+        task = asyncio.create_task(self._revalidate(endpoint, key, loader))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _revalidate(self, endpoint: str, key: str, loader: Callable[[], Awaitable[Any]]) -> None:
+        try:
+            value = await loader()
+            await self.set(endpoint, key, value)
+            self._stats["revalidations"] += 1
+        except Exception:
+            self._stats["revalidation_errors"] += 1
+            logger.warning(f"Background revalidation failed for {key}", exc_info=True)
+        finally:
+            self._revalidating.discard(key)
+
+    async def close(self) -> None:
+        for task in list(self._tasks):
+            task.cancel()
+        if self.persistent is not None:
+            await self.persistent.close()
@@ -0,0 +1,182 @@
+# mevzuat_changes.py
+"""
+Change detection for legislation fetched through the client.
+A hash of every raw article payload (the base64 content as returned by
+getDocumentContent) and of every article tree is recorded on each upstream
+fetch. A refresh can then tell unchanged articles from amended ones without
+converting them again, and every difference from the previous fetch is
+appended to a changes feed: modified articles, and articles added to or
+removed from a legislation's tree. Records are written by a writer thread,
+many per transaction, so fetches never wait for a commit.
+"""
+
+import datetime
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from mevzuat_models import MevzuatChange
+from mevzuat_sqlite import SQLiteWriter, connect
+
+logger = logging.getLogger(__name__)
+
+def payload_hash(data: str) -> str:
+    return hashlib.blake2b(data.encode("utf-8"), digest_size=16).hexdigest()
+
+def tree_fingerprint(children: List[Dict[str, Any]]) -> Tuple[str, List[str]]:
+    """Returns the hash of a raw article tree (ids, numbers, titles and nesting) and its leaf maddeIds in document order."""
+    canonical = json.dumps(children, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    leaves: List[str] = []
+    stack = list(reversed(children))
+    while stack:
+        node = stack.pop()
+        node_children = node.get("children") or []
+        if node_children:
+            stack.extend(reversed(node_children))
+        else:
+            leaves.append(str(node.get("maddeId")))
+    return payload_hash(canonical), leaves
+
+class ChangeTracker:
+    """
+    SQLite record of the last seen payload hash per article and tree, plus the feed of detected changes.
+    Hashes recorded but not yet committed are kept in memory, so lookups see them immediately.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._conn = connect(path)
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS articles ("
+            "madde_id TEXT PRIMARY KEY, mevzuat_id TEXT NOT NULL, hash TEXT NOT NULL, checked_at REAL NOT NULL, changed_at REAL NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS trees ("
+            "mevzuat_id TEXT PRIMARY KEY, hash TEXT NOT NULL, leaves TEXT NOT NULL, checked_at REAL NOT NULL, changed_at REAL NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS changes ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, mevzuat_id TEXT NOT NULL, madde_id TEXT, change TEXT NOT NULL, detected_at REAL NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS changes_mevzuat_id ON changes (mevzuat_id, detected_at);"
+        )
+        self._stats: Dict[str, int] = {"articles_checked": 0, "articles_unchanged": 0, "articles_modified": 0, "trees_checked": 0, "trees_changed": 0}
+        self._writer = SQLiteWriter(path, "changes")
+        # madde_id -> hash and mevzuat_id -> (hash, leaves JSON) queued but not yet committed.
+        self._pending_articles: Dict[str, str] = {}
+        self._pending_trees: Dict[str, Tuple[str, str]] = {}
+        self._pending_lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, cache_dir: str) -> Optional["ChangeTracker"]:
+        """Opens the tracker under cache_dir unless MEVZUAT_CHANGE_TRACKING=0."""
+        if os.environ.get("MEVZUAT_CHANGE_TRACKING", "1") == "0":
+            return None
+        return cls(os.path.join(cache_dir, "changes.sqlite3"))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self._stats, "changes": self._conn.execute("SELECT COUNT(*) FROM changes").fetchone()[0],
+            "writer": self._writer.stats(),
+        }
+
+    def flush(self) -> None:
+        """Blocks until every recorded hash and change is committed."""
+        self._writer.flush()
+
+    def article_hash(self, madde_id: str) -> Optional[str]:
+        pending = self._pending_articles.get(madde_id)
+        if pending is not None:
+            return pending
+        row = self._conn.execute("SELECT hash FROM articles WHERE madde_id = ?", (madde_id,)).fetchone()
+        return row[0] if row is not None else None
+
+    def _tree_row(self, mevzuat_id: str) -> Optional[Tuple[str, str]]:
+        pending = self._pending_trees.get(mevzuat_id)
+        if pending is not None:
+            return pending
+        return self._conn.execute("SELECT hash, leaves FROM trees WHERE mevzuat_id = ?", (mevzuat_id,)).fetchone()
+
+    def tree_hash(self, mevzuat_id: str) -> Optional[str]:
+        row = self._tree_row(mevzuat_id)
+        return row[0] if row is not None else None
+
+    def _committed(self, pending: Dict[str, Any], key: str, value: Any) -> None:
+        # Runs on the writer thread; a newer value queued meanwhile stays pending.
+        with self._pending_lock:
+            if pending.get(key) == value:
+                del pending[key]
+
+    def record_article(self, mevzuat_id: str, madde_id: str, digest: str) -> bool:
+        """Records the payload hash of a fetched article; returns True if it differs from the previous fetch."""
+        now = time.time()
+        previous = self.article_hash(madde_id)
+        self._stats["articles_checked"] += 1
+        if previous == digest:
+            self._stats["articles_unchanged"] += 1
+            self._writer.submit(lambda conn: conn.execute("UPDATE articles SET checked_at = ? WHERE madde_id = ?", (now, madde_id)))
+            return False
+        if previous is not None:
+            self._stats["articles_modified"] += 1
+        def write(conn: sqlite3.Connection) -> None:
+            conn.execute(
+                "INSERT OR REPLACE INTO articles (madde_id, mevzuat_id, hash, checked_at, changed_at) VALUES (?, ?, ?, ?, ?)",
+                (madde_id, mevzuat_id, digest, now, now)
+            )
+            if previous is not None:
+                conn.execute("INSERT INTO changes (mevzuat_id, madde_id, change, detected_at) VALUES (?, ?, 'modified', ?)", (mevzuat_id, madde_id, now))
+        with self._pending_lock:
+            self._pending_articles[madde_id] = digest
+        self._writer.submit(write, lambda: self._committed(self._pending_articles, madde_id, digest))
+        return previous is not None
+
+    def record_tree(self, mevzuat_id: str, children: List[Dict[str, Any]]) -> bool:
+        """Records the fingerprint of a fetched article tree; returns True if it differs from the previous fetch."""
+        digest, leaves = tree_fingerprint(children)
+        now = time.time()
+        row = self._tree_row(mevzuat_id)
+        self._stats["trees_checked"] += 1
+        if row is not None and row[0] == digest:
+            self._writer.submit(lambda conn: conn.execute("UPDATE trees SET checked_at = ? WHERE mevzuat_id = ?", (now, mevzuat_id)))
+            return False
+        changes = []
+        if row is not None:
+            self._stats["trees_changed"] += 1
+            old_leaves, new_leaves = set(json.loads(row[1])), set(leaves)
+            changes = [(mevzuat_id, madde_id, "added", now) for madde_id in leaves if madde_id not in old_leaves]
+            changes += [(mevzuat_id, madde_id, "removed", now) for madde_id in json.loads(row[1]) if madde_id not in new_leaves]
+            # A tree can change without adding or removing articles (titles, renumbering, restructuring).
+            changes = changes or [(mevzuat_id, None, "restructured", now)]
+        value = (digest, json.dumps(leaves))
+        def write(conn: sqlite3.Connection) -> None:
+            conn.execute(
+                "INSERT OR REPLACE INTO trees (mevzuat_id, hash, leaves, checked_at, changed_at) VALUES (?, ?, ?, ?, ?)",
+                (mevzuat_id, value[0], value[1], now, now)
+            )
+            conn.executemany("INSERT INTO changes (mevzuat_id, madde_id, change, detected_at) VALUES (?, ?, ?, ?)", changes)
+        with self._pending_lock:
+            self._pending_trees[mevzuat_id] = value
+        self._writer.submit(write, lambda: self._committed(self._pending_trees, mevzuat_id, value))
+        return row is not None
+
+    def tracked_documents(self) -> List[str]:
+        """mevzuat_ids of every legislation whose tree has been fetched, least recently checked first."""
+        return [row[0] for row in self._conn.execute("SELECT mevzuat_id FROM trees ORDER BY checked_at")]
+
+    def changes(self, since: Optional[float] = None, mevzuat_id: Optional[str] = None, limit: int = 100) -> List[MevzuatChange]:
+        """Returns detected changes, newest first, optionally only those after `since` (epoch seconds) or of one legislation."""
+        sql = "SELECT mevzuat_id, madde_id, change, detected_at FROM changes WHERE detected_at > ?"
+        params: List[Any] = [since or 0.0]
+        if mevzuat_id:
+            sql += " AND mevzuat_id = ?"
+            params.append(mevzuat_id)
+        sql += " ORDER BY id DESC LIMIT ?"
+        params.append(limit)
+        return [
+            MevzuatChange(mevzuat_id=row[0], madde_id=row[1], change=row[2],
+                          detected_at=datetime.datetime.fromtimestamp(row[3], tz=datetime.timezone.utc))
+            for row in self._conn.execute(sql, params)
+        ]
+
+    def close(self) -> None:
+        self._writer.close()
+        self._conn.close()
@@ -0,0 +1,354 @@
+# mevzuat_citations.py
+"""
+Resolution of Turkish legislation citations to article contents.
+Citations such as "5237 sayılı TCK m. 81", "6098 sayılı Kanun madde 49",
+"TMK'nın 166. maddesi" or "İş Kanunu madde 17" are parsed into (legislation number, type, article
+number, article kind). A local SQLite index maps (mevzuat_no, type) to a
+mevzuat_id, learned from search results, and (mevzuat_id, kind, number) to
+a maddeId, learned from article trees. Only index misses reach the API.
+The listeners only queue their rows; a writer thread commits them in batches.
+"""
+
+import json
+import logging
+import os
+import re
+import sqlite3
+import time
+from typing import TYPE_CHECKING, Any, Dict, List, NamedTuple, Optional, Tuple
+
+from mevzuat_concurrency import gather_bounded
+from mevzuat_models import MaddeKindEnum, MevzuatCitation, MevzuatSearchRequest, MevzuatSearchResult, MevzuatTurEnum
+from mevzuat_sqlite import SQLiteWriter, connect
+from mevzuat_text import fold_turkish
+from mevzuat_tree import FlatArticleTree
+
+if TYPE_CHECKING:
+    from mevzuat_client import MevzuatApiClient
+
+logger = logging.getLogger(__name__)
+
+# Common abbreviations, folded (see fold_turkish), to (mevzuat_no, type).
+ABBREVIATIONS: Dict[str, Tuple[int, MevzuatTurEnum]] = {
+    "tck": (5237, MevzuatTurEnum.KANUN),
+    "tbk": (6098, MevzuatTurEnum.KANUN),
+    "tmk": (4721, MevzuatTurEnum.KANUN),
+    "hmk": (6100, MevzuatTurEnum.KANUN),
+    "cmk": (5271, MevzuatTurEnum.KANUN),
+    "ik": (4857, MevzuatTurEnum.KANUN),
+    "ttk": (6102, MevzuatTurEnum.KANUN),
+    "iik": (2004, MevzuatTurEnum.KANUN),
+    "iyuk": (2577, MevzuatTurEnum.KANUN),
+    "vuk": (213, MevzuatTurEnum.KANUN),
+    "kvkk": (6698, MevzuatTurEnum.KANUN),
+    "tkhk": (6502, MevzuatTurEnum.KANUN),
+    "isk": (4857, MevzuatTurEnum.KANUN),
+}
+# Names of commonly cited laws, folded and without their case suffix ("İş Kanununun" -> "is kanun"), to (mevzuat_no, type).
+NAMED_LAWS: Dict[str, Tuple[int, MevzuatTurEnum]] = {
+    "anayasa": (2709, MevzuatTurEnum.KANUN),
+    "is kanun": (4857, MevzuatTurEnum.KANUN),
+    "turk ceza kanun": (5237, MevzuatTurEnum.KANUN),
+    "turk borclar kanun": (6098, MevzuatTurEnum.KANUN),
+    "turk medeni kanun": (4721, MevzuatTurEnum.KANUN),
+    "turk ticaret kanun": (6102, MevzuatTurEnum.KANUN),
+    "hukuk muhakemeleri kanun": (6100, MevzuatTurEnum.KANUN),
+    "ceza muhakemesi kanun": (5271, MevzuatTurEnum.KANUN),
+    "icra ve iflas kanun": (2004, MevzuatTurEnum.KANUN),
+    "idari yargilama usulu kanun": (2577, MevzuatTurEnum.KANUN),
+    "vergi usul kanun": (213, MevzuatTurEnum.KANUN),
+    "kisisel verilerin korunmasi kanun": (6698, MevzuatTurEnum.KANUN),
+    "tuketicinin korunmasi hakkinda kanun": (6502, MevzuatTurEnum.KANUN),
+    "is sagligi ve guvenligi kanun": (6331, MevzuatTurEnum.KANUN),
+    "sosyal sigortalar ve genel saglik sigortasi kanun": (5510, MevzuatTurEnum.KANUN),
+    "devlet memurlari kanun": (657, MevzuatTurEnum.KANUN),
+    "kabahatler kanun": (5326, MevzuatTurEnum.KANUN),
+}
+# Words following "<no> sayılı" that name the type of the legislation, folded.
+_TUR_WORDS = [
+    ("kanun hukmunde kararname", MevzuatTurEnum.KHK), ("khk", MevzuatTurEnum.KHK),
+    ("cumhurbaskanligi kararname", MevzuatTurEnum.CB_KARARNAME), ("cumhurbaskanligi yonetmelig", MevzuatTurEnum.CB_YONETMELIK),
+    ("kanun", MevzuatTurEnum.KANUN), ("tuzu", MevzuatTurEnum.TUZUK), ("yonetmelik", MevzuatTurEnum.YONETMELIK),
+]
+_ABBR = "|".join(sorted(ABBREVIATIONS, key=len, reverse=True))
+# "Anayasa Mahkemesi" is a court, not the Constitution.
+_NAMES = "(?:" + "|".join(r"\s+".join(name.split()) for name in sorted(NAMED_LAWS, key=len, reverse=True)) + r")(?!\w*\s+mahkeme)\w*"
+_LAW_RE = re.compile(
+    r"(?<![\w.])(?:(?P<no>\d{1,5})\s*(?:sayili|s\.)(?:\s*(?P<titled>" + _NAMES + r")"
+    r"|\s*(?P<tur>" + "|".join(re.escape(word) for word, _ in _TUR_WORDS) + r")\w*"
+    r"|\s*(?P<named>" + _ABBR + r")(?!\w))?|(?P<abbr>" + _ABBR + r")(?!\w)|(?P<name>" + _NAMES + r"))"
+)
+_KIND = r"(?P<kind>gecici|gec\.|ek)?\s*"
+# "madde 49", "m. 81", "md. 5", "geçici madde 1"
+_ARTICLE_RE = re.compile(r"(?<!\w)" + _KIND + r"(?:madde\w*|mad\.|md\.?|m\.)\s*(?P<madde>\d+)")
+# "81. maddesi", "49 uncu madde", "1 inci ek madde", "geçici 2 nci madde", "17 nci ve 18 inci maddeleri"
+_ORDINAL = r"\d+\s*(?:\.|'?\s*[iu]?nc[iu])?"
+_ORDINAL_RE = re.compile(
+    r"(?<![\w.])(?:(?P<kind>gecici|ek)\s+)?(?P<listed>(?:" + _ORDINAL + r"\s*(?:,|ve|ile)\s*)*)(?P<madde>\d+)\s*(?:\.|'?\s*[iu]?nc[iu])?\s*"
+    + _KIND.replace("kind", "kind2") + r"madde\w*"
+)
+# "TCK 81", "TCK/81", "TCK'nın 81" right after the legislation
+_BARE_RE = re.compile(r"(?:'\w*)?\s*/?\s*(?P<madde>\d+)(?![\w.]|\s*sayili)")
+# Further numbers of a list: "m. 81, 82 ve 83"
+_LIST_RE = re.compile(r"\s*(?:,|ve|ile)\s*(?P<madde>\d+)(?![\w.']|\s*(?:sayili|s\.|[iu]?nc))")
+# "bu Kanunun", "bu Yönetmeliğin": the legislation the text belongs to ("aynı Kanun" is the one cited before)
+_SELF_RE = re.compile(r"(?<!\w)bu\s+(?:kanun|yonetmeli|kararname|tuzu|teblig)\w*")
+MAX_ARTICLE_DISTANCE = 120
+
+class ParsedCitation(NamedTuple):
+    text: str
+    # None for a reference to the citing legislation itself ("bu Kanunun 5 inci maddesi").
+    mevzuat_no: Optional[int]
+    tur: Optional[MevzuatTurEnum]
+    madde_no: Optional[int]
+    kind: MaddeKindEnum
+
+def _named_law(folded_name: str) -> Tuple[int, MevzuatTurEnum]:
+    words = folded_name.split()
+    # The last word carries the case suffix: "kanununun" -> "kanun", "anayasanin" -> "anayasa".
+    for name, law in NAMED_LAWS.items():
+        stem = name.split()
+        if len(stem) == len(words) and words[:-1] == stem[:-1] and words[-1].startswith(stem[-1]):
+            return law
+    raise KeyError(folded_name)
+
+def _kind(word: Optional[str]) -> MaddeKindEnum:
+    if not word:
+        return MaddeKindEnum.MADDE
+    return MaddeKindEnum.EK_MADDE if word == "ek" else MaddeKindEnum.GECICI_MADDE
+
+def _article_mentions(segment: str) -> List[Tuple[int, List[int], MaddeKindEnum]]:
+    """(end offset, article numbers, kind) of every article mention in a folded segment."""
+    mentions: List[Tuple[int, int, List[int], MaddeKindEnum]] = []
+    for match in list(_ARTICLE_RE.finditer(segment)) + list(_ORDINAL_RE.finditer(segment)):
+        if any(start <= match.start() < stop for start, stop, _, _ in mentions):
+            continue
+        stop = match.end()
+        numbers = [int(number) for number in re.findall(r"\d+", match.groupdict().get("listed") or "")] + [int(match.group("madde"))]
+        for listed in iter(lambda: _LIST_RE.match(segment, stop), None):
+            numbers.append(int(listed.group("madde")))
+            stop = listed.end()
+        mentions.append((match.start(), stop, numbers, _kind(match.groupdict().get("kind") or match.groupdict().get("kind2"))))
+    return [(stop, numbers, kind) for _, stop, numbers, kind in mentions]
+
+def parse_citations(text: str, self_references: bool = False) -> List[ParsedCitation]:
+    """
+    Finds every citation in text. A legislation mentioned without an article number yields one
+    citation with madde_no None; one mentioned with a list of articles yields one per article.
+    With self_references, articles of "bu Kanun", "bu Yönetmelik" ... are returned with mevzuat_no None.
+    """
+    # Folding keeps every character in place, so spans found in the folded text index the original.
+    folded = fold_turkish(text)
+    mentions = list(_LAW_RE.finditer(folded))
+    if self_references:
+        mentions = sorted(mentions + list(_SELF_RE.finditer(folded)), key=lambda match: match.start())
+    citations: List[ParsedCitation] = []
+    for position, law in enumerate(mentions):
+        end = mentions[position + 1].start() if position + 1 < len(mentions) else len(folded)
+        segment = folded[law.end():min(end, law.end() + MAX_ARTICLE_DISTANCE)]
+        articles = _article_mentions(segment)
+        if law.re is _SELF_RE:
+            mevzuat_no, tur = None, None
+        elif law.group("no"):
+            mevzuat_no = int(law.group("no"))
+            if law.group("named"):
+                tur = ABBREVIATIONS[law.group("named")][1]
+            elif law.group("titled"):
+                tur = _named_law(law.group("titled"))[1]
+            else:
+                tur = next((tur for word, tur in _TUR_WORDS if word == law.group("tur")), None)
+        elif law.group("name"):
+            mevzuat_no, tur = _named_law(law.group("name"))
+        else:
+            mevzuat_no, tur = ABBREVIATIONS[law.group("abbr")]
+        for stop, numbers, kind in articles:
+            span = text[law.start():law.end() + stop].strip()
+            citations.extend(ParsedCitation(span, mevzuat_no, tur, number, kind) for number in numbers)
+        if articles or mevzuat_no is None:
+            continue
+        bare = _BARE_RE.match(segment)
+        if bare is not None:
+            citations.append(ParsedCitation(text[law.start():law.end() + bare.end()].strip(), mevzuat_no, tur, int(bare.group("madde")), MaddeKindEnum.MADDE))
+        else:
+            citations.append(ParsedCitation(text[law.start():law.end()].strip(), mevzuat_no, tur, None, MaddeKindEnum.MADDE))
+    return citations
+
+class CitationIndex:
+    """SQLite index of legislation ids by (mevzuat_no, type) and of maddeIds by (mevzuat_id, kind, article number)."""
+    def __init__(self, path: str, article_max_age: float = 7 * 24 * 60 * 60):
+        self.path = path
+        self.article_max_age = article_max_age
+        self._conn = connect(path)
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS documents ("
+            "mevzuat_no INTEGER NOT NULL, tur TEXT NOT NULL, mevzuat_id TEXT NOT NULL, mevzuat_adi TEXT, updated_at REAL NOT NULL, "
+            "PRIMARY KEY (mevzuat_no, tur));"
+            "CREATE TABLE IF NOT EXISTS articles ("
+            "mevzuat_id TEXT NOT NULL, kind TEXT NOT NULL, madde_no INTEGER NOT NULL, madde_id TEXT NOT NULL, "
+            "title TEXT, path TEXT NOT NULL, updated_at REAL NOT NULL, PRIMARY KEY (mevzuat_id, kind, madde_no));"
+        )
+        self._stats = {"document_hits": 0, "document_misses": 0, "article_hits": 0, "article_misses": 0}
+        self._writer = SQLiteWriter(path, "citations")
+
+    @classmethod
+    def from_env(cls, cache_dir: str) -> Optional["CitationIndex"]:
+        """Opens the index under cache_dir unless MEVZUAT_CITATION_INDEX=0."""
+        if os.environ.get("MEVZUAT_CITATION_INDEX", "1") == "0":
+            return None
+        return cls(os.path.join(cache_dir, "citations.sqlite3"))
+
+    def attach(self, client: "MevzuatApiClient") -> "CitationIndex":
+        client.add_search_listener(self.add_search_result)
+        client.add_tree_listener(self.add_tree)
+        return self
+
+    def add_search_result(self, result: MevzuatSearchResult) -> None:
+        """Search listener: remembers the mevzuat_id of every numbered legislation in the results."""
+        rows = [
+            (doc.mevzuat_no, doc.mevzuat_tur.name, doc.mevzuat_id, doc.mevzuat_adi, time.time())
+            for doc in result.documents if doc.mevzuat_no is not None
+        ]
+        if rows:
+            self._writer.submit(lambda conn: conn.executemany("INSERT OR REPLACE INTO documents VALUES (?, ?, ?, ?, ?)", rows))
+
+    def add_tree(self, flat: FlatArticleTree) -> None:
+        """Tree listener: remembers the maddeId of every numbered article of a legislation."""
+        now = time.time()
+        rows = [
+            (flat.mevzuat_id, kind.value, madde_no, flat.madde_ids[index], flat.titles[index], json.dumps(flat.path(index), ensure_ascii=False), now)
+            for kind, madde_no, index in flat.numbered_articles()
+        ]
+        def write(conn: sqlite3.Connection) -> None:
+            conn.execute("DELETE FROM articles WHERE mevzuat_id = ?", (flat.mevzuat_id,))
+            conn.executemany("INSERT OR REPLACE INTO articles VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+        self._writer.submit(write)
+
+    def find_document(self, mevzuat_no: int, tur: Optional[MevzuatTurEnum]) -> Optional[Tuple[str, Optional[str]]]:
+        """(mevzuat_id, mevzuat_adi) of a legislation; without a type, a KANUN is preferred."""
+        found = self.lookup_document(mevzuat_no, tur)
+        self._stats["document_hits" if found is not None else "document_misses"] += 1
+        return found
+
+    def lookup_document(self, mevzuat_no: int, tur: Optional[MevzuatTurEnum]) -> Optional[Tuple[str, Optional[str]]]:
+        """Like find_document, without counting towards the hit rate of citation resolution (for other indexes)."""
+        if tur is not None:
+            row = self._conn.execute("SELECT mevzuat_id, mevzuat_adi FROM documents WHERE mevzuat_no = ? AND tur = ?", (mevzuat_no, tur.value)).fetchone()
+        else:
+            row = self._conn.execute(
+                "SELECT mevzuat_id, mevzuat_adi FROM documents WHERE mevzuat_no = ? ORDER BY tur != 'KANUN', updated_at DESC", (mevzuat_no,)
+            ).fetchone()
+        return (row[0], row[1]) if row is not None else None
+
+    def document_numbers(self, mevzuat_id: str) -> List[Tuple[int, str]]:
+        """(mevzuat_no, type) pairs under which a legislation is known."""
+        return [(row[0], row[1]) for row in self._conn.execute("SELECT mevzuat_no, tur FROM documents WHERE mevzuat_id = ?", (mevzuat_id,))]
+
+    def find_article(self, mevzuat_id: str, kind: MaddeKindEnum, madde_no: int) -> Optional[Tuple[str, Optional[str], List[str]]]:
+        """(madde_id, title, path) of an article, if its tree was indexed within article_max_age."""
+        row = self._conn.execute(
+            "SELECT madde_id, title, path FROM articles WHERE mevzuat_id = ? AND kind = ? AND madde_no = ? AND updated_at >= ?",
+            (mevzuat_id, kind.value, madde_no, time.time() - self.article_max_age)
+        ).fetchone()
+        self._stats["article_hits" if row is not None else "article_misses"] += 1
+        return (row[0], row[1], json.loads(row[2])) if row is not None else None
+
+    def flush(self) -> None:
+        """Blocks until every queued legislation and article is visible to lookups."""
+        self._writer.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self._stats,
+            "documents": self._conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0],
+            "articles": self._conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0],
+            "writer": self._writer.stats(),
+        }
+
+    def close(self) -> None:
+        self._writer.close()
+        self._conn.close()
+
+async def _find_document(client: "MevzuatApiClient", mevzuat_no: int, tur: Optional[MevzuatTurEnum]) -> Optional[Tuple[str, Optional[str]]]:
+    index = client.citation_index
+    if index is not None:
+        found = index.find_document(mevzuat_no, tur)
+        if found is not None:
+            return found
+    request = MevzuatSearchRequest(mevzuat_no=str(mevzuat_no), page_size=10, **({"mevzuat_tur_list": [tur]} if tur is not None else {}))
+    result = await client.search_documents(request)
+    matches = [doc for doc in result.documents if doc.mevzuat_no == mevzuat_no and (tur is None or doc.mevzuat_tur.name == tur.value)]
+    matches.sort(key=lambda doc: doc.mevzuat_tur.name != MevzuatTurEnum.KANUN.value)
+    return (matches[0].mevzuat_id, matches[0].mevzuat_adi) if matches else None
+
+async def _find_article(client: "MevzuatApiClient", mevzuat_id: str, kind: MaddeKindEnum, madde_no: int) -> Tuple[Optional[Tuple[str, Optional[str], List[str]]], Optional[str]]:
+    index = client.citation_index
+    if index is not None:
+        found = index.find_article(mevzuat_id, kind, madde_no)
+        if found is not None:
+            return found, None
+    flat = await client.get_flat_tree(mevzuat_id)
+    if flat is None:
+        return None, "The article tree for this legislation could not be retrieved."
+    position = flat.find_article(madde_no, kind)
+    if position is None:
+        return None, f"{kind.value} {madde_no} was not found in this legislation."
+    return (flat.madde_ids[position], flat.titles[position], flat.path(position)), None
+
+async def resolve_citations(client: "MevzuatApiClient", texts: List[str], include_content: bool = True, max_concurrency: int = 8) -> List[MevzuatCitation]:
+    """
+    Parses citations out of texts and resolves each to its legislation, article and (optionally) content.
+    Results follow the order of the citations in the texts; a text without any citation yields one
+    result carrying an error_message.
+    """
+    parsed: List[Tuple[str, Optional[ParsedCitation]]] = []
+    for text in texts:
+        citations = parse_citations(text)
+        if citations:
+            parsed.extend((text, citation) for citation in citations)
+        else:
+            parsed.append((text, None))
+
+    # Every distinct legislation and article is looked up once, however often it is cited.
+    laws = {(citation.mevzuat_no, citation.tur) for _, citation in parsed if citation is not None}
+    law_keys = list(laws)
+    documents = dict(zip(law_keys, await gather_bounded(
+        [lambda key=key: _find_document(client, *key) for key in law_keys], max_concurrency
+    )))
+    article_keys = list({
+        (documents[(citation.mevzuat_no, citation.tur)][0], citation.kind, citation.madde_no)
+        for _, citation in parsed
+        if citation is not None and citation.madde_no is not None and documents[(citation.mevzuat_no, citation.tur)] is not None
+    })
+    articles = dict(zip(article_keys, await gather_bounded(
+        [lambda key=key: _find_article(client, *key) for key in article_keys], max_concurrency
+    )))
+    content_keys = list({(key[0], found[0]) for key, (found, _) in articles.items() if found is not None}) if include_content else []
+    contents = dict(zip(content_keys, await gather_bounded(
+        [lambda key=key: client.get_article_content(key[1], key[0]) for key in content_keys], max_concurrency
+    )))
+
+    results: List[MevzuatCitation] = []
+    for text, citation in parsed:
+        if citation is None:
+            results.append(MevzuatCitation(citation=text, error_message="No legislation citation was recognized in this text."))
+            continue
+        result = MevzuatCitation(
+            citation=citation.text, mevzuat_no=citation.mevzuat_no, mevzuat_tur=citation.tur,
+            madde_no=citation.madde_no, kind=citation.kind
+        )
+        document = documents[(citation.mevzuat_no, citation.tur)]
+        if document is None:
+            result.error_message = f"No legislation numbered {citation.mevzuat_no} was found."
+        else:
+            result.mevzuat_id, result.mevzuat_adi = document
+            if citation.madde_no is not None:
+                found, error = articles[(document[0], citation.kind, citation.madde_no)]
+                if found is None:
+                    result.error_message = error
+                else:
+                    result.madde_id, result.title, result.path = found
+                    if include_content:
+                        content = contents[(document[0], found[0])]
+                        result.markdown_content, result.error_message = content.markdown_content, content.error_message
+        results.append(result)
+    return results
@@ -4,19 +4,52 @@ API Client for interacting with the Adalet Bakanlığı Mevzuat API (bedesten.ad
 This client handles the business logic of making HTTP requests and parsing responses.
 """
 
+import asyncio
 import httpx
 import logging
 import base64
-import io
-from bs4 import BeautifulSoup
-from markitdown import MarkItDown
-from typing import Dict, List, Optional, Any
+import os
+import time
+from collections import OrderedDict, deque
+from pydantic import TypeAdapter
+from typing import Dict, List, Optional, Any, AsyncIterator, Awaitable, Callable, Deque, Iterator, Tuple
 from mevzuat_models import (
     MevzuatSearchRequest, MevzuatSearchResult, MevzuatDocument, MevzuatTur,
-    MevzuatArticleNode, MevzuatArticleContent
+    MevzuatArticleNode, MevzuatArticleContent, MevzuatFullText, MevzuatNumberedArticle, MaddeKindEnum, MevzuatArticleRef
 )
+from mevzuat_cache import DEFAULT_TTLS, ResponseCache, default_cache_dir, make_cache_key
+from mevzuat_changes import ChangeTracker, payload_hash
+from mevzuat_citations import CitationIndex
+from mevzuat_concurrency import (
+    AdaptiveLimiter, RetryPolicy, SingleFlight, RETRYABLE_STATUS_CODES,
+    current_priority, gather_bounded, parse_retry_after
+)
+from mevzuat_converter import ConversionPool
+from mevzuat_metrics import CONTENT_STAGE_SECONDS, UPSTREAM_LATENCY, UPSTREAM_REQUESTS, UPSTREAM_RESPONSE_BYTES
+from mevzuat_search_index import ArticleSearchIndex
+from mevzuat_store import ArticleStore
+from mevzuat_prefetch import Prefetcher
+from mevzuat_tree import FlatArticleTree
+from mevzuat_xref import ReferenceGraph
+
+# Validates a whole mevzuatList in one call instead of one model_validate per document.
+_DOCUMENT_LIST = TypeAdapter(List[MevzuatDocument])
+ContentListener = Callable[[MevzuatArticleContent], None]
+SearchListener = Callable[[MevzuatSearchResult], None]
+# (endpoint, mevzuat_id, resource id) of every tree and content request, cached or not.
+RequestListener = Callable[[Tuple[str, str, str]], None]
+TreeListener = Callable[[FlatArticleTree], None]
 logger = logging.getLogger(__name__)
 
+def iter_article_nodes(nodes: List[MevzuatArticleNode], depth: int = 0) -> Iterator[Tuple[MevzuatArticleNode, int]]:
+    """Yields (node, depth) pairs for an article tree in document order."""
+    for node in nodes:
+        yield node, depth
+        yield from iter_article_nodes(node.children, depth + 1)
+
+class MevzuatApiError(Exception):
+    """Raised when the upstream API answers with a non-SUCCESS metadata block."""
+
 class MevzuatApiClient:
     BASE_URL = "https://bedesten.adalet.gov.tr/mevzuat"
     HEADERS = {
@@ -27,33 +60,235 @@ class MevzuatApiClient:
         'Referer': 'https://mevzuat.adalet.gov.tr/',
         'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
     }
-    def __init__(self, timeout: float = 30.0):
-        self._http_client = httpx.AsyncClient(headers=self.HEADERS, timeout=timeout, follow_redirects=True)
-        self._md_converter = MarkItDown()
+    FLAT_TREE_CACHE_SIZE = 256
+
+    def __init__(
+        self,
+        timeout: float = 30.0,
+        cache: Optional[ResponseCache] = None,
+        converter: Optional[ConversionPool] = None,
+        search_index: Optional[ArticleSearchIndex] = None,
+        limiter: Optional[AdaptiveLimiter] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        base_url: Optional[str] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        article_store: Optional[ArticleStore] = None,
+        change_tracker: Optional[ChangeTracker] = None,
+        citation_index: Optional[CitationIndex] = None,
+        reference_graph: Optional[ReferenceGraph] = None,
+    ):
+        self.base_url = (base_url or self.BASE_URL).rstrip("/")
+        self._limiter = limiter if limiter is not None else AdaptiveLimiter()
+        self._retry_policy = retry_policy if retry_policy is not None else RetryPolicy()
+        self._retries = 0
+        # The pool is sized to the limiter's ceiling so requests queue by priority in the limiter, not inside httpx.
+        self._http_client = httpx.AsyncClient(
+            headers=self.HEADERS, timeout=timeout, follow_redirects=True, transport=transport,
+            limits=httpx.Limits(max_connections=self._limiter.max_limit, max_keepalive_connections=self._limiter.max_limit)
+        )
+        self._converter = converter if converter is not None else ConversionPool()
+        self._cache = cache
+        self._flights = SingleFlight()
+        # mevzuat_id -> (raw tree it was built from, flat tree); rebuilt when the cache hands out a different raw tree.
+        self._flat_trees: "OrderedDict[str, Tuple[List[Dict[str, Any]], FlatArticleTree]]" = OrderedDict()
+        self._content_listeners: List[ContentListener] = []
+        self._search_listeners: List[SearchListener] = []
+        self._request_listeners: List[RequestListener] = []
+        self._tree_listeners: List[TreeListener] = []
+        self.prefetcher: Optional[Prefetcher] = None
+        self._search_index = search_index
+        if search_index is not None:
+            self.add_content_listener(search_index.add_article)
+            self.add_search_listener(search_index.add_search_result)
+        self._article_store = article_store
+        if article_store is not None:
+            self.add_content_listener(article_store.add_article)
+        self._change_tracker = change_tracker
+        self._conversions_skipped = 0
+        self._citation_index = citation_index.attach(self) if citation_index is not None else None
+        self._reference_graph = reference_graph.attach(self) if reference_graph is not None else None
+
+    @classmethod
+    def from_env(cls) -> "MevzuatApiClient":
+        """Builds a client configured from MEVZUAT_* environment variables."""
+        cache = ResponseCache.from_env() if os.environ.get("MEVZUAT_CACHE", "1") != "0" else None
+        client = cls(
+            timeout=float(os.environ.get("MEVZUAT_TIMEOUT", "30")),
+            cache=cache,
+            converter=ConversionPool.from_env(),
+            search_index=ArticleSearchIndex.from_env(default_cache_dir()),
+            limiter=AdaptiveLimiter(
+                initial_limit=int(os.environ.get("MEVZUAT_INITIAL_CONCURRENCY", "8")),
+                max_limit=int(os.environ.get("MEVZUAT_MAX_CONCURRENCY", "32")),
+                target_latency=float(os.environ.get("MEVZUAT_TARGET_LATENCY", "2.0")),
+            ),
+            retry_policy=RetryPolicy(max_attempts=int(os.environ.get("MEVZUAT_MAX_ATTEMPTS", "4"))),
+            base_url=os.environ.get("MEVZUAT_BASE_URL"),
+            article_store=ArticleStore.from_env(default_cache_dir()),
+            change_tracker=ChangeTracker.from_env(default_cache_dir()),
+            citation_index=CitationIndex.from_env(default_cache_dir()),
+            reference_graph=ReferenceGraph.from_env(default_cache_dir()),
+        )
+        # Prefetched data is only kept if there is a cache to keep it in.
+        if cache is not None:
+            prefetcher = Prefetcher.from_env(client)
+            client.prefetcher = prefetcher.attach() if prefetcher is not None else None
+        return client
+
+    @property
+    def cache(self) -> Optional[ResponseCache]:
+        return self._cache
+
+    @property
+    def search_index(self) -> Optional[ArticleSearchIndex]:
+        return self._search_index
+
+    @property
+    def change_tracker(self) -> Optional[ChangeTracker]:
+        return self._change_tracker
+
+    @property
+    def citation_index(self) -> Optional[CitationIndex]:
+        return self._citation_index
+
+    @property
+    def reference_graph(self) -> Optional[ReferenceGraph]:
+        return self._reference_graph
+
+    @property
+    def limiter(self) -> AdaptiveLimiter:
+        return self._limiter
+
+    @property
+    def converter(self) -> ConversionPool:
+        return self._converter
+
+    def add_content_listener(self, listener: ContentListener) -> None:
+        """Registers a callback invoked with every article freshly fetched and converted from upstream."""
+        self._content_listeners.append(listener)
+
+    def add_search_listener(self, listener: SearchListener) -> None:
+        """Registers a callback invoked with every successful search result."""
+        self._search_listeners.append(listener)
+
+    def add_request_listener(self, listener: RequestListener) -> None:
+        """Registers a callback invoked at the start of every article tree and content request, before the cache is consulted."""
+        self._request_listeners.append(listener)
+
+    def add_tree_listener(self, listener: TreeListener) -> None:
+        """Registers a callback invoked with every article tree newly indexed into a FlatArticleTree."""
+        self._tree_listeners.append(listener)
+
+    def _notify(self, listeners: List[Callable[[Any], None]], item: Any) -> None:
+        for listener in listeners:
+            try:
+                listener(item)
+            except Exception:
+                logger.exception(f"Listener {listener!r} failed")
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns the cache, request-coalescing and conversion counters."""
+        return {
+            "cache": self._cache.stats() if self._cache is not None else None,
+            "singleflight": self._flights.stats(),
+            "conversion": self._converter.stats(),
+            "search_index": self._search_index.stats() if self._search_index is not None else None,
+            "article_store": self._article_store.stats() if self._article_store is not None else None,
+            "changes": {**self._change_tracker.stats(), "conversions_skipped": self._conversions_skipped} if self._change_tracker is not None else None,
+            "upstream": {**self._limiter.stats(), "retries": self._retries},
+            "prefetch": self.prefetcher.stats() if self.prefetcher is not None else None,
+            "citations": self._citation_index.stats() if self._citation_index is not None else None,
+            "references": self._reference_graph.stats() if self._reference_graph is not None else None,
+        }
 
     async def close(self):
+        if self.prefetcher is not None:
+            await self.prefetcher.close()
+        if self._cache is not None:
+            await self._cache.close()
+        self._converter.shutdown()
+        if self._search_index is not None:
+            self._search_index.close()
+        if self._article_store is not None:
+            self._article_store.close()
+        if self._change_tracker is not None:
+            self._change_tracker.close()
+        if self._citation_index is not None:
+            self._citation_index.close()
+        if self._reference_graph is not None:
+            self._reference_graph.close()
         await self._http_client.aclose()
 
-    def _html_from_base64(self, b64_string: str) -> str:
-        try:
-            decoded_bytes = base64.b64decode(b64_string)
-            return decoded_bytes.decode('utf-8')
-        except Exception: return ""
+    async def _post(self, endpoint: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        POSTs payload to the given endpoint and returns its 'data' block, raising MevzuatApiError on a non-SUCCESS reply.
+        Requests go through the adaptive limiter at the caller's priority; transport errors and 429/5xx replies are
+        retried with jittered backoff, honouring Retry-After.
+        """
+        attempt = 0
+        while True:
+            await self._limiter.acquire(current_priority())
+            started = time.perf_counter()
+            try:
+                response = await self._http_client.post(f"{self.base_url}/{endpoint}", json=payload)
+            except httpx.TransportError:
+                self._limiter.release(time.perf_counter() - started, overloaded=True)
+                UPSTREAM_REQUESTS.labels(endpoint, "transport_error").inc()
+                if attempt + 1 >= self._retry_policy.max_attempts:
+                    raise
+                delay = self._retry_policy.delay(attempt)
+            except BaseException:
+                self._limiter.release()
+                raise
+            else:
+                latency = time.perf_counter() - started
+                overloaded = response.status_code in RETRYABLE_STATUS_CODES
+                self._limiter.release(latency, overloaded=overloaded)
+                UPSTREAM_LATENCY.labels(endpoint).observe(latency)
+                UPSTREAM_REQUESTS.labels(endpoint, response.status_code).inc()
+                if not overloaded or attempt + 1 >= self._retry_policy.max_attempts:
+                    break
+                delay = self._retry_policy.delay(attempt, parse_retry_after(response.headers.get("Retry-After")))
+            attempt += 1
+            self._retries += 1
+            logger.warning("Retrying %s in %.2fs (attempt %d/%d)", endpoint, delay, attempt + 1, self._retry_policy.max_attempts)
+            await asyncio.sleep(delay)
+        response.raise_for_status()
+        UPSTREAM_RESPONSE_BYTES.labels(endpoint).observe(len(response.content))
+        data = response.json()
+        metadata = data.get("metadata", {})
+        if metadata.get("FMTY") != "SUCCESS":
+            raise MevzuatApiError(metadata.get("FMTE", ""))
+        return data.get("data", {})
+
+    async def _cached(self, endpoint: str, payload: Dict[str, Any], loader: Callable[[], Awaitable[Any]], refresh: bool = False,
+                      fill: Optional[Callable[[], Awaitable[Any]]] = None) -> Any:
+        """
+        Runs loader through the response cache (if configured) keyed by endpoint and payload.
+        fill is a second-level source tried on a cache miss only, never to revalidate or refresh.
+        Concurrent calls with the same key share a single cache lookup, upstream request and conversion.
+        With refresh=True the cache is bypassed for reading but still updated with the fresh value.
+        """
+        key = make_cache_key(endpoint, payload)
+        if self._cache is None:
+            async def fill_or_load() -> Any:
+                value = await fill() if fill is not None and not refresh else None
+                return value if value is not None else await loader()
+            return await self._flights.run(f"{key}:refresh" if refresh else key, fill_or_load)
+        flight_key = f"{key}:refresh" if refresh else key
+        return await self._flights.run(flight_key, lambda: self._cache.get_or_load(endpoint, key, loader, refresh=refresh, fill=fill))
+
+    def _article_store_max_age(self) -> float:
+        # A stored article is never served for longer than the cache would serve the response it was converted from.
+        return self._cache.ttls["getDocumentContent"] if self._cache is not None else DEFAULT_TTLS["getDocumentContent"]
 
-    def _markdown_from_html(self, html_content: str) -> str:
-        if not html_content: return ""
+    def _html_from_base64(self, b64_string: str) -> bytes:
+        # The decoded bytes go straight to the converter; lxml parses them without a str round trip.
         try:
-            html_bytes = html_content.encode('utf-8')
-            html_io = io.BytesIO(html_bytes)
-            conv_res = self._md_converter.convert(html_io)
-            if conv_res and conv_res.text_content:
-                return conv_res.text_content.strip()
-            return ""
-        except Exception:
-            soup = BeautifulSoup(html_content, 'lxml')
-            return soup.get_text(separator='\n', strip=True)
+            return base64.b64decode(b64_string)
+        except Exception: return b""
 
-    async def search_documents(self, request: MevzuatSearchRequest) -> MevzuatSearchResult:
+    async def search_documents(self, request: MevzuatSearchRequest, refresh: bool = False) -> MevzuatSearchResult:
         """Performs a detailed search for legislation documents."""
         payload = {
             "data": {
@@ -77,51 +312,229 @@ class MevzuatApiClient:
             payload["data"]["resmiGazeteSayi"] = request.resmi_gazete_sayisi
             
         try:
-            response = await self._http_client.post(f"{self.BASE_URL}/searchDocuments", json=payload)
-            response.raise_for_status()
-            data = response.json()
-            if data.get("metadata", {}).get("FMTY") != "SUCCESS":
-                error_msg = data.get("metadata", {}).get("FMTE", "Unknown API error")
-                return MevzuatSearchResult(documents=[], total_results=0, current_page=request.page_number, page_size=request.page_size, total_pages=0, query_used=request.model_dump(), error_message=error_msg)
-            result_data = data.get("data", {})
+            result_data = await self._cached("searchDocuments", payload, lambda: self._post("searchDocuments", payload), refresh=refresh)
             total_results = result_data.get("total", 0)
-            return MevzuatSearchResult(
-                documents=[MevzuatDocument.model_validate(doc) for doc in result_data.get("mevzuatList", [])],
+            result = MevzuatSearchResult(
+                documents=_DOCUMENT_LIST.validate_python(result_data.get("mevzuatList") or []),
                 total_results=total_results, current_page=request.page_number, page_size=request.page_size,
                 total_pages=(total_results + request.page_size - 1) // request.page_size if request.page_size > 0 else 0,
                 query_used=request.model_dump()
             )
+            self._notify(self._search_listeners, result)
+            return result
+        except MevzuatApiError as e:
+            return self._empty_search_result(request, str(e) or "Unknown API error")
         except httpx.HTTPStatusError as e:
-            return MevzuatSearchResult(documents=[], total_results=0, current_page=request.page_number, page_size=request.page_size, total_pages=0, query_used=request.model_dump(), error_message=f"API request failed: {e.response.status_code}")
+            return self._empty_search_result(request, f"API request failed: {e.response.status_code}")
         except Exception as e:
-            return MevzuatSearchResult(documents=[], total_results=0, current_page=request.page_number, page_size=request.page_size, total_pages=0, query_used=request.model_dump(), error_message=f"An unexpected error occurred: {e}")
+            return self._empty_search_result(request, f"An unexpected error occurred: {e}")
+
+    def _empty_search_result(self, request: MevzuatSearchRequest, error_message: str) -> MevzuatSearchResult:
+        return MevzuatSearchResult(documents=[], total_results=0, current_page=request.page_number, page_size=request.page_size, total_pages=0, query_used=request.model_dump(), error_message=error_message)
+
+    async def iter_search_pages(self, request: MevzuatSearchRequest, max_results: Optional[int] = None, prefetch: int = 4, refresh: bool = False) -> AsyncIterator[MevzuatSearchResult]:
+        """
+        Yields search result pages in order, starting at request.page_number.
+        After the first page, up to `prefetch` following pages are fetched concurrently.
+        Raises MevzuatApiError if a page fails.
+        """
+        first = await self.search_documents(request, refresh=refresh)
+        if first.error_message:
+            raise MevzuatApiError(first.error_message)
+        last_page = first.total_pages
+        if max_results is not None:
+            last_page = min(last_page, request.page_number - 1 + -(-max_results // request.page_size))
+        page_numbers = iter(range(request.page_number + 1, last_page + 1))
+        pending: Deque[asyncio.Task] = deque()
+        def schedule_next() -> None:
+            page_number = next(page_numbers, None)
+            if page_number is not None:
+                pending.append(asyncio.ensure_future(self.search_documents(request.model_copy(update={"page_number": page_number}), refresh=refresh)))
+        for _ in range(max(1, prefetch)):
+            schedule_next()
+        try:
+            yield first
+            while pending:
+                page = await pending.popleft()
+                schedule_next()
+                if page.error_message:
+                    raise MevzuatApiError(page.error_message)
+                yield page
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def iter_search_documents(self, request: MevzuatSearchRequest, max_results: Optional[int] = None, prefetch: int = 4, refresh: bool = False) -> AsyncIterator[MevzuatDocument]:
+        """Yields the documents matching request across all pages, in order and without duplicates."""
+        seen = set()
+        async for page in self.iter_search_pages(request, max_results=max_results, prefetch=prefetch, refresh=refresh):
+            for document in page.documents:
+                if document.mevzuat_id in seen:
+                    continue
+                seen.add(document.mevzuat_id)
+                yield document
+                if max_results is not None and len(seen) >= max_results:
+                    return
+
+    async def search_all_documents(self, request: MevzuatSearchRequest, max_results: int, prefetch: int = 4) -> MevzuatSearchResult:
+        """Collects up to max_results documents across pages into a single result."""
+        documents: Dict[str, MevzuatDocument] = {}
+        total_results = 0
+        try:
+            async for page in self.iter_search_pages(request, max_results=max_results, prefetch=prefetch):
+                total_results = total_results or page.total_results
+                for document in page.documents:
+                    documents.setdefault(document.mevzuat_id, document)
+        except MevzuatApiError as e:
+            return self._empty_search_result(request, str(e))
+        return MevzuatSearchResult(
+            documents=list(documents.values())[:max_results], total_results=total_results, current_page=request.page_number, page_size=max_results,
+            total_pages=(total_results + max_results - 1) // max_results, query_used=request.model_dump()
+        )
 
-    async def get_article_tree(self, mevzuat_id: str) -> List[MevzuatArticleNode]:
+    async def get_flat_tree(self, mevzuat_id: str, refresh: bool = False) -> Optional[FlatArticleTree]:
+        """
+        Returns the article tree of a legislation as an indexed FlatArticleTree, or None if it could not be retrieved.
+        Flat trees are kept per mevzuat_id for as long as the underlying cached response does not change.
+        """
+        self._notify(self._request_listeners, ("mevzuatMaddeTree", mevzuat_id, mevzuat_id))
         payload = { "data": {"mevzuatId": mevzuat_id}, "applicationName": "UyapMevzuat" }
+        async def load() -> List[Dict[str, Any]]:
+            root_node = await self._post("mevzuatMaddeTree", payload)
+            children = root_node.get("children", [])
+            if self._change_tracker is not None:
+                self._change_tracker.record_tree(mevzuat_id, children)
+            return children
         try:
-            response = await self._http_client.post(f"{self.BASE_URL}/mevzuatMaddeTree", json=payload)
-            response.raise_for_status()
-            data = response.json()
-            if data.get("metadata", {}).get("FMTY") != "SUCCESS": return []
-            root_node = data.get("data", {})
-            return [MevzuatArticleNode.model_validate(child) for child in root_node.get("children", [])]
-        except Exception as e:
-            logger.exception(f"Error fetching article tree for mevzuatId {mevzuat_id}")
-            return []
+            children = await self._cached("mevzuatMaddeTree", payload, load, refresh=refresh)
+        except MevzuatApiError:
+            return None
+        except Exception:
+            logger.exception("Error fetching article tree for mevzuatId %s", mevzuat_id)
+            return None
+        cached = self._flat_trees.get(mevzuat_id)
+        if cached is not None and cached[0] is children:
+            self._flat_trees.move_to_end(mevzuat_id)
+            return cached[1]
+        try:
+            flat = FlatArticleTree.from_raw(mevzuat_id, children)
+        except (TypeError, ValueError, AttributeError):
+            logger.exception("Malformed article tree for mevzuatId %s", mevzuat_id)
+            return None
+        self._flat_trees[mevzuat_id] = (children, flat)
+        while len(self._flat_trees) > self.FLAT_TREE_CACHE_SIZE:
+            self._flat_trees.popitem(last=False)
+        self._notify(self._tree_listeners, flat)
+        return flat
 
-    async def get_article_content(self, madde_id: str, mevzuat_id: str) -> MevzuatArticleContent:
+    async def get_article_tree(self, mevzuat_id: str, refresh: bool = False) -> List[MevzuatArticleNode]:
+        flat = await self.get_flat_tree(mevzuat_id, refresh=refresh)
+        return flat.to_nodes() if flat is not None else []
+
+    async def get_article_content(self, madde_id: str, mevzuat_id: str, refresh: bool = False) -> MevzuatArticleContent:
+        self._notify(self._request_listeners, ("getDocumentContent", mevzuat_id, madde_id))
         payload = {"data": {"id": madde_id, "documentType": "MADDE"}, "applicationName": "UyapMevzuat"}
-        try:
-            response = await self._http_client.post(f"{self.BASE_URL}/getDocumentContent", json=payload)
-            response.raise_for_status()
-            data = response.json()
-            if data.get("metadata", {}).get("FMTY") != "SUCCESS":
-                return MevzuatArticleContent(madde_id=madde_id, mevzuat_id=mevzuat_id, markdown_content="", error_message=data.get("metadata", {}).get("FMTE", "Failed to retrieve content."))
-            content_data = data.get("data", {})
+        # Articles converted earlier (by this or another process on the host) fill cache misses from the store;
+        # stale cache entries are revalidated upstream, never from the store's copy.
+        fill = None
+        if self._article_store is not None:
+            async def fill() -> Optional[str]:
+                return await self._article_store.get_async(mevzuat_id, madde_id, max_age=self._article_store_max_age())
+        async def load() -> str:
+            content_data = await self._post("getDocumentContent", payload)
             b64_content = content_data.get("content", "")
-            html_content = self._html_from_base64(b64_content)
-            markdown_content = self._markdown_from_html(html_content)
+            digest = payload_hash(b64_content) if self._change_tracker is not None else None
+            # An unchanged payload (e.g. on refresh) keeps its earlier conversion.
+            if digest is not None and self._change_tracker.article_hash(madde_id) == digest:
+                previous = await self._previous_markdown(payload, mevzuat_id, madde_id)
+                if previous is not None:
+                    self._change_tracker.record_article(mevzuat_id, madde_id, digest)
+                    self._conversions_skipped += 1
+                    # Upstream confirmed the stored conversion; renew its age so it keeps filling misses.
+                    if self._article_store is not None:
+                        self._article_store.add_article(MevzuatArticleContent(madde_id=madde_id, mevzuat_id=mevzuat_id, markdown_content=previous))
+                    return previous
+            started = time.perf_counter()
+            html_bytes = self._html_from_base64(b64_content)
+            decoded = time.perf_counter()
+            markdown_content = await self._converter.convert(html_bytes)
+            CONTENT_STAGE_SECONDS.labels("decode").observe(decoded - started)
+            CONTENT_STAGE_SECONDS.labels("convert").observe(time.perf_counter() - decoded)
+            if digest is not None:
+                self._change_tracker.record_article(mevzuat_id, madde_id, digest)
+            self._notify(self._content_listeners, MevzuatArticleContent(madde_id=madde_id, mevzuat_id=mevzuat_id, markdown_content=markdown_content))
+            return markdown_content
+        try:
+            markdown_content = await self._cached("getDocumentContent", payload, load, refresh=refresh, fill=fill)
             return MevzuatArticleContent(madde_id=madde_id, mevzuat_id=mevzuat_id, markdown_content=markdown_content)
+        except MevzuatApiError as e:
+            return MevzuatArticleContent(madde_id=madde_id, mevzuat_id=mevzuat_id, markdown_content="", error_message=str(e) or "Failed to retrieve content.")
         except Exception as e:
-            logger.exception(f"Error fetching content for maddeId {madde_id}")
-            return MevzuatArticleContent(madde_id=madde_id, mevzuat_id=mevzuat_id, markdown_content="", error_message=f"An unexpected error occurred: {e}")
\ No newline at end of file
+            logger.exception("Error fetching content for maddeId %s", madde_id)
+            return MevzuatArticleContent(madde_id=madde_id, mevzuat_id=mevzuat_id, markdown_content="", error_message=f"An unexpected error occurred: {e}")
+
+    async def _previous_markdown(self, payload: Dict[str, Any], mevzuat_id: str, madde_id: str) -> Optional[str]:
+        if self._cache is not None:
+            entry = await self._cache.peek(make_cache_key("getDocumentContent", payload))
+            if entry is not None:
+                return entry.value
+        if self._article_store is not None:
+            return await self._article_store.get_async(mevzuat_id, madde_id)
+        return None
+
+    async def get_article_contents(self, articles: List[MevzuatArticleRef], max_concurrency: int = 8) -> List[MevzuatArticleContent]:
+        """
+        Fetches many articles, possibly from different legislations, with at most max_concurrency in flight.
+        Results are in request order; failures are reported per article through error_message.
+        """
+        return await gather_bounded(
+            [lambda article=article: self.get_article_content(article.madde_id, article.mevzuat_id) for article in articles],
+            max_concurrency
+        )
+
+    async def get_article_by_number(self, mevzuat_id: str, madde_no: int, kind: MaddeKindEnum = MaddeKindEnum.MADDE) -> MevzuatNumberedArticle:
+        """Looks an article up by its number in the cached flat tree and fetches its content."""
+        flat = await self.get_flat_tree(mevzuat_id)
+        if flat is None:
+            return MevzuatNumberedArticle(madde_id="", mevzuat_id=mevzuat_id, madde_no=madde_no, kind=kind, markdown_content="", error_message="The article tree for this legislation could not be retrieved.")
+        index = flat.find_article(madde_no, kind)
+        if index is None:
+            numbers = flat.article_numbers(kind)
+            available = f"available numbers are {numbers[0]}-{numbers[-1]}" if numbers else "it has no articles of this kind"
+            return MevzuatNumberedArticle(madde_id="", mevzuat_id=mevzuat_id, madde_no=madde_no, kind=kind, markdown_content="", error_message=f"{kind.value} {madde_no} was not found in this legislation; {available}.")
+        content = await self.get_article_content(flat.madde_ids[index], mevzuat_id)
+        return MevzuatNumberedArticle(
+            **content.model_dump(), madde_no=madde_no, kind=kind, title=flat.titles[index], path=flat.path(index)
+        )
+
+    async def get_full_text(self, mevzuat_id: str, max_concurrency: int = 8) -> MevzuatFullText:
+        """
+        Fetches every numbered leaf article of a legislation concurrently and assembles them into one Markdown document in tree order.
+        Articles that fail are reported in failed_articles instead of failing the whole document.
+        """
+        flat = await self.get_flat_tree(mevzuat_id)
+        if not flat:
+            return MevzuatFullText(mevzuat_id=mevzuat_id, markdown_content="", article_count=0, retrieved_count=0, error_message="The article tree for this legislation could not be retrieved.")
+        # Childless nodes without an article number are empty headings, not articles.
+        leaves = [index for index in flat.leaf_indexes() if flat.madde_nos[index] is not None]
+        articles = set(leaves)
+        contents = await gather_bounded(
+            [lambda index=index: self.get_article_content(flat.madde_ids[index], mevzuat_id) for index in leaves],
+            max_concurrency
+        )
+        contents_by_id = {content.madde_id: content for content in contents}
+        parts = []
+        for index in range(len(flat)):
+            if index not in articles:
+                parts.append(f"{'#' * min(flat.depths[index] + 1, 6)} {flat.titles[index]}")
+                continue
+            content = contents_by_id[flat.madde_ids[index]]
+            if content.error_message:
+                parts.append(f"> {flat.titles[index]}: {content.error_message}")
+            elif content.markdown_content:
+                parts.append(content.markdown_content)
+        failed = [content for content in contents if content.error_message]
+        return MevzuatFullText(
+            mevzuat_id=mevzuat_id, markdown_content="\n\n".join(parts),
+            article_count=len(leaves), retrieved_count=len(leaves) - len(failed), failed_articles=failed
+        )
@@ -0,0 +1,253 @@
+# mevzuat_concurrency.py
+"""
+Concurrency primitives shared by the Mevzuat API client.
+"""
+
+import asyncio
+import contextlib
+import email.utils
+import heapq
+import itertools
+import random
+import time
+from contextvars import ContextVar
+from enum import IntEnum
+from typing import Any, Awaitable, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+class Priority(IntEnum):
+    """Scheduling class of upstream requests; lower values are served first."""
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+class _Flight:
+    """Priority of a call shared by SingleFlight, raised when a more urgent caller joins it."""
+    def __init__(self, priority: Priority):
+        self.priority = priority
+        self._listeners: List[Callable[[Priority], None]] = []
+
+    def subscribe(self, listener: Callable[[Priority], None]) -> None:
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener: Callable[[Priority], None]) -> None:
+        with contextlib.suppress(ValueError):
+            self._listeners.remove(listener)
+
+    def raise_to(self, priority: Priority) -> bool:
+        if priority >= self.priority:
+            return False
+        self.priority = priority
+        for listener in list(self._listeners):
+            listener(priority)
+        return True
+
+_request_priority: ContextVar[Priority] = ContextVar("mevzuat_request_priority", default=Priority.INTERACTIVE)
+_current_flight: ContextVar[Optional[_Flight]] = ContextVar("mevzuat_current_flight", default=None)
+
+def current_priority() -> Priority:
+    """The caller's request priority, or that of the shared call it runs in if a waiter raised it."""
+    priority = _request_priority.get()
+    flight = _current_flight.get()
+    return min(priority, flight.priority) if flight is not None else priority
+
+@contextlib.contextmanager
+def request_priority(priority: Priority) -> Iterator[None]:
+    """Runs the enclosed block (and tasks it creates) with the given upstream request priority."""
+    token = _request_priority.set(priority)
+    try:
+        yield
+    finally:
+        _request_priority.reset(token)
+
+class SingleFlight:
+    """
+    Deduplicates concurrent calls by key: while a call for a key is in flight,
+    later callers wait for the same result instead of starting their own.
+    The shared call runs in its own task, so cancelling one waiter does not
+    cancel the work the others are waiting for. It runs at the highest
+    priority of its waiters: an interactive caller joining a background
+    call raises it, including upstream requests already queued.
+    """
+    def __init__(self):
+        self._calls: Dict[str, Tuple[asyncio.Future, _Flight]] = {}
+        self._stats: Dict[str, int] = {"leaders": 0, "coalesced": 0, "raised": 0}
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    def stats(self) -> Dict[str, int]:
+        return {**self._stats, "in_flight": self.in_flight}
+
+    async def run(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        priority = current_priority()
+        entry = self._calls.get(key)
+        if entry is None:
+            flight = _Flight(priority)
+            # A call started inside another shared call follows that call's raises too.
+            parent = _current_flight.get()
+            if parent is not None:
+                parent.subscribe(flight.raise_to)
+            call = asyncio.ensure_future(self._lead(flight, fn))
+            self._calls[key] = (call, flight)
+            call.add_done_callback(lambda done, key=key, parent=parent, flight=flight: self._finish(key, done, parent, flight))
+            self._stats["leaders"] += 1
+        else:
+            call, flight = entry
+            self._stats["coalesced"] += 1
+            if flight.raise_to(priority):
+                self._stats["raised"] += 1
+        return await asyncio.shield(call)
+
+    @staticmethod
+    async def _lead(flight: _Flight, fn: Callable[[], Awaitable[Any]]) -> Any:
+        _current_flight.set(flight)
+        return await fn()
+
+    def _finish(self, key: str, call: asyncio.Future, parent: Optional[_Flight], flight: _Flight) -> None:
+        if key in self._calls and self._calls[key][0] is call:
+            del self._calls[key]
+        if parent is not None:
+            parent.unsubscribe(flight.raise_to)
+        if not call.cancelled():
+            call.exception()
+
+async def gather_bounded(factories: Iterable[Callable[[], Awaitable[Any]]], limit: int) -> List[Any]:
+    """Runs the awaitables produced by factories with at most `limit` in flight, returning results in input order."""
+    semaphore = asyncio.Semaphore(max(1, limit))
+    async def run(factory: Callable[[], Awaitable[Any]]) -> Any:
+        async with semaphore:
+            return await factory()
+    return await asyncio.gather(*(run(factory) for factory in factories))
+
+class AdaptiveLimiter:
+    """
+    Limits in-flight upstream requests with an AIMD-adjusted limit.
+    Each fast, successful request raises the limit by 1/limit (about +1 per
+    round trip); an overload signal (429/5xx, timeout) or a request slower than
+    target_latency multiplies it by decrease_factor, at most once per cooldown.
+    Waiters are served by priority, and background requests may only use
+    background_share of the limit so interactive calls always find a slot.
+    """
+    def __init__(self, initial_limit: int = 8, min_limit: int = 1, max_limit: int = 32, target_latency: float = 2.0,
+                 decrease_factor: float = 0.7, background_share: float = 0.75, cooldown: float = 1.0):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.limit = float(min(max(initial_limit, min_limit), max_limit))
+        self.target_latency = target_latency
+        self.decrease_factor = decrease_factor
+        self.background_share = background_share
+        self.cooldown = cooldown
+        self._in_flight = 0
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self._last_decrease = 0.0
+        self._stats: Dict[str, int] = {"acquired": 0, "queued": 0, "increases": 0, "decreases": 0}
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def stats(self) -> Dict[str, Any]:
+        # A raised waiter is queued twice; count it once, at its raised priority.
+        queued: Dict[asyncio.Future, int] = {}
+        for priority, _, future in self._waiters:
+            if not future.done():
+                queued[future] = min(priority, queued.get(future, priority))
+        waiting = list(queued.values())
+        return {
+            **self._stats, "limit": round(self.limit, 2), "in_flight": self._in_flight,
+            "waiting_interactive": waiting.count(Priority.INTERACTIVE), "waiting_background": waiting.count(Priority.BACKGROUND),
+        }
+
+    def _capacity(self, priority: int) -> int:
+        limit = max(self.min_limit, int(self.limit))
+        if priority >= Priority.BACKGROUND:
+            return max(1, int(limit * self.background_share))
+        return limit
+
+    async def acquire(self, priority: Priority = Priority.INTERACTIVE) -> None:
+        if not self._waiters and self._in_flight < self._capacity(priority):
+            self._in_flight += 1
+            self._stats["acquired"] += 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (int(priority), next(self._sequence), future))
+        self._stats["queued"] += 1
+        # Waiters queued at a lower priority must not hold this one back while its class still has a free slot.
+        self._wake()
+        def requeue(raised: Priority) -> None:
+            # The shared call this request belongs to was joined by a more urgent caller; the stale entry is skipped once done.
+            if not future.done():
+                heapq.heappush(self._waiters, (int(raised), next(self._sequence), future))
+                self._wake()
+        flight = _current_flight.get()
+        if flight is not None:
+            flight.subscribe(requeue)
+        try:
+            await future
+        except asyncio.CancelledError:
+            # A slot granted just before the cancellation must be handed back.
+            if future.done() and not future.cancelled():
+                self.release()
+            raise
+        finally:
+            if flight is not None:
+                flight.unsubscribe(requeue)
+        self._stats["acquired"] += 1
+
+    def release(self, latency: Optional[float] = None, overloaded: bool = False) -> None:
+        """Frees a slot; latency and overloaded describe the finished request and drive the limit."""
+        self._in_flight -= 1
+        if overloaded or (latency is not None and latency > self.target_latency):
+            now = time.monotonic()
+            if now - self._last_decrease >= self.cooldown:
+                self.limit = max(float(self.min_limit), self.limit * self.decrease_factor)
+                self._last_decrease = now
+                self._stats["decreases"] += 1
+        elif latency is not None and self.limit < self.max_limit:
+            previous = int(self.limit)
+            self.limit = min(float(self.max_limit), self.limit + 1.0 / self.limit)
+            if int(self.limit) > previous:
+                self._stats["increases"] += 1
+        self._wake()
+
+    def _wake(self) -> None:
+        """Grants slots to the head waiters, highest priority first, while their class has capacity left."""
+        while self._waiters:
+            priority, _, future = self._waiters[0]
+            if future.done():
+                heapq.heappop(self._waiters)
+                continue
+            if self._in_flight >= self._capacity(priority):
+                break
+            heapq.heappop(self._waiters)
+            self._in_flight += 1
+            future.set_result(None)
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parses a Retry-After header given either in seconds or as an HTTP date."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+class RetryPolicy:
+    """Exponential backoff with full jitter; a server-provided Retry-After takes precedence."""
+    def __init__(self, max_attempts: int = 4, base_delay: float = 0.5, max_delay: float = 30.0):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        if retry_after is not None:
+            return min(retry_after, self.max_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
@@ -0,0 +1,365 @@
+# mevzuat_converter.py
+"""
+HTML to Markdown conversion for legislation article content.
+Conversion is CPU-bound, so documents above a size threshold are handed to a
+thread or process pool instead of blocking the event loop.
+"""
+
+import asyncio
+import io
+import logging
+import os
+import re
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Union
+from urllib.parse import quote, urlparse, urlunparse
+
+if TYPE_CHECKING:
+    from markitdown import MarkItDown
+
+logger = logging.getLogger(__name__)
+
+# markitdown, bs4 and lxml are imported on first conversion; together they dominate the server's import time.
+_md_converter: Optional["MarkItDown"] = None
+_html_parser: Any = None
+
+def _get_md_converter() -> "MarkItDown":
+    # One converter per process; worker processes build their own on first use.
+    global _md_converter
+    if _md_converter is None:
+        from markitdown import MarkItDown
+        _md_converter = MarkItDown()
+    return _md_converter
+
+def _get_html_parser() -> Any:
+    global _html_parser
+    if _html_parser is None:
+        import lxml.html
+        _html_parser = lxml.html.HTMLParser(encoding="utf-8", remove_comments=True, remove_pis=True)
+    return _html_parser
+
+def markdown_from_html(html_content: str) -> str:
+    """Converts an HTML fragment to Markdown with MarkItDown, falling back to plain text extraction."""
+    if not html_content: return ""
+    try:
+        html_bytes = html_content.encode('utf-8')
+        html_io = io.BytesIO(html_bytes)
+        conv_res = _get_md_converter().convert(html_io)
+        if conv_res and conv_res.text_content:
+            return conv_res.text_content.strip()
+        return ""
+    except Exception:
+        from bs4 import BeautifulSoup
+        soup = BeautifulSoup(html_content, 'lxml')
+        return soup.get_text(separator='\n', strip=True)
+
+def markdown_from_html_bytes_markitdown(html_bytes: bytes) -> str:
+    """Decodes UTF-8 article HTML and converts it with MarkItDown only."""
+    try:
+        return markdown_from_html(html_bytes.decode('utf-8'))
+    except UnicodeDecodeError:
+        return ""
+
+class UnsupportedHtml(ValueError):
+    """Raised by the fast-path converter for markup it does not handle; callers fall back to MarkItDown."""
+
+_WHITESPACE_RE = re.compile(r"[\t \r\n]+")
+_BLANK_LINES_RE = re.compile(r"\n{3,}")
+_HEADING_TAGS = {"h1": 1, "h2": 2, "h3": 3, "h4": 4, "h5": 5, "h6": 6}
+_CONTAINER_TAGS = {"html", "body", "div", "center", "section", "article", "main", "header", "footer", "blockquote"}
+_PASSTHROUGH_INLINE_TAGS = {"span", "font", "sup", "sub", "small", "big", "ins", "o:p", "label", "abbr", "nobr"}
+_STRIKE_TAGS = {"s", "strike", "del"}
+_INLINE_TAGS = _PASSTHROUGH_INLINE_TAGS | _STRIKE_TAGS | {"b", "strong", "i", "em", "u", "a", "br"}
+_BULLETS = "*+-"
+_PERCENT_ENCODED_RE = re.compile(r"%[0-9A-Fa-f]{2}")
+_SKIP_TAGS = {"head", "title", "meta", "link", "script", "style"}
+
+# The fast path mirrors the conventions of MarkItDown's markdownify setup
+# (ATX headings, ** and * emphasis, <u> kept as HTML, ~~ strikethrough,
+# *+- bullets by nesting depth, escaped * and _, pipe tables) so the two
+# converters are interchangeable for bedesten article HTML; the corpus in
+# benchmarks/converter_corpus pins the output of both.
+def _text(text: Optional[str]) -> str:
+    if not text:
+        return ""
+    return _WHITESPACE_RE.sub(" ", text).replace("*", r"\*").replace("_", r"\_")
+
+def _wrap(text: str, marker: str, closing: Optional[str] = None) -> str:
+    stripped = text.strip()
+    if not stripped:
+        return text
+    leading = " " if text[:1].isspace() else ""
+    trailing = " " if text[-1:].isspace() else ""
+    return f"{leading}{marker}{stripped}{marker if closing is None else closing}{trailing}"
+
+def _quote_path(path: str) -> str:
+    # Quotes a URL path like MarkItDown does, keeping existing %HH escapes.
+    parts = []
+    last_end = 0
+    for match in _PERCENT_ENCODED_RE.finditer(path):
+        parts.append(quote(path[last_end:match.start()]))
+        parts.append(match.group(0))
+        last_end = match.end()
+    parts.append(quote(path[last_end:]))
+    return "".join(parts)
+
+def _link(element) -> str:
+    text = _inline(element)
+    leading = " " if text[:1] == " " else ""
+    trailing = " " if text[-1:] == " " else ""
+    text = text.strip()
+    if not text:
+        return ""
+    href = element.get("href")
+    if not href:
+        return f"{leading}{text}{trailing}"
+    parsed = urlparse(href)
+    if parsed.scheme and parsed.scheme.lower() not in ("http", "https", "file"):
+        return f"{leading}{text}{trailing}"
+    href = urlunparse(parsed._replace(path=_quote_path(parsed.path)))
+    title = element.get("title")
+    if text.replace(r"\_", "_") == href and not title:
+        return f"{leading}<{href}>{trailing}"
+    title_part = ' "%s"' % title.replace('"', r'\"') if title else ""
+    return f"{leading}[{text}]({href}{title_part}){trailing}"
+
+def _inline(element) -> str:
+    parts = [_text(element.text)]
+    for child in element:
+        if isinstance(child.tag, str):
+            parts.append(_inline_element(child))
+        parts.append(_text(child.tail))
+    return "".join(parts)
+
+def _inline_element(element) -> str:
+    tag = element.tag.lower()
+    if tag == "br":
+        return "\n"
+    if tag in ("b", "strong"):
+        return _wrap(_inline(element), "**")
+    if tag in ("i", "em"):
+        return _wrap(_inline(element), "*")
+    if tag == "u":
+        return _wrap(_inline(element), "<u>", "</u>")
+    if tag in _STRIKE_TAGS:
+        return _wrap(_inline(element), "~~")
+    if tag == "a":
+        return _link(element)
+    if tag in _PASSTHROUGH_INLINE_TAGS:
+        return _inline(element)
+    raise UnsupportedHtml(f"Unsupported inline element <{tag}>")
+
+def _paragraph(text: str) -> str:
+    return "\n".join(line.strip() for line in text.strip().split("\n"))
+
+def _render_container(element, blocks: List[str]) -> None:
+    inline_parts = [_text(element.text)]
+    def flush() -> None:
+        text = _paragraph("".join(inline_parts))
+        if text:
+            blocks.append(text)
+        inline_parts.clear()
+    for child in element:
+        if isinstance(child.tag, str):
+            tag = child.tag.lower()
+            if tag in _INLINE_TAGS:
+                inline_parts.append(_inline_element(child))
+            elif tag not in _SKIP_TAGS:
+                flush()
+                _render_block(child, tag, blocks)
+        inline_parts.append(_text(child.tail))
+    flush()
+
+def _render_block(element, tag: str, blocks: List[str]) -> None:
+    if tag == "p":
+        text = _paragraph(_inline(element))
+        if text:
+            blocks.append(text)
+    elif tag in _HEADING_TAGS:
+        text = " ".join(_inline(element).split())
+        if text:
+            blocks.append(f"{'#' * _HEADING_TAGS[tag]} {text}")
+    elif tag == "table":
+        table = _render_table(element)
+        if table:
+            blocks.append(table)
+    elif tag in ("ul", "ol"):
+        blocks.append(_render_list(element, ordered=tag == "ol"))
+    elif tag == "hr":
+        blocks.append("---")
+    elif tag in _CONTAINER_TAGS:
+        _render_container(element, blocks)
+    else:
+        raise UnsupportedHtml(f"Unsupported block element <{tag}>")
+
+def _render_cell(cell) -> str:
+    blocks: List[str] = []
+    _render_container(cell, blocks)
+    return "\n\n".join(blocks).replace("\n", " ").strip()
+
+def _colspan(cell) -> int:
+    span = cell.get("colspan", "")
+    return max(1, min(1000, int(span))) if span.isdigit() else 1
+
+def _table_rows(table) -> List[Any]:
+    rows = []
+    for child in table:
+        if not isinstance(child.tag, str):
+            continue
+        tag = child.tag.lower()
+        if tag == "tr":
+            rows.append(child)
+        elif tag == "tbody" and not rows:
+            rows.extend(row for row in child if isinstance(row.tag, str) and row.tag.lower() == "tr")
+        else:
+            # thead, tfoot, several tbodies, captions and colgroups change where markdownify puts the header line.
+            raise UnsupportedHtml(f"Unsupported table child <{tag}>")
+    return rows
+
+def _render_table(table) -> str:
+    if table.find(".//table") is not None:
+        raise UnsupportedHtml("Nested tables are not supported")
+    lines = []
+    for index, row in enumerate(_table_rows(table)):
+        cells = [cell for cell in row if isinstance(cell.tag, str) and cell.tag.lower() in ("td", "th")]
+        # Like markdownify, a cell spanning n columns is followed by n - 1 empty ones.
+        line = "|" + "".join(f" {_render_cell(cell)} |" + " |" * (_colspan(cell) - 1) for cell in cells)
+        width = sum(_colspan(cell) for cell in cells)
+        if index == 0 and all(cell.tag.lower() == "th" for cell in cells):
+            lines.extend([line, "| " + " | ".join(["---"] * width) + " |"])
+        elif index == 0:
+            lines.extend(["| " + " | ".join([""] * width) + " |", "| " + " | ".join(["---"] * width) + " |", line])
+        else:
+            lines.append(line)
+    return "\n".join(lines)
+
+def _render_list(element, ordered: bool) -> str:
+    start = element.get("start", "")
+    number = int(start) - 1 if ordered and start.isdigit() else 0
+    if not ordered:
+        depth = sum(1 for ancestor in element.iterancestors() if isinstance(ancestor.tag, str) and ancestor.tag.lower() == "ul")
+    lines = []
+    for item in element:
+        if not isinstance(item.tag, str) or item.tag.lower() != "li":
+            continue
+        if any(isinstance(child.tag, str) and child.tag.lower() not in _INLINE_TAGS | {"ul", "ol"} for child in item):
+            # markdownify separates paragraphs inside list items with blank lines that depend on their neighbours.
+            raise UnsupportedHtml("Block elements inside list items are not supported")
+        # Empty items are dropped but, in ordered lists, still counted.
+        number += 1
+        blocks: List[str] = []
+        _render_container(item, blocks)
+        if not blocks:
+            continue
+        marker = f"{number}. " if ordered else _BULLETS[depth % len(_BULLETS)] + " "
+        text = "\n".join(blocks).replace("\n", "\n" + " " * len(marker))
+        lines.append(marker + text)
+    return "\n".join(lines)
+
+def fast_markdown_from_html_bytes(html_bytes: bytes) -> str:
+    """
+    Converts UTF-8 article HTML to Markdown by parsing the bytes directly with lxml.
+    Raises UnsupportedHtml for markup outside the small subset bedesten articles use.
+    """
+    import lxml.html
+    root = lxml.html.document_fromstring(html_bytes, parser=_get_html_parser())
+    body = root.find("body")
+    blocks: List[str] = []
+    _render_container(body if body is not None else root, blocks)
+    return _BLANK_LINES_RE.sub("\n\n", "\n\n".join(blocks)).strip()
+
+def markdown_from_html_bytes(html_bytes: bytes) -> str:
+    """Converts UTF-8 article HTML to Markdown with the lxml fast path, falling back to MarkItDown for unusual input."""
+    if not html_bytes or not html_bytes.strip(): return ""
+    try:
+        return fast_markdown_from_html_bytes(html_bytes)
+    except Exception as e:
+        logger.debug("Fast-path conversion fell back to MarkItDown: %s", e)
+        return markdown_from_html_bytes_markitdown(html_bytes)
+
+class ConversionPool:
+    """
+    Converts article HTML inline for small documents and in a worker pool for
+    larger ones, keeping counters for pool depth and conversion latency.
+    """
+    def __init__(self, kind: str = "thread", max_workers: Optional[int] = None, inline_threshold: int = 4096, fast_path: bool = True):
+        if kind not in ("thread", "process", "inline"):
+            raise ValueError(f"Unknown conversion pool kind: {kind}")
+        self.kind = kind
+        self._convert_fn: Callable[[bytes], str] = markdown_from_html_bytes if fast_path else markdown_from_html_bytes_markitdown
+        cpu_count = os.cpu_count() or 1
+        self.max_workers = max_workers or (min(32, cpu_count + 4) if kind == "thread" else cpu_count)
+        self.inline_threshold = inline_threshold
+        self._executor: Optional[Executor] = None
+        self._pending = 0
+        self._stats: Dict[str, Union[int, float]] = {
+            "inline_conversions": 0, "pool_conversions": 0, "max_pending": 0,
+            "total_seconds": 0.0, "max_seconds": 0.0,
+        }
+
+    @classmethod
+    def from_env(cls) -> "ConversionPool":
+        """Builds a pool from MEVZUAT_CONVERT_* environment variables."""
+        workers = os.environ.get("MEVZUAT_CONVERT_WORKERS")
+        return cls(
+            kind=os.environ.get("MEVZUAT_CONVERT_POOL", "thread"),
+            max_workers=int(workers) if workers else None,
+            inline_threshold=int(os.environ.get("MEVZUAT_CONVERT_INLINE_BYTES", "4096")),
+            fast_path=os.environ.get("MEVZUAT_CONVERT_FAST", "1") != "0",
+        )
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="mevzuat-convert")
+        return self._executor
+
+    @property
+    def pending(self) -> int:
+        """Number of conversions submitted to the pool and not yet finished."""
+        return self._pending
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of submitted conversions still waiting for a free worker."""
+        return max(0, self._pending - self.max_workers)
+
+    def stats(self) -> Dict[str, Union[int, float]]:
+        conversions = self._stats["inline_conversions"] + self._stats["pool_conversions"]
+        return {
+            **self._stats,
+            "pending": self._pending,
+            "queue_depth": self.queue_depth,
+            "mean_seconds": self._stats["total_seconds"] / conversions if conversions else 0.0,
+        }
+
+    def _record(self, started: float) -> None:
+        elapsed = time.perf_counter() - started
+        self._stats["total_seconds"] += elapsed
+        self._stats["max_seconds"] = max(self._stats["max_seconds"], elapsed)
+
+    async def convert(self, html_bytes: bytes) -> str:
+        started = time.perf_counter()
+        if self.kind == "inline" or len(html_bytes) < self.inline_threshold:
+            try:
+                return self._convert_fn(html_bytes)
+            finally:
+                self._stats["inline_conversions"] += 1
+                self._record(started)
+        self._pending += 1
+        self._stats["max_pending"] = max(self._stats["max_pending"], self._pending)
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), self._convert_fn, html_bytes)
+        finally:
+            self._pending -= 1
+            self._stats["pool_conversions"] += 1
+            self._record(started)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,40 @@
+# mevzuat_json.py
+"""
+Single-pass JSON encoding for HTTP responses.
+Envelopes such as {"success": true, "data": <model>} are encoded directly to
+bytes, pydantic models included, instead of first being dumped to dicts by
+FastAPI's jsonable_encoder and then re-encoded by the json module. orjson
+(>= 3.9) is used when installed; pydantic-core's encoder otherwise.
+"""
+
+from typing import Any
+
+import pydantic_core
+from pydantic import BaseModel
+from starlette.responses import Response
+
+try:
+    import orjson
+    _Fragment = getattr(orjson, "Fragment", None)
+except ImportError:
+    orjson = None
+    _Fragment = None
+
+def _encode_model(value: Any) -> Any:
+    # Models are serialized by their own compiled serializer and spliced in as pre-encoded JSON.
+    if isinstance(value, BaseModel):
+        return _Fragment(value.__pydantic_serializer__.to_json(value, by_alias=True))
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+def dumps(content: Any) -> bytes:
+    """Encodes content to JSON bytes; pydantic models at any depth are serialized by alias."""
+    if _Fragment is not None:
+        return orjson.dumps(content, default=_encode_model, option=orjson.OPT_NON_STR_KEYS)
+    return pydantic_core.to_json(content, by_alias=True)
+
+class FastJSONResponse(Response):
+    """JSON response encoded with dumps(); return it directly from endpoints to skip jsonable_encoder."""
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,134 @@
+# mevzuat_logging.py
+"""
+Non-blocking logging setup for the servers.
+Loggers only put records on a bounded queue; a background QueueListener
+thread formats them (as JSON by default) and writes them to stderr and a
+size-rotated file. DEBUG records can be sampled, and when the queue is full
+records are dropped and counted instead of stalling the event loop.
+"""
+
+import atexit
+import datetime
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+from typing import Any, Dict, List, Optional
+
+from mevzuat_metrics import REGISTRY, Counter
+
+LOG_RECORDS_DROPPED = REGISTRY.register(Counter("mevzuat_log_records_dropped_total", "Log records dropped because the logging queue was full."))
+
+DEFAULT_QUEUE_SIZE = 10000
+DEFAULT_MAX_BYTES = 10 * 1024 * 1024
+DEFAULT_BACKUP_COUNT = 5
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(threadName)s - %(message)s'
+
+# Attributes every LogRecord has; anything else was passed through `extra` and is emitted as a field.
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "taskName"}
+
+class JsonFormatter(logging.Formatter):
+    """Formats a record as one JSON object per line, including fields passed through `extra`."""
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "ts": datetime.datetime.fromtimestamp(record.created, datetime.timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+class DebugSampler(logging.Filter):
+    """Lets through only a `rate` fraction of DEBUG records; other levels always pass."""
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno > logging.DEBUG or random.random() < self.rate
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops records when the queue is full and keeps exceptions structured."""
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Merge the arguments now, since they may change before the listener thread formats the record.
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS_DROPPED.inc()
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+def _stop_listener() -> None:
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+def configure_logging(
+    level: Optional[str] = None,
+    log_file: Optional[str] = None,
+    json_format: Optional[bool] = None,
+    debug_sample_rate: Optional[float] = None,
+) -> logging.handlers.QueueListener:
+    """
+    Routes the root logger through a queue to stderr and, if log_file is set, a rotating file.
+    Arguments left as None are read from MEVZUAT_LOG_LEVEL (default INFO), MEVZUAT_LOG_FILE,
+    MEVZUAT_LOG_FORMAT ('json' or 'text', default json), MEVZUAT_LOG_DEBUG_SAMPLE (default 1.0),
+    MEVZUAT_LOG_MAX_BYTES, MEVZUAT_LOG_BACKUPS and MEVZUAT_LOG_QUEUE_SIZE.
+    """
+    global _listener
+    _stop_listener()
+    level = level or os.environ.get("MEVZUAT_LOG_LEVEL", "INFO")
+    log_file = log_file if log_file is not None else os.environ.get("MEVZUAT_LOG_FILE", "")
+    if json_format is None:
+        json_format = os.environ.get("MEVZUAT_LOG_FORMAT", "json") != "text"
+    if debug_sample_rate is None:
+        debug_sample_rate = float(os.environ.get("MEVZUAT_LOG_DEBUG_SAMPLE", "1.0"))
+
+    formatter = JsonFormatter() if json_format else logging.Formatter(TEXT_FORMAT)
+    handlers: List[logging.Handler] = [logging.StreamHandler()]
+    if log_file:
+        directory = os.path.dirname(os.path.abspath(log_file))
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        handlers.append(logging.handlers.RotatingFileHandler(
+            log_file, maxBytes=int(os.environ.get("MEVZUAT_LOG_MAX_BYTES", str(DEFAULT_MAX_BYTES))),
+            backupCount=int(os.environ.get("MEVZUAT_LOG_BACKUPS", str(DEFAULT_BACKUP_COUNT))), encoding="utf-8"
+        ))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(int(os.environ.get("MEVZUAT_LOG_QUEUE_SIZE", str(DEFAULT_QUEUE_SIZE))))
+    queue_handler = NonBlockingQueueHandler(log_queue)
+    if debug_sample_rate < 1.0:
+        queue_handler.addFilter(DebugSampler(debug_sample_rate))
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level.upper())
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+atexit.register(_stop_listener)
@@ -5,46 +5,77 @@ This file defines the tools exposed to the LLM and orchestrates calls
 to the MevzuatApiClient.
 """
 import asyncio
+import contextlib
+import datetime
 import logging
 import os
 import json
 from pydantic import Field
-from typing import Optional, List, Dict, Any, Union
+from typing import Optional, List, Literal, Union
 
-LOG_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "logs")
-if not os.path.exists(LOG_DIRECTORY):
-    os.makedirs(LOG_DIRECTORY)
-LOG_FILE_PATH = os.path.join(LOG_DIRECTORY, "mevzuat_mcp_server.log")
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(threadName)s - %(message)s',
-    handlers=[
-        logging.FileHandler(LOG_FILE_PATH, mode='a', encoding='utf-8'),
-        logging.StreamHandler()
-    ]
-)
-logging.getLogger("httpx").setLevel(logging.WARNING)
 logger = logging.getLogger(__name__)
 
 from fastmcp import FastMCP
 from fastmcp.exceptions import ToolError
 
 from mevzuat_client import MevzuatApiClient
+from mevzuat_logging import configure_logging as configure_log_pipeline
+from mevzuat_metrics import start_metrics_server_from_env, track_tool, watch_client
 from mevzuat_models import (
     MevzuatSearchRequest, MevzuatSearchResult,
     MevzuatTurEnum, SortFieldEnum, SortDirectionEnum,
-    MevzuatArticleNode, MevzuatArticleContent
+    MevzuatArticleNode, MevzuatArticleContent, MevzuatFullText, MevzuatArticleHit,
+    MevzuatNumberedArticle, MaddeKindEnum, MevzuatArticleRef, MevzuatChange, MevzuatArticleTreePage, MevzuatCitation, MevzuatReference
 )
+from mevzuat_citations import resolve_citations as resolve_citation_texts
+
+LOG_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "logs")
+LOG_FILE_PATH = os.path.join(LOG_DIRECTORY, "mevzuat_mcp_server.log")
+
+def configure_logging() -> None:
+    """Sets up queued console and rotating file logging; called when the server is started, not on import."""
+    configure_log_pipeline(log_file=os.environ.get("MEVZUAT_LOG_FILE", LOG_FILE_PATH))
+
+_client: Optional[MevzuatApiClient] = None
+_client_users = 0
+
+def get_client() -> MevzuatApiClient:
+    """Returns the shared API client, building it from the environment on first use."""
+    global _client
+    if _client is None:
+        _client = MevzuatApiClient.from_env()
+        watch_client(_client)
+    return _client
+
+def set_client(client: MevzuatApiClient) -> None:
+    """Replaces the shared API client, e.g. with one pointed at a local stand-in of the API."""
+    global _client
+    _client = client
+    watch_client(client)
+
+@contextlib.asynccontextmanager
+async def lifespan(server: FastMCP):
+    # HTTP transports enter the lifespan once per session, so the client is closed with the last one.
+    global _client, _client_users
+    get_client()
+    _client_users += 1
+    try:
+        yield
+    finally:
+        _client_users -= 1
+        if _client_users == 0 and _client is not None:
+            client, _client = _client, None
+            await client.close()
 
 app = FastMCP(
     name="MevzuatGovTrMCP",
     instructions="MCP server for Adalet Bakanlığı Mevzuat Bilgi Sistemi. Allows detailed searching of Turkish legislation and retrieving the content of specific articles.",
-    dependencies=["httpx", "beautifulsoup4", "lxml", "markitdown", "pypdf"]
+    dependencies=["httpx", "beautifulsoup4", "lxml", "markitdown", "pypdf"],
+    lifespan=lifespan
 )
 
-mevzuat_client = MevzuatApiClient()
-
 @app.tool()
+@track_tool
 async def search_mevzuat(
     mevzuat_adi: Optional[str] = Field(None, description="The name of the legislation or a keyword to search for. For an exact phrase search, enclose the term in double quotes."),
     phrase: Optional[str] = Field(None, description="Search for this term in the FULL TEXT of the legislation. For an exact phrase search, enclose the term in double quotes."),
@@ -57,7 +88,9 @@ async def search_mevzuat(
     # AÇIKLAMA GÜNCELLENDİ
     sort_field: SortFieldEnum = Field(SortFieldEnum.RESMI_GAZETE_TARIHI, description="Field to sort results by. Possible values: RESMI_GAZETE_TARIHI (Official Gazette Date - Resmi Gazete Tarihi), KAYIT_TARIHI (Registration Date - Kayıt Tarihi), MEVZUAT_NUMARASI (Legislation Number - Mevzuat Numarası)."),
     # AÇIKLAMA GÜNCELLENDİ
-    sort_direction: SortDirectionEnum = Field(SortDirectionEnum.DESC, description="Sorting direction. Possible values: DESC (descending, newest to oldest - Azalan, yeniden eskiye), ASC (ascending, oldest to newest - Artan, eskiden yeniye).")
+    sort_direction: SortDirectionEnum = Field(SortDirectionEnum.DESC, description="Sorting direction. Possible values: DESC (descending, newest to oldest - Azalan, yeniden eskiye), ASC (ascending, oldest to newest - Artan, eskiden yeniye)."),
+    max_results: Optional[int] = Field(None, ge=1, le=1000, description="Collect up to this many results across several pages in one call, instead of returning a single page. When set, 'page_size' is ignored and pages are fetched 50 at a time starting from 'page_number'."),
+    prefer_local: bool = Field(False, description="For 'phrase' searches, answer from the local index of previously retrieved articles when it has matches, ranked by relevance instead of 'sort_field'. Falls back to the online search when there are no local matches.")
 ) -> MevzuatSearchResult:
     """
     Searches for Turkish legislation on mevzuat.gov.tr.
@@ -93,10 +126,29 @@ async def search_mevzuat(
     )
     
     log_params = search_req.model_dump(exclude_defaults=True)
-    logger.info(f"Tool 'search_mevzuat' called with parameters: {log_params}")
+    logger.info("Tool 'search_mevzuat' called with parameters: %s", log_params, extra={"tool": "search_mevzuat"})
     
+    client = get_client()
     try:
-        result = await mevzuat_client.search_documents(search_req)
+        if prefer_local and phrase and client.search_index is not None:
+            # A locked or broken local index must not fail the tool; the online search below still answers.
+            try:
+                documents, total_results = await asyncio.to_thread(
+                    client.search_index.search_documents, phrase, mevzuat_turleri=[tur.value for tur in search_req.mevzuat_tur_list],
+                    limit=page_size, offset=(page_number - 1) * page_size
+                )
+            except Exception:
+                logger.warning("Local search failed; falling back to the online search.", exc_info=True)
+                total_results = 0
+            if total_results:
+                return MevzuatSearchResult(
+                    documents=documents, total_results=total_results, current_page=page_number, page_size=page_size,
+                    total_pages=(total_results + page_size - 1) // page_size, query_used={**log_params, "prefer_local": True}
+                )
+        if max_results is not None:
+            result = await client.search_all_documents(search_req.model_copy(update={"page_size": 50}), max_results=max_results)
+        else:
+            result = await client.search_documents(search_req)
         if not result.documents and not result.error_message:
             result.error_message = "No legislation found matching the specified criteria."
         return result
@@ -109,35 +161,217 @@ async def search_mevzuat(
         )
 
 @app.tool()
-async def get_mevzuat_article_tree(mevzuat_id: str = Field(..., description="The ID of the legislation, obtained from the 'search_mevzuat' tool. E.g., '343829'.")) -> List[MevzuatArticleNode]:
+@track_tool
+async def get_mevzuat_article_tree(
+    mevzuat_id: str = Field(..., description="The ID of the legislation, obtained from the 'search_mevzuat' tool. E.g., '343829'."),
+    max_depth: Optional[int] = Field(None, ge=1, description="Expand only this many levels below the listed nodes (1 = the listed nodes only). Collapsed nodes report 'child_count'."),
+    subtree_root: Optional[str] = Field(None, description="madde_id of a section whose children should be listed instead of the top level."),
+    fields: Optional[List[Literal["madde_no", "title", "description", "mevzuat_id"]]] = Field(None, description="Node fields to include besides madde_id. Defaults to all of them."),
+    offset: int = Field(0, ge=0, description="Number of listed nodes (top-level or subtree_root children) to skip."),
+    limit: Optional[int] = Field(None, ge=1, le=1000, description="Maximum number of listed nodes to return.")
+) -> Union[List[MevzuatArticleNode], MevzuatArticleTreePage]:
     """
     Retrieves the table of contents (article tree) for a specific legislation.
     This shows the chapters, sections, and articles in a hierarchical structure.
+    For large codes, pass max_depth=1 (and optionally fields=['title'] and a limit) to get a compact outline,
+    then drill down with subtree_root. With any of these options the result is a MevzuatArticleTreePage.
     """
-    logger.info(f"Tool 'get_mevzuat_article_tree' called for mevzuat_id: {mevzuat_id}")
+    logger.info("Tool 'get_mevzuat_article_tree' called for mevzuat_id: %s", mevzuat_id, extra={"tool": "get_mevzuat_article_tree"})
     try:
-        return await mevzuat_client.get_article_tree(mevzuat_id)
+        if max_depth is None and subtree_root is None and fields is None and offset == 0 and limit is None:
+            return await get_client().get_article_tree(mevzuat_id)
+        flat = await get_client().get_flat_tree(mevzuat_id)
+        if flat is None:
+            raise ToolError(f"Failed to retrieve article tree of {mevzuat_id}.")
+        return flat.page(subtree_root=subtree_root, max_depth=max_depth, fields=fields, offset=offset, limit=limit)
+    except ToolError:
+        raise
+    except KeyError:
+        raise ToolError(f"No node with madde_id '{subtree_root}' in the article tree of {mevzuat_id}.")
     except Exception as e:
-        logger.exception(f"Error in tool 'get_mevzuat_article_tree' for id {mevzuat_id}.")
+        logger.exception("Error in tool 'get_mevzuat_article_tree' for id %s.", mevzuat_id)
         raise ToolError(f"Failed to retrieve article tree: {str(e)}")
 
 @app.tool()
+@track_tool
 async def get_mevzuat_article_content(mevzuat_id: str = Field(..., description="The ID of the legislation, obtained from 'search_mevzuat' results."), madde_id: str = Field(..., description="The ID of the specific article (madde), obtained from the 'get_mevzuat_article_tree' tool. E.g., '2596801'.")) -> MevzuatArticleContent:
     """
     Retrieves the full text content of a single article of a legislation and provides it as clean Markdown text.
     """
-    logger.info(f"Tool 'get_mevzuat_article_content' called for madde_id: {madde_id}")
+    logger.info("Tool 'get_mevzuat_article_content' called for madde_id: %s", madde_id, extra={"tool": "get_mevzuat_article_content"})
     try:
-        return await mevzuat_client.get_article_content(madde_id, mevzuat_id)
+        return await get_client().get_article_content(madde_id, mevzuat_id)
     except Exception as e:
-        logger.exception(f"Error in tool 'get_mevzuat_article_content' for id {madde_id}.")
+        logger.exception("Error in tool 'get_mevzuat_article_content' for id %s.", madde_id)
         return MevzuatArticleContent(
             madde_id=madde_id, mevzuat_id=mevzuat_id,
             markdown_content="", error_message=f"An unexpected error occurred: {str(e)}"
         )
 
+@app.tool()
+@track_tool
+async def get_mevzuat_article_contents(
+    articles: List[MevzuatArticleRef] = Field(..., min_length=1, max_length=50, description="The articles to retrieve, as a list of {'mevzuat_id': ..., 'madde_id': ...} objects. Articles may belong to different legislations."),
+    max_concurrency: int = Field(8, ge=1, le=32, description="Maximum number of articles downloaded at the same time.")
+) -> List[MevzuatArticleContent]:
+    """
+    Retrieves the Markdown content of several articles, possibly from different legislations, in a single call.
+    Use this instead of calling 'get_mevzuat_article_content' repeatedly, e.g. to compare provisions.
+    Results are returned in the order requested; an article that could not be retrieved carries an 'error_message'.
+    """
+    logger.info("Tool 'get_mevzuat_article_contents' called for %d articles", len(articles), extra={"tool": "get_mevzuat_article_contents"})
+    try:
+        return await get_client().get_article_contents(articles, max_concurrency=max_concurrency)
+    except Exception as e:
+        logger.exception("Error in tool 'get_mevzuat_article_contents'.")
+        raise ToolError(f"Failed to retrieve article contents: {str(e)}")
+
+@app.tool()
+@track_tool
+async def get_mevzuat_article_by_number(
+    mevzuat_id: str = Field(..., description="The ID of the legislation, obtained from the 'search_mevzuat' tool. E.g., '343829'."),
+    madde_no: int = Field(..., ge=1, description="The article number as cited, e.g. 81 for 'madde 81'."),
+    kind: MaddeKindEnum = Field(MaddeKindEnum.MADDE, description="Kind of article: MADDE (regular article), EK_MADDE (additional article - Ek Madde) or GECICI_MADDE (provisional article - Geçici Madde).")
+) -> MevzuatNumberedArticle:
+    """
+    Retrieves the content of an article by its number (e.g. 'madde 81') as Markdown, in a single call.
+    Use this instead of 'get_mevzuat_article_tree' plus 'get_mevzuat_article_content' when the article number is known.
+    The result also includes the article's title and the sections containing it.
+    """
+    logger.info("Tool 'get_mevzuat_article_by_number' called for mevzuat_id: %s, madde_no: %s", mevzuat_id, madde_no, extra={"tool": "get_mevzuat_article_by_number"})
+    try:
+        return await get_client().get_article_by_number(mevzuat_id, madde_no, kind)
+    except Exception as e:
+        logger.exception("Error in tool 'get_mevzuat_article_by_number' for id %s.", mevzuat_id)
+        return MevzuatNumberedArticle(
+            madde_id="", mevzuat_id=mevzuat_id, madde_no=madde_no, kind=kind,
+            markdown_content="", error_message=f"An unexpected error occurred: {str(e)}"
+        )
+
+@app.tool()
+@track_tool
+async def get_mevzuat_full_text(
+    mevzuat_id: str = Field(..., description="The ID of the legislation, obtained from the 'search_mevzuat' tool. E.g., '343829'."),
+    max_concurrency: int = Field(8, ge=1, le=32, description="Maximum number of articles downloaded at the same time.")
+) -> MevzuatFullText:
+    """
+    Retrieves the complete text of a legislation as a single Markdown document, in table-of-contents order.
+    Use this instead of calling 'get_mevzuat_article_content' for every article. Articles that could not be
+    retrieved are listed in 'failed_articles' and the rest of the document is still returned.
+    """
+    logger.info("Tool 'get_mevzuat_full_text' called for mevzuat_id: %s", mevzuat_id, extra={"tool": "get_mevzuat_full_text"})
+    try:
+        return await get_client().get_full_text(mevzuat_id, max_concurrency=max_concurrency)
+    except Exception as e:
+        logger.exception("Error in tool 'get_mevzuat_full_text' for id %s.", mevzuat_id)
+        return MevzuatFullText(
+            mevzuat_id=mevzuat_id, markdown_content="", article_count=0, retrieved_count=0,
+            error_message=f"An unexpected error occurred: {str(e)}"
+        )
+
+@app.tool()
+@track_tool
+async def search_local_mevzuat_articles(
+    query: str = Field(..., description="Words to search for in the text of articles. Matching ignores case and Turkish diacritics (e.g. 'işçi' also matches 'ISCI'). Enclose the query in double quotes for an exact phrase."),
+    mevzuat_id: Optional[str] = Field(None, description="Restrict the search to a single legislation, by the ID obtained from 'search_mevzuat'."),
+    limit: int = Field(20, ge=1, le=100, description="Maximum number of articles to return.")
+) -> List[MevzuatArticleHit]:
+    """
+    Searches the local index of previously retrieved articles and returns the best matching articles with their
+    'madde_id', ranked by relevance. Only articles fetched earlier through this server are searched; use
+    'search_mevzuat' with 'phrase' to search the whole legislation database online.
+    """
+    logger.info("Tool 'search_local_mevzuat_articles' called with query: %s", query, extra={"tool": "search_local_mevzuat_articles"})
+    search_index = get_client().search_index
+    if search_index is None:
+        raise ToolError("The local article index is disabled on this server.")
+    if not query.strip():
+        raise ToolError("The 'query' parameter must not be empty.")
+    try:
+        return await asyncio.to_thread(search_index.search_articles, query, mevzuat_id=mevzuat_id, limit=limit)
+    except Exception as e:
+        logger.exception("Error in tool 'search_local_mevzuat_articles'.")
+        raise ToolError(f"Failed to search the local article index: {str(e)}")
+
+@app.tool()
+@track_tool
+async def get_mevzuat_changes(
+    since: Optional[datetime.datetime] = Field(None, description="Only return changes detected after this time (ISO 8601, e.g. '2025-07-01T00:00:00Z')."),
+    mevzuat_id: Optional[str] = Field(None, description="Only return changes of this legislation, by the ID obtained from 'search_mevzuat'."),
+    limit: int = Field(100, ge=1, le=1000, description="Maximum number of changes to return.")
+) -> List[MevzuatChange]:
+    """
+    Lists amendments detected in legislation this server has retrieved before, newest first: articles whose text
+    changed ('modified'), articles added to or removed from a legislation, and restructured article trees.
+    Changes are detected whenever content is fetched again, e.g. by a refreshing sync ('mevzuat-mcp-sync --refresh').
+    """
+    logger.info("Tool 'get_mevzuat_changes' called for mevzuat_id: %s, since: %s", mevzuat_id, since, extra={"tool": "get_mevzuat_changes"})
+    tracker = get_client().change_tracker
+    if tracker is None:
+        raise ToolError("Change tracking is disabled on this server.")
+    try:
+        return tracker.changes(since=since.timestamp() if since is not None else None, mevzuat_id=mevzuat_id, limit=limit)
+    except Exception as e:
+        logger.exception("Error in tool 'get_mevzuat_changes'.")
+        raise ToolError(f"Failed to read the changes feed: {str(e)}")
+
+@app.tool()
+@track_tool
+async def resolve_citations(
+    citations: List[str] = Field(..., min_length=1, max_length=50, description="Texts containing legislation citations, e.g. '5237 sayılı TCK m. 81', '6098 sayılı Kanun madde 49, 50' or 'TMK'nın 166. maddesi'. A text may contain several citations."),
+    include_content: bool = Field(True, description="Also return the Markdown content of every cited article."),
+    max_concurrency: int = Field(8, ge=1, le=32, description="Maximum number of upstream requests made at the same time.")
+) -> List[MevzuatCitation]:
+    """
+    Resolves Turkish legislation citations to legislation IDs, article IDs and article contents in a single call.
+    Use this instead of 'search_mevzuat' + 'get_mevzuat_article_tree' + 'get_mevzuat_article_content' whenever
+    the legislation number (or a common abbreviation such as TCK, TBK, TMK, HMK, CMK) and article are known.
+    One result is returned per recognized citation, in input order; unresolved citations carry an 'error_message'.
+    """
+    logger.info("Tool 'resolve_citations' called for %d texts", len(citations), extra={"tool": "resolve_citations"})
+    try:
+        return await resolve_citation_texts(get_client(), citations, include_content=include_content, max_concurrency=max_concurrency)
+    except Exception as e:
+        logger.exception("Error in tool 'resolve_citations'.")
+        raise ToolError(f"Failed to resolve citations: {str(e)}")
+
+@app.tool()
+@track_tool
+async def get_mevzuat_references(
+    direction: Literal["inbound", "outbound"] = Field(..., description="'inbound': articles citing the given legislation or article; 'outbound': what the given article or legislation cites."),
+    citation: Optional[str] = Field(None, description="Inbound only: the cited legislation or article as a citation, e.g. '4857 sayılı Kanun madde 17', 'İş Kanunu madde 17' or 'TCK m. 81'."),
+    mevzuat_id: Optional[str] = Field(None, description="The legislation, by the ID obtained from 'search_mevzuat'. Required for 'outbound'."),
+    madde_id: Optional[str] = Field(None, description="Outbound only: restrict to references made by this article."),
+    madde_no: Optional[int] = Field(None, ge=1, description="Inbound only, with mevzuat_id: restrict to references to this article number."),
+    kind: MaddeKindEnum = Field(MaddeKindEnum.MADDE, description="Inbound only, with madde_no: the kind of the cited article."),
+    limit: int = Field(100, ge=1, le=1000, description="Maximum number of references to return.")
+) -> List[MevzuatReference]:
+    """
+    Answers cross-reference questions such as "which legislation refers to İş Kanunu madde 17" from a local
+    reference graph, without contacting the API. The graph is built from the articles this server has retrieved
+    (or mirrored with 'mevzuat-mcp-sync'), so inbound results only cover articles fetched so far.
+    """
+    logger.info("Tool 'get_mevzuat_references' called (%s) for citation: %s, mevzuat_id: %s", direction, citation, mevzuat_id, extra={"tool": "get_mevzuat_references"})
+    graph = get_client().reference_graph
+    if graph is None:
+        raise ToolError("The reference graph is disabled on this server.")
+    if direction == "outbound":
+        if not mevzuat_id:
+            raise ToolError("'mevzuat_id' is required for outbound references.")
+        return graph.outbound(mevzuat_id, madde_id=madde_id, limit=limit)
+    if citation:
+        try:
+            return graph.inbound_citation(citation, limit=limit)
+        except ValueError as e:
+            raise ToolError(str(e))
+    if not mevzuat_id:
+        raise ToolError("Either 'citation' or 'mevzuat_id' is required for inbound references.")
+    return graph.inbound(mevzuat_id=mevzuat_id, madde_no=madde_no, kind=kind, limit=limit)
+
 def main():
+    configure_logging()
     logger.info(f"Starting {app.name} server...")
+    start_metrics_server_from_env()
     try:
         app.run()
     except KeyboardInterrupt:
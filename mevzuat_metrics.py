@@ -0,0 +1,262 @@
+# mevzuat_metrics.py
+"""
+Process metrics in the Prometheus text exposition format.
+A small dependency-free registry of counters, gauges and histograms covering
+upstream latency and response sizes per bedesten endpoint, the decode and
+conversion stages of article content, limiter and conversion pool
+saturation, and per-tool call counts. Served as /metrics by the REST API and,
+for the stdio MCP server, by an optional sidecar on MEVZUAT_METRICS_PORT.
+"""
+
+import functools
+import logging
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+from mevzuat_trace import get_recorder
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+STAGE_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra is not None:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value: float) -> str:
+    if value != value:
+        return "NaN"
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+class _Metric:
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], Any] = {}
+
+    def labels(self, *values: Any) -> Any:
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {key}")
+            child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _new_child(self) -> Any:
+        raise NotImplementedError
+
+    def _samples(self, key: Tuple[str, ...], child: Any) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        for key, child in list(self._children.items()):
+            lines.extend(self._samples(key, child))
+        return lines
+
+class _Value:
+    __slots__ = ("value", "function")
+
+    def __init__(self):
+        self.value = 0.0
+        self.function: Optional[Callable[[], float]] = None
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        """Reads the value from function at scrape time instead of storing it."""
+        self.function = function
+
+    def get(self) -> float:
+        if self.function is None:
+            return self.value
+        try:
+            return float(self.function())
+        except Exception:
+            logger.debug("Metric callback failed", exc_info=True)
+            return float("nan")
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def _new_child(self) -> _Value:
+        return _Value()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+    def _samples(self, key: Tuple[str, ...], child: _Value) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.get())}"]
+
+class Gauge(Counter):
+    type_name = "gauge"
+
+    def set(self, value: float) -> None:
+        self.labels().set(value)
+
+class _HistogramValue:
+    __slots__ = ("buckets", "counts", "sum")
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.sum += value
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self) -> _HistogramValue:
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def _samples(self, key: Tuple[str, ...], child: _HistogramValue) -> List[str]:
+        lines = []
+        cumulative = 0
+        counts = list(child.counts)
+        for bound, count in zip((*self.buckets, float("inf")), counts):
+            cumulative += count
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, ('le', _format_value(bound)))} {cumulative}")
+        labels = _format_labels(self.labelnames, key)
+        lines.append(f"{self.name}_sum{labels} {_format_value(child.sum)}")
+        lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+REGISTRY = Registry()
+
+UPSTREAM_LATENCY = REGISTRY.register(Histogram(
+    "mevzuat_upstream_request_seconds", "Latency of a single bedesten request attempt.", ["endpoint"]))
+UPSTREAM_REQUESTS = REGISTRY.register(Counter(
+    "mevzuat_upstream_requests_total", "Bedesten request attempts by HTTP status ('transport_error' when no response arrived).", ["endpoint", "status"]))
+UPSTREAM_RESPONSE_BYTES = REGISTRY.register(Histogram(
+    "mevzuat_upstream_response_bytes", "Size of bedesten response bodies.", ["endpoint"], SIZE_BUCKETS))
+CONTENT_STAGE_SECONDS = REGISTRY.register(Histogram(
+    "mevzuat_content_stage_seconds", "Time spent per article content stage: base64 'decode' and Markdown 'convert' (including pool wait).", ["stage"], STAGE_BUCKETS))
+UPSTREAM_LIMIT = REGISTRY.register(Gauge("mevzuat_upstream_concurrency_limit", "Current adaptive concurrency limit towards bedesten."))
+UPSTREAM_IN_FLIGHT = REGISTRY.register(Gauge("mevzuat_upstream_in_flight", "Bedesten requests currently in flight."))
+UPSTREAM_WAITING = REGISTRY.register(Gauge("mevzuat_upstream_waiting", "Requests queued in the limiter, by priority.", ["priority"]))
+CONVERSION_PENDING = REGISTRY.register(Gauge("mevzuat_conversion_pending", "Conversions submitted to the pool and not yet finished."))
+CONVERSION_QUEUE_DEPTH = REGISTRY.register(Gauge("mevzuat_conversion_queue_depth", "Conversions waiting for a free pool worker."))
+CACHE_EVENTS = REGISTRY.register(Gauge("mevzuat_cache_events", "Response cache counters since start.", ["event"]))
+PREFETCH_EVENTS = REGISTRY.register(Counter(
+    "mevzuat_prefetch_events_total", "Speculative prefetches by kind ('tree', 'content') and event ('scheduled', 'hit', 'dropped', 'error').", ["kind", "event"]))
+TOOL_CALLS = REGISTRY.register(Counter("mevzuat_tool_calls_total", "MCP tool calls by outcome ('ok' or 'error').", ["tool", "outcome"]))
+TOOL_LATENCY = REGISTRY.register(Histogram("mevzuat_tool_seconds", "MCP tool call latency.", ["tool"]))
+
+def watch_client(client: Any) -> None:
+    """Exposes the limiter, conversion pool and cache state of a MevzuatApiClient as gauges, read at scrape time."""
+    limiter, converter = client.limiter, client.converter
+    UPSTREAM_LIMIT.labels().set_function(lambda: limiter.limit)
+    UPSTREAM_IN_FLIGHT.labels().set_function(lambda: limiter.in_flight)
+    for priority in ("interactive", "background"):
+        UPSTREAM_WAITING.labels(priority).set_function(lambda priority=priority: limiter.stats()[f"waiting_{priority}"])
+    CONVERSION_PENDING.labels().set_function(lambda: converter.pending)
+    CONVERSION_QUEUE_DEPTH.labels().set_function(lambda: converter.queue_depth)
+    if client.cache is not None:
+        for event in ("memory_hits", "persistent_hits", "misses", "stale_hits", "stores", "revalidations", "lease_waits", "shared_fills"):
+            CACHE_EVENTS.labels(event).set_function(lambda event=event: client.cache.stats()[event])
+
+def track_tool(fn: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+    """
+    Counts calls and measures latency of an async tool function, and records the call
+    to MEVZUAT_TRACE_FILE when set. A raised exception or a result carrying an
+    error_message counts as an error.
+    """
+    name = fn.__name__
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            result = await fn(*args, **kwargs)
+            if not getattr(result, "error_message", None):
+                outcome = "ok"
+            return result
+        finally:
+            elapsed = time.perf_counter() - started
+            TOOL_LATENCY.labels(name).observe(elapsed)
+            TOOL_CALLS.labels(name, outcome).inc()
+            recorder = get_recorder()
+            if recorder is not None:
+                recorder.record(name, kwargs, elapsed, outcome == "ok")
+    return wrapper
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = REGISTRY.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_metrics_server(port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Serves /metrics from a daemon thread, for processes without an HTTP server of their own."""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    logger.info(f"Serving metrics on http://{host}:{port}/metrics")
+    return server
+
+def start_metrics_server_from_env() -> Optional[ThreadingHTTPServer]:
+    """Starts the sidecar when MEVZUAT_METRICS_PORT is set (MEVZUAT_METRICS_HOST defaults to 127.0.0.1)."""
+    port = os.environ.get("MEVZUAT_METRICS_PORT")
+    if not port:
+        return None
+    return start_metrics_server(int(port), os.environ.get("MEVZUAT_METRICS_HOST", "127.0.0.1"))
@@ -35,6 +35,12 @@ class SortDirectionEnum(str, Enum):
     DESC = "desc"
     ASC = "asc"
 
+class MaddeKindEnum(str, Enum):
+    """Enum for the kind of a numbered article: regular, additional (ek) or provisional (geçici)."""
+    MADDE = "MADDE"
+    EK_MADDE = "EK_MADDE"
+    GECICI_MADDE = "GECICI_MADDE"
+
 class MevzuatSearchRequest(BaseModel):
     """Request model for searching legislation documents. Used by the client."""
     mevzuat_adi: Optional[str] = Field(None, description="The name of the legislation or a keyword to search for. For an exact phrase search, enclose the term in double quotes. E.g., 'ticaret' or '\"türk ceza kanunu\"'.")
@@ -94,9 +100,80 @@ class MevzuatArticleNode(BaseModel):
 
 MevzuatArticleNode.model_rebuild()
 
+class MevzuatArticleTreePage(BaseModel):
+    """A depth-limited, paginated slice of an article tree, with only the requested node fields."""
+    mevzuat_id: str
+    subtree_root: Optional[str] = Field(None, description="madde_id of the node whose children are listed; None for the top level.")
+    nodes: List[Dict[str, Any]] = Field(..., description="Nodes with madde_id, the requested fields and their expanded 'children'; nodes cut off by max_depth carry 'child_count' instead.")
+    offset: int
+    total_children: int = Field(..., description="Number of children of subtree_root (or top-level nodes) before paging.")
+    has_more: bool
+
+class MevzuatArticleRef(BaseModel):
+    """Reference to a single article of a legislation, as used by batch requests."""
+    mevzuat_id: str = Field(..., description="The ID of the legislation, obtained from 'search_mevzuat' results.")
+    madde_id: str = Field(..., description="The ID of the article (madde), obtained from 'get_mevzuat_article_tree'.")
+
 class MevzuatArticleContent(BaseModel):
     """Model for the content of a single legislation article."""
     madde_id: str
     mevzuat_id: str
     markdown_content: str
-    error_message: Optional[str] = None
\ No newline at end of file
+    error_message: Optional[str] = None
+
+class MevzuatFullText(BaseModel):
+    """Model for the assembled full text of a legislation, built from all of its articles."""
+    mevzuat_id: str
+    markdown_content: str
+    article_count: int
+    retrieved_count: int
+    failed_articles: List[MevzuatArticleContent] = []
+    error_message: Optional[str] = None
+
+class MevzuatNumberedArticle(MevzuatArticleContent):
+    """Model for an article looked up by its number, with its place in the table of contents."""
+    madde_no: int
+    kind: MaddeKindEnum = MaddeKindEnum.MADDE
+    title: Optional[str] = None
+    path: List[str] = []
+
+class MevzuatArticleHit(BaseModel):
+    """Model for an article matched by the local full-text index."""
+    mevzuat_id: str
+    madde_id: str
+    mevzuat_adi: Optional[str] = None
+    score: float
+    snippet: str
+
+class MevzuatChange(BaseModel):
+    """Model for a change detected when legislation was fetched again."""
+    mevzuat_id: str
+    madde_id: Optional[str] = Field(None, description="The changed article; empty when the tree was restructured without adding or removing articles.")
+    change: str = Field(..., description="'modified' (article text changed), 'added' or 'removed' (article added to or removed from the tree), or 'restructured'.")
+    detected_at: datetime.datetime
+
+class MevzuatCitation(BaseModel):
+    """Model for a legislation citation resolved to its article (and the article's content)."""
+    citation: str = Field(..., description="The citation as it appeared in the input text.")
+    mevzuat_no: Optional[int] = None
+    mevzuat_tur: Optional[MevzuatTurEnum] = Field(None, description="Legislation type named in the citation; empty when only a number was given.")
+    mevzuat_id: Optional[str] = None
+    mevzuat_adi: Optional[str] = None
+    madde_no: Optional[int] = Field(None, description="Cited article number; empty when the citation names only the legislation.")
+    kind: MaddeKindEnum = MaddeKindEnum.MADDE
+    madde_id: Optional[str] = None
+    title: Optional[str] = None
+    path: List[str] = Field(default_factory=list, description="Titles of the sections containing the article, outermost first.")
+    markdown_content: str = ""
+    error_message: Optional[str] = None
+
+class MevzuatReference(BaseModel):
+    """Model for a reference from one article to another legislation or article."""
+    source_mevzuat_id: str
+    source_madde_id: str = Field(..., description="The citing article.")
+    target_mevzuat_no: Optional[int] = Field(None, description="Number of the cited legislation; empty when the article cites its own legislation ('bu Kanunun ...').")
+    target_mevzuat_tur: Optional[MevzuatTurEnum] = None
+    target_mevzuat_id: Optional[str] = Field(None, description="ID of the cited legislation, when known locally.")
+    target_madde_no: Optional[int] = Field(None, description="Cited article number; empty when the legislation as a whole is cited.")
+    target_kind: MaddeKindEnum = MaddeKindEnum.MADDE
+    citation: str = Field(..., description="The citation as it appears in the citing article.")
@@ -0,0 +1,165 @@
+# mevzuat_prefetch.py
+"""
+Speculative prefetch of the resources an agent is likely to ask for next.
+Sessions mostly go search -> article tree of a top hit -> first articles, so
+after an interactive search the trees of the top-K hits are warmed, and after
+an interactive tree call the contents of its first N articles. Prefetches
+run at background priority, within a per-minute request budget, and are
+counted against later interactive requests to report hit ratios.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict, deque
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Deque, Dict, Optional, Set, Tuple
+
+from mevzuat_concurrency import Priority, current_priority, request_priority
+from mevzuat_metrics import PREFETCH_EVENTS
+from mevzuat_models import MevzuatSearchResult
+
+if TYPE_CHECKING:
+    from mevzuat_client import MevzuatApiClient
+
+logger = logging.getLogger(__name__)
+
+KINDS = {"mevzuatMaddeTree": "tree", "getDocumentContent": "content"}
+
+class Prefetcher:
+    """
+    Warms likely-next trees and article contents through the client's own cache.
+    top_k trees are prefetched per search page 1, first_n articles per tree; at most
+    max_in_flight prefetches run at once and at most budget_per_minute are started
+    per minute, anything beyond is dropped rather than queued. A prefetched resource
+    requested interactively within hit_window seconds counts as a hit.
+    """
+    def __init__(self, client: "MevzuatApiClient", top_k: int = 3, first_n: int = 5, max_in_flight: int = 4,
+                 budget_per_minute: int = 120, hit_window: float = 600.0, max_tracked: int = 4096):
+        self.client = client
+        self.top_k = top_k
+        self.first_n = first_n
+        self.budget_per_minute = budget_per_minute
+        self.hit_window = hit_window
+        self.max_tracked = max_tracked
+        self._slots = asyncio.Semaphore(max_in_flight)
+        self._started: Deque[float] = deque()
+        # (kind, id) -> time the prefetch was scheduled, oldest first.
+        self._warmed: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+        # mevzuat_id -> time its first articles were last prefetched, oldest first.
+        self._articles_prefetched: "OrderedDict[str, float]" = OrderedDict()
+        self._tasks: Set[asyncio.Task] = set()
+        self._stats: Dict[str, Dict[str, int]] = {
+            kind: {"scheduled": 0, "dropped": 0, "errors": 0, "hits": 0} for kind in KINDS.values()
+        }
+
+    @classmethod
+    def from_env(cls, client: "MevzuatApiClient") -> Optional["Prefetcher"]:
+        """Builds a prefetcher if MEVZUAT_PREFETCH=1, sized by MEVZUAT_PREFETCH_* environment variables."""
+        if os.environ.get("MEVZUAT_PREFETCH", "0") != "1":
+            return None
+        return cls(
+            client,
+            top_k=int(os.environ.get("MEVZUAT_PREFETCH_TOP_K", "3")),
+            first_n=int(os.environ.get("MEVZUAT_PREFETCH_FIRST_N", "5")),
+            max_in_flight=int(os.environ.get("MEVZUAT_PREFETCH_CONCURRENCY", "4")),
+            budget_per_minute=int(os.environ.get("MEVZUAT_PREFETCH_BUDGET", "120")),
+        )
+
+    def attach(self) -> "Prefetcher":
+        self.client.add_search_listener(self.on_search)
+        self.client.add_request_listener(self.on_request)
+        return self
+
+    def stats(self) -> Dict[str, Any]:
+        stats: Dict[str, Any] = {}
+        for kind, counts in self._stats.items():
+            stats[kind] = {**counts, "hit_ratio": round(counts["hits"] / counts["scheduled"], 3) if counts["scheduled"] else None}
+        stats["in_flight"] = len(self._tasks)
+        return stats
+
+    def on_search(self, result: MevzuatSearchResult) -> None:
+        if current_priority() != Priority.INTERACTIVE or result.current_page != 1:
+            return
+        for document in result.documents[:self.top_k]:
+            self._schedule("tree", document.mevzuat_id, lambda mevzuat_id=document.mevzuat_id: self.client.get_flat_tree(mevzuat_id))
+
+    def on_request(self, request: Tuple[str, str, str]) -> None:
+        """Client request listener: (endpoint, mevzuat_id, resource id)."""
+        if current_priority() != Priority.INTERACTIVE:
+            return
+        endpoint, mevzuat_id, key = request
+        kind = KINDS.get(endpoint)
+        if kind is None:
+            return
+        warmed_at = self._warmed.pop((kind, key), None)
+        if warmed_at is not None and time.monotonic() - warmed_at <= self.hit_window:
+            self._stats[kind]["hits"] += 1
+            PREFETCH_EVENTS.labels(kind, "hit").inc()
+        if kind == "tree" and self.first_n > 0:
+            # A legislation browsed again within the budget window already has its first articles warmed.
+            now = time.monotonic()
+            prefetched_at = self._articles_prefetched.get(mevzuat_id)
+            if prefetched_at is not None and now - prefetched_at <= 60:
+                return
+            self._articles_prefetched[mevzuat_id] = now
+            self._articles_prefetched.move_to_end(mevzuat_id)
+            while len(self._articles_prefetched) > self.max_tracked:
+                self._articles_prefetched.popitem(last=False)
+            self._spawn(self._prefetch_articles(mevzuat_id))
+
+    async def _prefetch_articles(self, mevzuat_id: str) -> None:
+        # Joins the interactive tree request in flight (or hits the cache) rather than fetching it again.
+        with request_priority(Priority.BACKGROUND):
+            flat = await self.client.get_flat_tree(mevzuat_id)
+        if flat is None:
+            return
+        for index in flat.leaf_indexes()[:self.first_n]:
+            madde_id = flat.madde_ids[index]
+            self._schedule("content", madde_id, lambda madde_id=madde_id: self.client.get_article_content(madde_id, mevzuat_id))
+
+    def _within_budget(self) -> bool:
+        now = time.monotonic()
+        while self._started and now - self._started[0] > 60:
+            self._started.popleft()
+        if len(self._started) >= self.budget_per_minute:
+            return False
+        self._started.append(now)
+        return True
+
+    def _schedule(self, kind: str, key: str, fetch: Callable[[], Awaitable[Any]]) -> None:
+        if (kind, key) in self._warmed:
+            return
+        if not self._within_budget():
+            self._stats[kind]["dropped"] += 1
+            PREFETCH_EVENTS.labels(kind, "dropped").inc()
+            return
+        self._warmed[(kind, key)] = time.monotonic()
+        while len(self._warmed) > self.max_tracked:
+            self._warmed.popitem(last=False)
+        self._stats[kind]["scheduled"] += 1
+        PREFETCH_EVENTS.labels(kind, "scheduled").inc()
+        self._spawn(self._run(kind, key, fetch))
+
+    async def _run(self, kind: str, key: str, fetch: Callable[[], Awaitable[Any]]) -> None:
+        async with self._slots:
+            with request_priority(Priority.BACKGROUND):
+                try:
+                    result = await fetch()
+                except Exception:
+                    result = None
+                    logger.debug("Prefetch of %s %s failed", kind, key, exc_info=True)
+        if result is None or getattr(result, "error_message", None):
+            self._stats[kind]["errors"] += 1
+            PREFETCH_EVENTS.labels(kind, "error").inc()
+            self._warmed.pop((kind, key), None)
+
+    def _spawn(self, coro: Awaitable[Any]) -> None:
+        task = asyncio.ensure_future(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def close(self) -> None:
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
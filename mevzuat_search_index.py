@@ -0,0 +1,181 @@
+# mevzuat_search_index.py
+"""
+Local full-text index over legislation articles fetched through the client.
+Article Markdown is folded with Turkish case rules and without diacritics
+and stored in an SQLite FTS5 table, so repeated phrase searches can be
+answered locally with BM25 ranking down to the exact maddeId. Writes are
+queued to a writer thread, so indexing never blocks the event loop.
+"""
+
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from mevzuat_models import MevzuatArticleContent, MevzuatArticleHit, MevzuatDocument, MevzuatSearchResult
+from mevzuat_sqlite import SQLiteWriter, connect
+from mevzuat_text import fold_turkish
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+def build_match_query(query: str) -> str:
+    """
+    Turns user input into an FTS5 MATCH expression over folded text.
+    A query wrapped in double quotes is matched as an exact phrase; otherwise
+    every word must appear, as a prefix so inflected Turkish forms still match.
+    """
+    stripped = query.strip()
+    if len(stripped) > 1 and stripped.startswith('"') and stripped.endswith('"'):
+        tokens = _TOKEN_RE.findall(fold_turkish(stripped[1:-1]))
+        return f'"{" ".join(tokens)}"' if tokens else ""
+    return " ".join(f'"{token}"*' for token in _TOKEN_RE.findall(fold_turkish(stripped)))
+
+class ArticleSearchIndex:
+    """
+    SQLite FTS5 index of article content plus the search metadata of their legislations.
+    Searches may run on worker threads; they share one read connection under a lock.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._conn = connect(path)
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS documents ("
+            "mevzuat_id TEXT PRIMARY KEY, mevzuat_tur TEXT, document TEXT NOT NULL, updated_at REAL NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS articles ("
+            "id INTEGER PRIMARY KEY, madde_id TEXT NOT NULL UNIQUE, mevzuat_id TEXT NOT NULL, "
+            "content TEXT NOT NULL, updated_at REAL NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS articles_mevzuat_id ON articles (mevzuat_id);"
+            "CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(folded, tokenize='unicode61 remove_diacritics 2');"
+        )
+        self._writer = SQLiteWriter(path, "search-index")
+        self._read_lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, cache_dir: str) -> Optional["ArticleSearchIndex"]:
+        """Builds the index under cache_dir unless MEVZUAT_SEARCH_INDEX=0 or SQLite lacks FTS5."""
+        if os.environ.get("MEVZUAT_SEARCH_INDEX", "1") == "0":
+            return None
+        try:
+            return cls(os.path.join(cache_dir, "search_index.sqlite3"))
+        except sqlite3.OperationalError:
+            logger.warning("SQLite FTS5 is not available; the local search index is disabled.", exc_info=True)
+            return None
+
+    def add_article(self, content: MevzuatArticleContent) -> None:
+        """Queues (re-)indexing the Markdown of one article."""
+        if content.error_message or not content.markdown_content:
+            return
+        self._writer.submit(lambda conn: _index_article(conn, content.madde_id, content.mevzuat_id, content.markdown_content))
+
+    def add_search_result(self, result: MevzuatSearchResult) -> None:
+        """Remembers legislation metadata from search results so local hits can be returned as documents."""
+        if not result.documents:
+            return
+        now = time.time()
+        rows = [(doc.mevzuat_id, doc.mevzuat_tur.name, doc.model_dump_json(by_alias=True), now) for doc in result.documents]
+        self._writer.submit(lambda conn: conn.executemany(
+            "INSERT OR REPLACE INTO documents (mevzuat_id, mevzuat_tur, document, updated_at) VALUES (?, ?, ?, ?)", rows
+        ))
+
+    def flush(self) -> None:
+        """Blocks until every queued write is visible to searches."""
+        self._writer.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._read_lock:
+            return {
+                "articles": self._conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0],
+                "documents": self._conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0],
+                "writer": self._writer.stats(),
+            }
+
+    def search_articles(self, query: str, mevzuat_id: Optional[str] = None, limit: int = 20) -> List[MevzuatArticleHit]:
+        """Returns the best matching articles ranked by BM25."""
+        match = build_match_query(query)
+        if not match:
+            return []
+        sql = (
+            "SELECT a.madde_id, a.mevzuat_id, a.content, bm25(articles_fts) AS rank, d.document "
+            "FROM articles_fts JOIN articles a ON a.id = articles_fts.rowid "
+            "LEFT JOIN documents d ON d.mevzuat_id = a.mevzuat_id "
+            "WHERE articles_fts MATCH ?"
+        )
+        params: List[Any] = [match]
+        if mevzuat_id:
+            sql += " AND a.mevzuat_id = ?"
+            params.append(mevzuat_id)
+        sql += " ORDER BY rank LIMIT ?"
+        params.append(limit)
+        hits = []
+        with self._read_lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        for madde_id, hit_mevzuat_id, content, rank, document in rows:
+            mevzuat_adi = json.loads(document).get("mevzuatAdi") if document else None
+            hits.append(MevzuatArticleHit(
+                mevzuat_id=hit_mevzuat_id, madde_id=madde_id, mevzuat_adi=mevzuat_adi,
+                score=-rank, snippet=_snippet(content, query)
+            ))
+        return hits
+
+    def search_documents(self, query: str, mevzuat_turleri: Optional[List[str]] = None, limit: int = 10, offset: int = 0) -> Tuple[List[MevzuatDocument], int]:
+        """
+        Returns legislations whose indexed articles match query, best article first, and the total match count.
+        Only legislations seen in an earlier search result can be returned, since their metadata is needed.
+        """
+        match = build_match_query(query)
+        if not match:
+            return [], 0
+        sql = (
+            "SELECT d.mevzuat_id, d.document "
+            "FROM articles_fts JOIN articles a ON a.id = articles_fts.rowid "
+            "JOIN documents d ON d.mevzuat_id = a.mevzuat_id "
+            "WHERE articles_fts MATCH ?"
+        )
+        params: List[Any] = [match]
+        if mevzuat_turleri:
+            sql += f" AND d.mevzuat_tur IN ({', '.join('?' for _ in mevzuat_turleri)})"
+            params.extend(mevzuat_turleri)
+        sql += " ORDER BY bm25(articles_fts)"
+        # bm25() cannot be aggregated in SQL, so keep each legislation's best-ranked article here.
+        best: Dict[str, str] = {}
+        with self._read_lock:
+            for mevzuat_id, document in self._conn.execute(sql, params):
+                best.setdefault(mevzuat_id, document)
+        ranked = list(best.values())
+        documents = [MevzuatDocument.model_validate_json(document) for document in ranked[offset:offset + limit]]
+        return documents, len(ranked)
+
+    def close(self) -> None:
+        self._writer.close()
+        self._conn.close()
+
+def _index_article(conn: sqlite3.Connection, madde_id: str, mevzuat_id: str, markdown: str) -> None:
+    row = conn.execute("SELECT id, content FROM articles WHERE madde_id = ?", (madde_id,)).fetchone()
+    if row is not None and row[1] == markdown:
+        return
+    if row is None:
+        article_id = conn.execute(
+            "INSERT INTO articles (madde_id, mevzuat_id, content, updated_at) VALUES (?, ?, ?, ?)",
+            (madde_id, mevzuat_id, markdown, time.time())
+        ).lastrowid
+    else:
+        article_id = row[0]
+        conn.execute("UPDATE articles SET mevzuat_id = ?, content = ?, updated_at = ? WHERE id = ?", (mevzuat_id, markdown, time.time(), article_id))
+        conn.execute("DELETE FROM articles_fts WHERE rowid = ?", (article_id,))
+    conn.execute("INSERT INTO articles_fts (rowid, folded) VALUES (?, ?)", (article_id, fold_turkish(markdown)))
+
+def _snippet(content: str, query: str, width: int = 240) -> str:
+    folded = fold_turkish(content)
+    tokens = _TOKEN_RE.findall(fold_turkish(query))
+    positions = [folded.find(token) for token in tokens]
+    positions = [position for position in positions if position >= 0]
+    # Folding keeps Turkish text length-preserving, so positions map back onto the original.
+    start = max(0, min(positions) - width // 4) if positions and len(folded) == len(content) else 0
+    snippet = " ".join(content[start:start + width].split())
+    return ("…" if start > 0 else "") + snippet + ("…" if start + width < len(content) else "")
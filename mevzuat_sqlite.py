@@ -0,0 +1,96 @@
+# mevzuat_sqlite.py
+"""
+SQLite helpers shared by the local indexes (search index, change tracker,
+citation index, reference graph). Their listeners run on the event loop for
+every fetched article or search result, so they only enqueue their writes;
+a writer thread with its own connection applies them, many per transaction.
+"""
+
+import logging
+import os
+import queue
+import sqlite3
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+Write = Callable[[sqlite3.Connection], None]
+
+def connect(path: str, timeout: float = 5.0) -> sqlite3.Connection:
+    """Opens path in autocommit mode with WAL and synchronous=NORMAL, so readers never wait for the writer."""
+    directory = os.path.dirname(os.path.abspath(path))
+    if not os.path.exists(directory):
+        os.makedirs(directory)
+    conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=timeout)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+class SQLiteWriter:
+    """
+    Applies queued writes to an SQLite database from a background thread.
+    Writes queued while a transaction commits are applied together in the next one;
+    if that transaction fails, its writes are retried one by one so a bad row only loses itself.
+    """
+    def __init__(self, path: str, name: str, max_batch: int = 256):
+        self.path = path
+        self.max_batch = max_batch
+        self._conn = connect(path)
+        self._queue: "queue.Queue[Optional[Tuple[Write, Optional[Callable[[], None]]]]]" = queue.Queue()
+        self._stats: Dict[str, int] = {"writes": 0, "transactions": 0, "errors": 0}
+        self._thread = threading.Thread(target=self._run, name=f"mevzuat-{name}-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, write: Write, committed: Optional[Callable[[], None]] = None) -> None:
+        """Queues write(conn); committed, if given, is called on the writer thread once the write is durable."""
+        self._queue.put((write, committed))
+
+    def flush(self) -> None:
+        """Blocks until every write queued so far is committed (or has failed)."""
+        self._queue.join()
+
+    def stats(self) -> Dict[str, int]:
+        return {**self._stats, "queued": self._queue.qsize()}
+
+    def close(self) -> None:
+        """Applies the writes still queued, then stops the thread and closes its connection."""
+        self._queue.put(None)
+        self._thread.join()
+        self._conn.close()
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while batch[-1] is not None and len(batch) < self.max_batch:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            writes = [item for item in batch if item is not None]
+            if writes:
+                self._apply(writes)
+            for _ in batch:
+                self._queue.task_done()
+            if batch[-1] is None:
+                return
+
+    def _apply(self, writes: List[Tuple[Write, Optional[Callable[[], None]]]]) -> None:
+        try:
+            with self._conn:
+                self._conn.execute("BEGIN")
+                for write, _ in writes:
+                    write(self._conn)
+        except Exception:
+            if len(writes) > 1:
+                for item in writes:
+                    self._apply([item])
+                return
+            self._stats["errors"] += 1
+            logger.warning("SQLite write to %s failed", self.path, exc_info=True)
+            return
+        self._stats["transactions"] += 1
+        self._stats["writes"] += len(writes)
+        for _, committed in writes:
+            if committed is not None:
+                committed()
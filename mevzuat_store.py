@@ -0,0 +1,402 @@
+# mevzuat_store.py
+"""
+Compressed, content-addressed store of converted article Markdown.
+Article bodies are deduplicated by content hash and appended to a block file
+in compressed blocks (zlib, or zstd when the zstandard package is installed),
+with a dictionary trained on the first articles so that the boilerplate
+repeated across legislation compresses well even in small blocks. Two
+memory-mapped open-addressing hash tables map (mevzuat_id, madde_id) and
+content hashes to block locations, so a lookup touches only the mapped pages
+of the index and one block.
+
+One process per store directory writes (it holds store.lock); the others
+open the store read-only and see new blocks as they are flushed. Within a
+process, one thread owns the store: the client's listener queues writes to
+it and reads go through get_async, so compression, block I/O and index
+remaps never run on the event loop.
+"""
+
+import asyncio
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import time
+import zlib
+from collections import Counter, OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, every process is a writer
+    fcntl = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+from mevzuat_models import MevzuatArticleContent
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"MVZI"
+VERSION = 1
+_HEADER = struct.Struct("<4sIQQ")           # magic, version, capacity, count
+_SLOT = struct.Struct("<16sQIIII")           # key digest, block offset, block size, offset in block, length, stored_at
+_BLOCK_HEADER = struct.Struct("<BBII")       # codec, dictionary id, compressed size, raw size
+_EMPTY_KEY = bytes(16)
+CODEC_ZLIB, CODEC_ZSTD = 0, 1
+MAX_LOAD = 0.7
+ZLIB_WINDOW = 32 * 1024
+
+class StoredRef(NamedTuple):
+    block_offset: int
+    block_size: int
+    offset: int
+    length: int
+    stored_at: int
+
+def _digest(data: bytes) -> bytes:
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+def article_key(mevzuat_id: str, madde_id: str) -> bytes:
+    return _digest(f"{mevzuat_id}\x00{madde_id}".encode("utf-8"))
+
+class MmapHashTable:
+    """
+    Fixed-slot hash table of 16-byte digests to StoredRefs in a memory-mapped file, with linear probing.
+    The writer doubles the table into a new file at MAX_LOAD and swaps it in; readers notice the swap
+    on a miss and remap.
+    """
+    def __init__(self, path: str, writable: bool, capacity: int = 1 << 14):
+        self.path = path
+        self.writable = writable
+        self._file = None
+        self._mm: Optional[mmap.mmap] = None
+        self._view: Optional[memoryview] = None
+        self._inode = None
+        self.capacity = 0
+        if writable and not os.path.exists(path):
+            self._create(path, capacity)
+        self._open()
+
+    @staticmethod
+    def _create(path: str, capacity: int) -> None:
+        with open(path, "wb") as f:
+            f.write(_HEADER.pack(MAGIC, VERSION, capacity, 0))
+            f.truncate(_HEADER.size + capacity * _SLOT.size)
+
+    def _open(self) -> None:
+        self._close_map()
+        if not os.path.exists(self.path):
+            return
+        self._file = open(self.path, "r+b" if self.writable else "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_WRITE if self.writable else mmap.ACCESS_READ)
+        magic, version, self.capacity, _ = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{self.path} is not a version {VERSION} article store index")
+        self._view = memoryview(self._mm)
+        self._inode = os.fstat(self._file.fileno()).st_ino
+
+    def _close_map(self) -> None:
+        if self._view is not None:
+            self._view.release()
+            self._view = None
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __len__(self) -> int:
+        return _HEADER.unpack_from(self._mm, 0)[3] if self._mm is not None else 0
+
+    def _probe(self, key: bytes) -> Tuple[int, bool]:
+        # Returns the slot position holding key, or the empty slot where it would go.
+        view, capacity = self._view, self.capacity
+        slot = int.from_bytes(key[:8], "little") % capacity
+        for _ in range(capacity):
+            position = _HEADER.size + slot * _SLOT.size
+            current = view[position:position + 16]
+            if current == key:
+                return position, True
+            if current == _EMPTY_KEY:
+                return position, False
+            slot = (slot + 1) % capacity
+        raise RuntimeError("article store index is full")
+
+    def get(self, key: bytes) -> Optional[StoredRef]:
+        for attempt in range(2):
+            if self._mm is not None:
+                position, found = self._probe(key)
+                if found:
+                    return StoredRef(*_SLOT.unpack_from(self._mm, position)[1:])
+            if attempt == 0 and not self.writable and not self._reopen_if_replaced():
+                return None
+        return None
+
+    def _reopen_if_replaced(self) -> bool:
+        try:
+            inode = os.stat(self.path).st_ino
+        except FileNotFoundError:
+            return False
+        if inode == self._inode:
+            return False
+        self._open()
+        return True
+
+    def put(self, key: bytes, ref: StoredRef) -> None:
+        if (len(self) + 1) > self.capacity * MAX_LOAD:
+            self._grow()
+        position, found = self._probe(key)
+        # Value before key, so a concurrent reader that sees the key also sees its value.
+        _SLOT.pack_into(self._mm, position, _EMPTY_KEY if not found else key, *ref)
+        self._mm[position:position + 16] = key
+        if not found:
+            struct.pack_into("<Q", self._mm, 16, len(self) + 1)
+
+    def items(self) -> List[Tuple[bytes, StoredRef]]:
+        entries = []
+        for slot in range(self.capacity):
+            position = _HEADER.size + slot * _SLOT.size
+            key, *ref = _SLOT.unpack_from(self._mm, position)
+            if key != _EMPTY_KEY:
+                entries.append((key, StoredRef(*ref)))
+        return entries
+
+    def _grow(self) -> None:
+        entries = self.items()
+        tmp_path = f"{self.path}.tmp"
+        self._create(tmp_path, self.capacity * 2)
+        grown = MmapHashTable(tmp_path, writable=True)
+        for key, ref in entries:
+            grown.put(key, ref)
+        grown.close()
+        self._close_map()
+        os.replace(tmp_path, self.path)
+        self._open()
+
+    def close(self) -> None:
+        if self._mm is not None and self.writable:
+            self._mm.flush()
+        self._close_map()
+
+class ArticleStore:
+    """
+    Persistent store of article Markdown keyed by (mevzuat_id, madde_id).
+    Bodies are buffered into blocks of about block_size bytes before being compressed and appended;
+    the last blocks read are kept decompressed in a small LRU, since articles of one legislation are
+    usually stored (and read) together. get and put are not thread-safe; from async code use
+    get_async and add_article, which run them on the store's own thread.
+    """
+    def __init__(self, directory: str, codec: str = "zlib", block_size: int = 64 * 1024, level: int = 6,
+                 train_after: int = 200, dictionary_size: int = 32 * 1024, block_cache: int = 16):
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        self.directory = directory
+        if codec == "zstd" and zstandard is None:
+            logger.warning("zstandard is not installed; the article store uses zlib.")
+            codec = "zlib"
+        self.codec = CODEC_ZSTD if codec == "zstd" else CODEC_ZLIB
+        self.block_size = block_size
+        self.level = level
+        self.train_after = train_after
+        self.dictionary_size = dictionary_size
+        self._lock_file = open(os.path.join(directory, "store.lock"), "a+b")
+        self.writable = self._try_lock()
+        self._blocks_path = os.path.join(directory, "blocks.dat")
+        if self.writable and not os.path.exists(self._blocks_path):
+            open(self._blocks_path, "wb").close()
+        self._blocks = open(self._blocks_path, "r+b" if self.writable else "rb") if os.path.exists(self._blocks_path) else None
+        self._keys = MmapHashTable(os.path.join(directory, "keys.idx"), self.writable)
+        self._contents = MmapHashTable(os.path.join(directory, "contents.idx"), self.writable)
+        self._dictionary_path = os.path.join(directory, "dictionary.bin")
+        self._dictionary: Optional[bytes] = None
+        if os.path.exists(self._dictionary_path):
+            with open(self._dictionary_path, "rb") as f:
+                self._dictionary = f.read()
+        self._samples: List[bytes] = []
+        self._pending: List[bytes] = []
+        self._pending_size = 0
+        # key or content digest -> (offset, length) inside the pending block
+        self._pending_refs: Dict[bytes, Tuple[int, int]] = {}
+        self._pending_keys: List[Tuple[bytes, bytes]] = []
+        self._block_cache: "OrderedDict[int, bytes]" = OrderedDict()
+        self._block_cache_size = block_cache
+        self._stats: Dict[str, int] = {"hits": 0, "misses": 0, "stored": 0, "deduplicated": 0, "raw_bytes": 0, "blocks_written": 0, "block_reads": 0, "write_errors": 0}
+        # One thread owns the buffers, block cache and index maps, so they need no lock.
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="mevzuat-article-store")
+
+    @classmethod
+    def from_env(cls, cache_dir: str) -> Optional["ArticleStore"]:
+        """Opens the store under cache_dir if MEVZUAT_ARTICLE_STORE=1; MEVZUAT_STORE_CODEC selects zlib (default) or zstd."""
+        if os.environ.get("MEVZUAT_ARTICLE_STORE", "0") != "1":
+            return None
+        return cls(os.path.join(cache_dir, "article_store"), codec=os.environ.get("MEVZUAT_STORE_CODEC", "zlib"),
+                   block_size=int(os.environ.get("MEVZUAT_STORE_BLOCK_BYTES", str(64 * 1024))))
+
+    def _try_lock(self) -> bool:
+        if fcntl is None:
+            return True
+        try:
+            fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except OSError:
+            return False
+
+    def stats(self) -> Dict[str, Any]:
+        stored_bytes = os.path.getsize(self._blocks_path) if os.path.exists(self._blocks_path) else 0
+        return {
+            **self._stats, "articles": len(self._keys), "unique_bodies": len(self._contents), "stored_bytes": stored_bytes,
+            "writable": self.writable, "dictionary": self._dictionary is not None,
+        }
+
+    def get(self, mevzuat_id: str, madde_id: str, max_age: Optional[float] = None) -> Optional[str]:
+        """Returns the stored Markdown of an article, or None if it is missing or older than max_age seconds."""
+        key = article_key(mevzuat_id, madde_id)
+        pending = self._pending_refs.get(key)
+        if pending is not None:
+            self._stats["hits"] += 1
+            return b"".join(self._pending)[pending[0]:pending[0] + pending[1]].decode("utf-8")
+        ref = self._keys.get(key)
+        if ref is None or (max_age is not None and time.time() - ref.stored_at > max_age):
+            self._stats["misses"] += 1
+            return None
+        block = self._read_block(ref.block_offset, ref.block_size)
+        self._stats["hits"] += 1
+        return block[ref.offset:ref.offset + ref.length].decode("utf-8")
+
+    async def get_async(self, mevzuat_id: str, madde_id: str, max_age: Optional[float] = None) -> Optional[str]:
+        """get, run on the store's thread."""
+        return await asyncio.get_running_loop().run_in_executor(self._executor, self.get, mevzuat_id, madde_id, max_age)
+
+    def add_article(self, content: MevzuatArticleContent) -> None:
+        """Content listener: queues every freshly converted article to be stored on the store's thread."""
+        if not content.error_message and content.markdown_content:
+            self._executor.submit(self.put, content.mevzuat_id, content.madde_id, content.markdown_content).add_done_callback(self._written)
+
+    def _written(self, future: Future) -> None:
+        if future.exception() is not None:
+            self._stats["write_errors"] += 1
+            logger.warning("Storing an article failed", exc_info=future.exception())
+
+    def put(self, mevzuat_id: str, madde_id: str, markdown: str) -> None:
+        if not self.writable:
+            return
+        key, body = article_key(mevzuat_id, madde_id), markdown.encode("utf-8")
+        content_digest = _digest(body)
+        self._stats["raw_bytes"] += len(body)
+        existing = self._contents.get(content_digest)
+        if existing is not None:
+            self._keys.put(key, existing._replace(stored_at=int(time.time())))
+            self._stats["deduplicated"] += 1
+            return
+        pending = self._pending_refs.get(content_digest)
+        if pending is not None:
+            self._stats["deduplicated"] += 1
+        else:
+            pending = (self._pending_size, len(body))
+            self._pending.append(body)
+            self._pending_size += len(body)
+            self._pending_refs[content_digest] = pending
+            self._stats["stored"] += 1
+            if self._dictionary is None and len(self._samples) < self.train_after:
+                self._samples.append(body)
+        self._pending_refs[key] = pending
+        self._pending_keys.append((key, content_digest))
+        if self._pending_size >= self.block_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Compresses the pending articles into one block and indexes them."""
+        if not self._pending or not self.writable:
+            return
+        if self._dictionary is None and len(self._samples) >= self.train_after:
+            self._train_dictionary()
+        raw = b"".join(self._pending)
+        compressed = self._compress(raw)
+        self._blocks.seek(0, os.SEEK_END)
+        block_offset = self._blocks.tell()
+        header = _BLOCK_HEADER.pack(self.codec, 1 if self._dictionary is not None else 0, len(compressed), len(raw))
+        self._blocks.write(header + compressed)
+        self._blocks.flush()
+        block_size = _BLOCK_HEADER.size + len(compressed)
+        now = int(time.time())
+        for key, content_digest in self._pending_keys:
+            offset, length = self._pending_refs[content_digest]
+            ref = StoredRef(block_offset, block_size, offset, length, now)
+            self._contents.put(content_digest, ref)
+            self._keys.put(key, ref)
+        self._stats["blocks_written"] += 1
+        self._pending, self._pending_size, self._pending_refs, self._pending_keys = [], 0, {}, []
+
+    def _train_dictionary(self) -> None:
+        if self.codec == CODEC_ZSTD:
+            dictionary = zstandard.train_dictionary(self.dictionary_size, self._samples).as_bytes()
+        else:
+            # zlib has no trainer: use the most frequent lines, most frequent last (closest to the data).
+            counts = Counter(line for sample in self._samples for line in sample.splitlines(keepends=True) if len(line) > 16)
+            lines, size = [], 0
+            for line, count in counts.most_common():
+                if count < 2 or size + len(line) > min(self.dictionary_size, ZLIB_WINDOW):
+                    break
+                lines.append(line)
+                size += len(line)
+            dictionary = b"".join(reversed(lines))
+        self._samples = []
+        if not dictionary:
+            return
+        with open(self._dictionary_path, "wb") as f:
+            f.write(dictionary)
+        self._dictionary = dictionary
+
+    def _compress(self, raw: bytes) -> bytes:
+        if self.codec == CODEC_ZSTD:
+            dict_data = zstandard.ZstdCompressionDict(self._dictionary) if self._dictionary is not None else None
+            return zstandard.ZstdCompressor(level=self.level, dict_data=dict_data).compress(raw)
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, 15, **({"zdict": self._dictionary} if self._dictionary else {}))
+        return compressor.compress(raw) + compressor.flush()
+
+    def _decompress(self, codec: int, dictionary_id: int, data: bytes) -> bytes:
+        if dictionary_id and self._dictionary is None:
+            with open(self._dictionary_path, "rb") as f:
+                self._dictionary = f.read()
+        dictionary = self._dictionary if dictionary_id else None
+        if codec == CODEC_ZSTD:
+            if zstandard is None:
+                raise RuntimeError("This article store block is zstd-compressed but zstandard is not installed")
+            dict_data = zstandard.ZstdCompressionDict(dictionary) if dictionary is not None else None
+            return zstandard.ZstdDecompressor(dict_data=dict_data).decompress(data)
+        decompressor = zlib.decompressobj(15, **({"zdict": dictionary} if dictionary else {}))
+        return decompressor.decompress(data) + decompressor.flush()
+
+    def _read_block(self, block_offset: int, block_size: int) -> bytes:
+        block = self._block_cache.get(block_offset)
+        if block is not None:
+            self._block_cache.move_to_end(block_offset)
+            return block
+        if self._blocks is None:
+            self._blocks = open(self._blocks_path, "rb")
+        self._blocks.seek(block_offset)
+        data = self._blocks.read(block_size)
+        codec, dictionary_id, _, _ = _BLOCK_HEADER.unpack_from(data, 0)
+        block = self._decompress(codec, dictionary_id, data[_BLOCK_HEADER.size:])
+        self._stats["block_reads"] += 1
+        self._block_cache[block_offset] = block
+        while len(self._block_cache) > self._block_cache_size:
+            self._block_cache.popitem(last=False)
+        return block
+
+    def close(self) -> None:
+        # Writes still queued are applied before the final flush.
+        self._executor.shutdown(wait=True)
+        self.flush()
+        self._keys.close()
+        self._contents.close()
+        if self._blocks is not None:
+            self._blocks.close()
+        self._lock_file.close()
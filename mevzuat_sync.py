@@ -0,0 +1,305 @@
+# mevzuat_sync.py
+"""
+Incremental mirror of the legislation corpus into the local cache.
+Documents are discovered newest-first by registration date (KAYIT_TARIHI);
+discovery stops at the first document already seen by the previous run, so
+repeated syncs only fetch the article trees and contents of new or changed
+legislation. A discovery cut short by --max-documents leaves a backfill
+cursor, from which later runs continue down to the previous watermark.
+Progress is checkpointed to a JSON state file, so an interrupted sync
+resumes where it stopped. With --refresh, legislation
+mirrored earlier is re-validated as well: its tree is fetched again and,
+only if the tree changed (or with --deep), its articles, whose payload
+hashes decide which ones are converted again.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+
+from mevzuat_cache import default_cache_dir
+from mevzuat_client import MevzuatApiClient, MevzuatApiError, iter_article_nodes
+from mevzuat_concurrency import Priority, gather_bounded, request_priority
+from mevzuat_models import MevzuatSearchRequest, MevzuatTurEnum, SortDirectionEnum, SortFieldEnum
+
+logger = logging.getLogger(__name__)
+
+WATERMARK_SIZE = 20
+MAX_DOCUMENT_ATTEMPTS = 3
+MAX_RECORDED_RUNS = 50
+DEFAULT_MIRROR_TTL = 30 * 24 * 60 * 60
+
+class SyncState:
+    """
+    Checkpoint of a sync, persisted as JSON.
+    'watermark' holds the newest mevzuatIds seen by the last discovery,
+    'backfill' the listing gaps a capped discovery left behind (the last documents
+    queued, the position of the last one in the listing and the watermark the gap ends at),
+    'pending' the documents still to mirror with the articles already done.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self.watermark: List[str] = []
+        self.backfill: List[Dict[str, Any]] = []
+        self.pending: Dict[str, Dict[str, Any]] = {}
+        self.runs: List[Dict[str, Any]] = []
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            self.watermark = data.get("watermark", [])
+            self.backfill = data.get("backfill", [])
+            self.pending = data.get("pending", {})
+            self.runs = data.get("runs", [])
+
+    def reset(self) -> None:
+        """Forgets discovery progress and pending documents, so the next run mirrors from scratch; run history is kept."""
+        self.watermark, self.backfill, self.pending = [], [], {}
+
+    def save(self) -> None:
+        directory = os.path.dirname(os.path.abspath(self.path))
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"watermark": self.watermark, "backfill": self.backfill, "pending": self.pending, "runs": self.runs[-MAX_RECORDED_RUNS:]}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+class MevzuatSync:
+    """Discovers new or changed legislation and mirrors their article trees and contents into the client's cache."""
+    def __init__(self, client: MevzuatApiClient, state: SyncState, concurrency: int = 8, document_concurrency: int = 4,
+                 mevzuat_turleri: Optional[List[MevzuatTurEnum]] = None, max_documents: Optional[int] = None,
+                 refresh: bool = False, deep: bool = False):
+        self.client = client
+        self.state = state
+        self.concurrency = concurrency
+        self.document_concurrency = document_concurrency
+        self.mevzuat_turleri = mevzuat_turleri or [tur for tur in MevzuatTurEnum]
+        self.max_documents = max_documents
+        self.refresh = refresh
+        self.deep = deep
+        self._article_semaphore = asyncio.Semaphore(concurrency)
+        self._counts = {"documents": 0, "articles": 0, "failed_articles": 0, "failed_documents": 0, "abandoned_documents": 0}
+        self._mirrored: Set[str] = set()
+
+    def _queue(self, mevzuat_id: str) -> None:
+        self.state.pending.setdefault(mevzuat_id, {"attempts": 0, "done": []})
+
+    async def _discover_segment(self, stop_at: Set[str], limit: Optional[int], resume_after: Optional[List[str]] = None,
+                                position: int = 0, newest: Optional[List[str]] = None) -> Tuple[int, Optional[Dict[str, Any]]]:
+        """
+        Queues documents of the listing until one in stop_at, starting after the documents of resume_after
+        (found near position) or at the top.
+        Returns how many were queued and, if limit cut the segment short, the backfill cursor to continue from.
+        """
+        page_size = 50
+        # Documents registered since the cursor was saved push it down; start a page early and scan forward to it.
+        start_page = max(1, position // page_size) if resume_after is not None else 1
+        request = MevzuatSearchRequest(
+            mevzuat_tur_list=self.mevzuat_turleri, page_size=page_size, page_number=start_page,
+            sort_field=SortFieldEnum.KAYIT_TARIHI, sort_direction=SortDirectionEnum.DESC
+        )
+        located = resume_after is None
+        skip = set(resume_after or ())
+        recent: Deque[str] = deque(maxlen=WATERMARK_SIZE)
+        found = 0
+        index = (start_page - 1) * page_size - 1
+        async for document in self.client.iter_search_documents(request, refresh=True):
+            index += 1
+            if document.mevzuat_id in skip:
+                # Any of the last documents queued locates the cursor, so withdrawing one does not lose it.
+                located = True
+                continue
+            if not located:
+                if document.mevzuat_id in stop_at:
+                    # The cursor was not found before the end of the gap: it moved further than expected, or was withdrawn.
+                    break
+                continue
+            if document.mevzuat_id in stop_at:
+                return found, None
+            if newest is not None and len(newest) < WATERMARK_SIZE:
+                newest.append(document.mevzuat_id)
+            self._queue(document.mevzuat_id)
+            recent.append(document.mevzuat_id)
+            found += 1
+            if found % 50 == 0:
+                self.state.save()
+            if limit is not None and found >= limit:
+                return found, {"resume_after": list(recent), "position": index, "stop_at": sorted(stop_at)}
+        if located:
+            return found, None
+        if start_page > 1:
+            return await self._discover_segment(stop_at, limit, resume_after, 0)
+        # The cursor document is gone from the listing; queue the whole gap again rather than lose it.
+        logger.warning(f"Backfill cursor {resume_after[-1]} is no longer listed; rediscovering the gap from the top")
+        return await self._discover_segment(stop_at, limit)
+
+    async def discover(self) -> int:
+        """
+        Queues every document registered since the previous discovery, then continues earlier backfills
+        with what is left of max_documents; returns how many were found.
+        """
+        newest: List[str] = []
+        found, gap = await self._discover_segment(set(self.state.watermark), self.max_documents, newest=newest)
+        # Every newly registered document moves the older gaps one position down the listing.
+        shift = found
+        backfill = []
+        for cursor in self.state.backfill:
+            remaining = None if self.max_documents is None else self.max_documents - found
+            if remaining is not None and remaining <= 0:
+                backfill.append({**cursor, "position": cursor["position"] + shift})
+                continue
+            queued, rest = await self._discover_segment(set(cursor["stop_at"]), remaining, cursor["resume_after"], cursor["position"] + shift)
+            found += queued
+            if rest is not None:
+                backfill.append(rest)
+        # A capped discovery leaves the gap between its last document and the previous watermark for later runs.
+        self.state.backfill = ([gap] if gap is not None else []) + backfill
+        # Keep the previous watermark entries too, in case the newest documents are withdrawn upstream.
+        self.state.watermark = (newest + self.state.watermark)[:WATERMARK_SIZE]
+        self.state.save()
+        return found
+
+    async def _mirror_article(self, mevzuat_id: str, madde_id: str, done: List[str]) -> bool:
+        async with self._article_semaphore:
+            content = await self.client.get_article_content(madde_id, mevzuat_id, refresh=True)
+        if content.error_message:
+            self._counts["failed_articles"] += 1
+            logger.warning(f"Article {madde_id} of {mevzuat_id} failed: {content.error_message}")
+            return False
+        done.append(madde_id)
+        self._counts["articles"] += 1
+        if self._counts["articles"] % 50 == 0:
+            self.state.save()
+        return True
+
+    async def _mirror_document(self, mevzuat_id: str) -> None:
+        entry = self.state.pending[mevzuat_id]
+        entry["attempts"] += 1
+        self._mirrored.add(mevzuat_id)
+        tree = await self.client.get_article_tree(mevzuat_id, refresh=True)
+        if not tree:
+            self._counts["failed_documents"] += 1
+            if entry["attempts"] < MAX_DOCUMENT_ATTEMPTS:
+                logger.warning(f"Article tree of {mevzuat_id} is empty or failed (attempt {entry['attempts']}); will retry next run")
+            else:
+                self._counts["abandoned_documents"] += 1
+                logger.error(f"Article tree of {mevzuat_id} is still empty or failing after {entry['attempts']} attempts; giving up")
+                del self.state.pending[mevzuat_id]
+            self.state.save()
+            return
+        done = entry["done"]
+        already_done = set(done)
+        leaves = [node.madde_id for node, _ in iter_article_nodes(tree) if not node.children and node.madde_id not in already_done]
+        results = await asyncio.gather(*(self._mirror_article(mevzuat_id, madde_id, done) for madde_id in leaves))
+        if all(results):
+            del self.state.pending[mevzuat_id]
+            self._counts["documents"] += 1
+        else:
+            self._counts["failed_documents"] += 1
+        self.state.save()
+
+    async def _refresh_document(self, mevzuat_id: str) -> None:
+        tracker = self.client.change_tracker
+        previous_hash = tracker.tree_hash(mevzuat_id)
+        flat = await self.client.get_flat_tree(mevzuat_id, refresh=True)
+        if flat is None:
+            self._counts["failed_documents"] += 1
+            logger.warning(f"Article tree of {mevzuat_id} could not be refreshed")
+            return
+        self._counts["refreshed_documents"] += 1
+        if tracker.tree_hash(mevzuat_id) == previous_hash and not self.deep:
+            self._counts["unchanged_documents"] += 1
+            return
+        leaves = [flat.madde_ids[index] for index in flat.leaf_indexes()]
+        await asyncio.gather(*(self._mirror_article(mevzuat_id, madde_id, []) for madde_id in leaves))
+
+    async def refresh_known(self) -> None:
+        """Re-validates every legislation fetched before and not mirrored in this run, least recently checked first."""
+        self._counts.update({"refreshed_documents": 0, "unchanged_documents": 0})
+        await asyncio.to_thread(self.client.change_tracker.flush)
+        documents = [mevzuat_id for mevzuat_id in self.client.change_tracker.tracked_documents() if mevzuat_id not in self._mirrored]
+        await gather_bounded([lambda mevzuat_id=mevzuat_id: self._refresh_document(mevzuat_id) for mevzuat_id in documents], self.document_concurrency)
+
+    async def run(self) -> Dict[str, Any]:
+        """Runs discovery and mirrors all pending documents, recording the throughput of the run."""
+        started = time.time()
+        resumed = len(self.state.pending)
+        changes_before = self.client.change_tracker.stats() if self.client.change_tracker is not None else None
+        try:
+            discovered = await self.discover()
+        except MevzuatApiError as e:
+            logger.error(f"Discovery failed, mirroring only previously pending documents: {e}")
+            discovered = 0
+        logger.info(f"Discovered {discovered} new or changed documents, {resumed} pending from earlier runs")
+        await gather_bounded([lambda mevzuat_id=mevzuat_id: self._mirror_document(mevzuat_id) for mevzuat_id in list(self.state.pending)], self.document_concurrency)
+        if self.refresh:
+            await self.refresh_known()
+        if changes_before is not None:
+            await asyncio.to_thread(self.client.change_tracker.flush)
+            changes_after = self.client.change_tracker.stats()
+            self._counts["changes_detected"] = changes_after["changes"] - changes_before["changes"]
+        elapsed = max(time.time() - started, 1e-9)
+        run = {
+            "started_at": started, "elapsed_seconds": round(elapsed, 3), "discovered": discovered, "resumed": resumed,
+            **self._counts, "pending": len(self.state.pending), "backfill": len(self.state.backfill),
+            "docs_per_s": round(self._counts["documents"] / elapsed, 3),
+            "articles_per_s": round(self._counts["articles"] / elapsed, 3),
+        }
+        self.state.runs.append(run)
+        self.state.save()
+        return run
+
+async def _main_async(args: argparse.Namespace) -> Dict[str, Any]:
+    client = MevzuatApiClient.from_env()
+    if client.cache is None or client.cache.persistent is None:
+        await client.close()
+        raise SystemExit("The sync mirrors into the persistent cache; unset MEVZUAT_CACHE=0 / MEVZUAT_CACHE_PERSISTENT=0.")
+    if args.refresh and client.change_tracker is None:
+        await client.close()
+        raise SystemExit("--refresh needs change tracking; unset MEVZUAT_CHANGE_TRACKING=0.")
+    # Mirrored entries are written with a long TTL so servers keep serving them between syncs.
+    client.cache.ttls.update({"mevzuatMaddeTree": args.mirror_ttl, "getDocumentContent": args.mirror_ttl})
+    state = SyncState(args.state)
+    if args.reset:
+        state.reset()
+    turler = [MevzuatTurEnum(tur.strip()) for tur in args.tur.split(",")] if args.tur else None
+    sync = MevzuatSync(client, state, concurrency=args.concurrency, document_concurrency=args.document_concurrency,
+                       mevzuat_turleri=turler, max_documents=args.max_documents, refresh=args.refresh, deep=args.deep)
+    try:
+        with request_priority(Priority.BACKGROUND):
+            return await sync.run()
+    finally:
+        await client.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Incrementally mirror Turkish legislation from bedesten.adalet.gov.tr into the local cache.")
+    parser.add_argument("--state", default=os.path.join(default_cache_dir(), "sync_state.json"), help="Checkpoint file used to resume and to detect new documents.")
+    parser.add_argument("--tur", default=None, help="Comma separated legislation types to mirror, e.g. 'KANUN,CB_KARARNAME'. Defaults to all types.")
+    parser.add_argument("--max-documents", type=int, default=None, help="Stop discovery after this many documents (useful for the first run).")
+    parser.add_argument("--concurrency", type=int, default=8, help="Maximum concurrent article downloads.")
+    parser.add_argument("--document-concurrency", type=int, default=4, help="Maximum documents mirrored at the same time.")
+    parser.add_argument("--mirror-ttl", type=float, default=DEFAULT_MIRROR_TTL, help="Cache TTL in seconds for mirrored trees and articles.")
+    parser.add_argument("--reset", action="store_true", help="Forget the checkpoint and mirror from scratch.")
+    parser.add_argument("--refresh", action="store_true", help="Also re-validate legislation mirrored earlier; only changed articles are converted again.")
+    parser.add_argument("--deep", action="store_true", help="With --refresh, re-check every article even when its legislation's tree is unchanged.")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    run = asyncio.run(_main_async(args))
+    logger.info(
+        f"Sync finished in {run['elapsed_seconds']}s: {run['documents']} documents ({run['docs_per_s']} docs/s), "
+        f"{run['articles']} articles ({run['articles_per_s']} articles/s), {run['failed_articles']} failed articles, "
+        f"{run['failed_documents']} failed documents ({run['abandoned_documents']} given up), {run['pending']} still pending, "
+        f"{run['backfill']} backfill gaps, {run.get('changes_detected', 0)} changes detected"
+    )
+    # Documents given up on are lost from the mirror; let schedulers notice.
+    if run["abandoned_documents"]:
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,11 @@
+# mevzuat_text.py
+"""
+Text normalization shared by the local indexes and article tree lookups.
+"""
+
+_TURKISH_UPPER = str.maketrans({"İ": "i", "I": "ı"})
+_DIACRITICS = str.maketrans({"ı": "i", "ş": "s", "ğ": "g", "ç": "c", "ö": "o", "ü": "u", "â": "a", "î": "i", "û": "u"})
+
+def fold_turkish(text: str) -> str:
+    """Lower-cases text with Turkish rules (İ→i, I→ı) and strips diacritics (ı→i, ş→s, ğ→g, ...)."""
+    return text.translate(_TURKISH_UPPER).lower().translate(_DIACRITICS)
@@ -0,0 +1,73 @@
+# mevzuat_trace.py
+"""
+Recording of tool-call traces for load replay.
+With MEVZUAT_TRACE_FILE set, every tool call is appended to that file as one
+JSON line: time, session, tool, arguments, latency and outcome. Consecutive
+calls of a session (search -> tree -> content ...) can then be replayed at
+higher concurrency by benchmarks/load_replay.py.
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import pydantic_core
+
+logger = logging.getLogger(__name__)
+
+def _session_id() -> str:
+    # HTTP transports carry an MCP session id; a stdio server serves one session per process.
+    try:
+        from fastmcp.server.dependencies import get_context
+        session = get_context().session_id
+    except Exception:
+        session = None
+    return session or f"pid-{os.getpid()}"
+
+class TraceRecorder:
+    """Appends one JSON line per tool call to a trace file; safe to share between threads and processes."""
+    def __init__(self, path: str):
+        directory = os.path.dirname(os.path.abspath(path))
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        self.path = path
+        self._lock = threading.Lock()
+        # O_APPEND keeps lines of concurrent worker processes from interleaving.
+        self._fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        self.recorded = 0
+
+    @classmethod
+    def from_env(cls) -> Optional["TraceRecorder"]:
+        path = os.environ.get("MEVZUAT_TRACE_FILE")
+        if not path:
+            return None
+        logger.info("Recording tool calls to %s", path)
+        return cls(path)
+
+    def record(self, tool: str, arguments: Dict[str, Any], latency: float, ok: bool) -> None:
+        entry = {
+            "ts": round(time.time(), 6), "session": _session_id(), "tool": tool, "arguments": arguments,
+            "latency_ms": round(latency * 1000, 3), "ok": ok,
+        }
+        try:
+            line = pydantic_core.to_json(entry, fallback=str) + b"\n"
+            with self._lock:
+                os.write(self._fd, line)
+                self.recorded += 1
+        except Exception:
+            logger.debug("Could not record trace entry for %s", tool, exc_info=True)
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+_UNSET = object()
+_recorder: Any = _UNSET
+
+def get_recorder() -> Optional[TraceRecorder]:
+    """The process-wide recorder configured by MEVZUAT_TRACE_FILE, or None."""
+    global _recorder
+    if _recorder is _UNSET:
+        _recorder = TraceRecorder.from_env()
+    return _recorder
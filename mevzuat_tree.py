@@ -0,0 +1,190 @@
+# mevzuat_tree.py
+"""
+Compact, indexed representation of a legislation's article tree.
+The raw tree returned by mevzuatMaddeTree is flattened into parallel arrays in
+document order, with parent indexes and subtree ends, so nodes can be looked
+up by article number or sliced by subtree without building (or validating) a
+recursive pydantic tree.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+from pydantic import TypeAdapter
+
+from mevzuat_models import MaddeKindEnum, MevzuatArticleNode, MevzuatArticleTreePage
+from mevzuat_text import fold_turkish
+
+_NODE_LIST = TypeAdapter(List[MevzuatArticleNode])
+
+# Node fields that can be projected into a tree page; madde_id is always included.
+TREE_FIELDS = ("madde_no", "title", "description", "mevzuat_id")
+
+def article_kind(title: str) -> MaddeKindEnum:
+    """Classifies an article title as a regular, additional (EK MADDE) or provisional (GEÇİCİ MADDE) article."""
+    if not title or title.lstrip()[:1] not in "EeGg":
+        return MaddeKindEnum.MADDE
+    folded = " ".join(fold_turkish(title).split())
+    if folded.startswith("gecici madde"):
+        return MaddeKindEnum.GECICI_MADDE
+    if folded.startswith("ek madde"):
+        return MaddeKindEnum.EK_MADDE
+    return MaddeKindEnum.MADDE
+
+class FlatArticleTree:
+    """
+    Article tree stored as parallel arrays in document (pre-order) order.
+    parents[i] is the index of node i's parent (-1 for top-level nodes) and
+    ends[i] is one past the last index of node i's subtree, so node i is a
+    leaf exactly when ends[i] == i + 1.
+    """
+    __slots__ = ("mevzuat_id", "madde_ids", "madde_nos", "titles", "descriptions", "parents", "depths", "ends", "_raw", "_nodes", "_by_number", "_by_id")
+
+    def __init__(self, mevzuat_id: str):
+        self.mevzuat_id = mevzuat_id
+        self.madde_ids: List[str] = []
+        self.madde_nos: List[Optional[int]] = []
+        self.titles: List[str] = []
+        self.descriptions: List[Optional[str]] = []
+        self.parents: List[int] = []
+        self.depths: List[int] = []
+        self.ends: List[int] = []
+        self._raw: List[Dict[str, Any]] = []
+        self._nodes: Optional[List[MevzuatArticleNode]] = None
+        self._by_number: Dict[Tuple[MaddeKindEnum, int], int] = {}
+        self._by_id: Dict[str, int] = {}
+
+    @classmethod
+    def from_raw(cls, mevzuat_id: str, children: List[Dict[str, Any]]) -> "FlatArticleTree":
+        """Builds the flat tree from the raw 'children' list of a mevzuatMaddeTree response."""
+        tree = cls(mevzuat_id)
+        # Iterative pre-order walk; each stack entry is (node, parent index, depth).
+        stack: List[Tuple[Dict[str, Any], int, int]] = [(child, -1, 0) for child in reversed(children)]
+        while stack:
+            node, parent, depth = stack.pop()
+            index = len(tree.madde_ids)
+            tree.madde_ids.append(str(node.get("maddeId")))
+            madde_no = node.get("maddeNo")
+            tree.madde_nos.append(int(madde_no) if madde_no is not None else None)
+            tree.titles.append(node.get("title") or "")
+            tree.descriptions.append(str(node["description"]) if node.get("description") is not None else None)
+            tree.parents.append(parent)
+            tree.depths.append(depth)
+            tree.ends.append(index + 1)
+            tree._raw.append(node)
+            stack.extend((child, index, depth + 1) for child in reversed(node.get("children") or []))
+        # Every node's subtree ends where its last descendant's does; walk backwards to propagate.
+        for index in range(len(tree.parents) - 1, -1, -1):
+            parent = tree.parents[index]
+            if parent >= 0 and tree.ends[index] > tree.ends[parent]:
+                tree.ends[parent] = tree.ends[index]
+        for index, madde_id in enumerate(tree.madde_ids):
+            tree._by_id.setdefault(madde_id, index)
+            if tree.is_leaf(index) and tree.madde_nos[index] is not None:
+                tree._by_number.setdefault((article_kind(tree.titles[index]), tree.madde_nos[index]), index)
+        return tree
+
+    def __len__(self) -> int:
+        return len(self.madde_ids)
+
+    def is_leaf(self, index: int) -> bool:
+        return self.ends[index] == index + 1
+
+    def leaf_indexes(self) -> List[int]:
+        return [index for index in range(len(self)) if self.ends[index] == index + 1]
+
+    def index_of(self, madde_id: str) -> Optional[int]:
+        return self._by_id.get(madde_id)
+
+    def find_article(self, madde_no: int, kind: MaddeKindEnum = MaddeKindEnum.MADDE) -> Optional[int]:
+        """Returns the index of the article with the given number and kind, or None."""
+        return self._by_number.get((kind, madde_no))
+
+    def numbered_articles(self) -> List[Tuple[MaddeKindEnum, int, int]]:
+        """(kind, article number, index) of every numbered article."""
+        return [(kind, number, index) for (kind, number), index in self._by_number.items()]
+
+    def article_numbers(self, kind: MaddeKindEnum = MaddeKindEnum.MADDE) -> List[int]:
+        return sorted(number for article_kind_, number in self._by_number if article_kind_ == kind)
+
+    def child_indexes(self, index: int) -> List[int]:
+        """Indexes of the direct children of node index (-1 for the top level), in document order."""
+        position, end = (0, len(self)) if index < 0 else (index + 1, self.ends[index])
+        children = []
+        while position < end:
+            children.append(position)
+            position = self.ends[position]
+        return children
+
+    def _project(self, index: int, fields: Tuple[str, ...]) -> Dict[str, Any]:
+        node: Dict[str, Any] = {"madde_id": self.madde_ids[index]}
+        for field in fields:
+            if field == "madde_no":
+                node[field] = self.madde_nos[index]
+            elif field == "title":
+                node[field] = self.titles[index]
+            elif field == "description":
+                node[field] = self.descriptions[index]
+            elif field == "mevzuat_id":
+                node[field] = self._raw[index].get("mevzuatId", self.mevzuat_id)
+        return node
+
+    def page(self, subtree_root: Optional[str] = None, max_depth: Optional[int] = None, fields: Optional[List[str]] = None,
+             offset: int = 0, limit: Optional[int] = None) -> MevzuatArticleTreePage:
+        """
+        Returns children [offset, offset + limit) of subtree_root (or of the top level), each expanded
+        max_depth levels deep (1 = only the listed nodes) with only the given fields. Nodes whose
+        children are cut off report 'child_count' so callers can drill down with subtree_root.
+        Raises KeyError for an unknown subtree_root and ValueError for an unknown field.
+        """
+        selected = tuple(TREE_FIELDS if fields is None else fields)
+        unknown = [field for field in selected if field not in TREE_FIELDS and field != "madde_id"]
+        if unknown:
+            raise ValueError(f"Unknown tree fields {unknown}; choose from {list(TREE_FIELDS)}")
+        root = -1
+        if subtree_root is not None:
+            root = self.index_of(subtree_root)
+            if root is None:
+                raise KeyError(subtree_root)
+        children = self.child_indexes(root)
+        listed = children[offset:offset + limit] if limit is not None else children[offset:]
+        nodes: List[Dict[str, Any]] = []
+        for top in listed:
+            # Pre-order walk of the subtree, skipping (via ends) everything below the depth limit.
+            deepest = self.depths[top] + max_depth - 1 if max_depth is not None else None
+            built: Dict[int, Dict[str, Any]] = {}
+            position = top
+            while position < self.ends[top]:
+                node = self._project(position, selected)
+                built[position] = node
+                if position == top:
+                    nodes.append(node)
+                else:
+                    built[self.parents[position]].setdefault("children", []).append(node)
+                if not self.is_leaf(position) and deepest is not None and self.depths[position] >= deepest:
+                    node["child_count"] = len(self.child_indexes(position))
+                    position = self.ends[position]
+                else:
+                    position += 1
+        return MevzuatArticleTreePage(
+            mevzuat_id=self.mevzuat_id, subtree_root=subtree_root, nodes=nodes, offset=offset,
+            total_children=len(children), has_more=offset + len(listed) < len(children)
+        )
+
+    def path(self, index: int) -> List[str]:
+        """Titles of the sections containing node index, outermost first."""
+        titles = []
+        parent = self.parents[index]
+        while parent >= 0:
+            titles.append(self.titles[parent])
+            parent = self.parents[parent]
+        return titles[::-1]
+
+    def to_nodes(self) -> List[MevzuatArticleNode]:
+        """
+        Returns the MevzuatArticleNode trees of the legislation. Whole top-level subtrees are validated
+        from the raw response in one pydantic-core call; the result is built once and reused, so callers
+        must not modify the returned nodes.
+        """
+        if self._nodes is None:
+            self._nodes = _NODE_LIST.validate_python([self._raw[index] for index in range(len(self)) if self.parents[index] < 0])
+        return self._nodes
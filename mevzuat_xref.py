@@ -0,0 +1,177 @@
+# mevzuat_xref.py
+"""
+Cross-reference graph between legislation and articles.
+Every article converted by the client is scanned for citations (see
+mevzuat_citations.parse_citations), including references to its own
+legislation ("bu Kanunun 17 nci maddesi"), and its outgoing edges are
+replaced in an SQLite adjacency table. The graph grows as articles are
+fetched or mirrored by the sync, and answers inbound ("who cites İş Kanunu
+madde 17") and outbound queries from its indexes, without any request. Articles
+are parsed and their edges written by a writer thread, many articles per
+transaction. Cited numbers are resolved to mevzuat_ids when the graph is queried,
+so a citation also resolves to legislation the citation index learns about later.
+"""
+
+import logging
+import os
+import sqlite3
+import time
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+from mevzuat_citations import CitationIndex, parse_citations
+from mevzuat_models import MaddeKindEnum, MevzuatArticleContent, MevzuatReference, MevzuatTurEnum
+from mevzuat_sqlite import SQLiteWriter, connect
+
+if TYPE_CHECKING:
+    from mevzuat_client import MevzuatApiClient
+
+logger = logging.getLogger(__name__)
+
+_COLUMNS = "source_mevzuat_id, source_madde_id, target_mevzuat_no, target_mevzuat_tur, target_mevzuat_id, target_madde_no, target_kind, citation"
+
+def _reference(row: Tuple) -> MevzuatReference:
+    return MevzuatReference(
+        source_mevzuat_id=row[0], source_madde_id=row[1], target_mevzuat_no=row[2], target_mevzuat_tur=row[3],
+        target_mevzuat_id=row[4], target_madde_no=row[5], target_kind=row[6], citation=row[7]
+    )
+
+class ReferenceGraph:
+    """SQLite adjacency table of citing articles and the legislation and articles they cite."""
+    def __init__(self, path: str):
+        self.path = path
+        # Resolves cited numbers to mevzuat_ids at query time; set by attach().
+        self.citation_index: Optional[CitationIndex] = None
+        self._conn = connect(path)
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS refs ("
+            "source_mevzuat_id TEXT NOT NULL, source_madde_id TEXT NOT NULL, target_mevzuat_no INTEGER, target_mevzuat_tur TEXT, "
+            "target_mevzuat_id TEXT, target_madde_no INTEGER, target_kind TEXT NOT NULL, citation TEXT NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS refs_source ON refs (source_madde_id);"
+            "CREATE INDEX IF NOT EXISTS refs_source_mevzuat ON refs (source_mevzuat_id);"
+            "CREATE INDEX IF NOT EXISTS refs_target_no ON refs (target_mevzuat_no, target_madde_no);"
+            "CREATE INDEX IF NOT EXISTS refs_target_id ON refs (target_mevzuat_id, target_madde_no);"
+            "CREATE TABLE IF NOT EXISTS scanned (madde_id TEXT PRIMARY KEY, scanned_at REAL NOT NULL);"
+        )
+        self._stats = {"articles_scanned": 0, "references_extracted": 0}
+        self._writer = SQLiteWriter(path, "xref")
+
+    @classmethod
+    def from_env(cls, cache_dir: str) -> Optional["ReferenceGraph"]:
+        """Opens the graph under cache_dir unless MEVZUAT_XREF=0."""
+        if os.environ.get("MEVZUAT_XREF", "1") == "0":
+            return None
+        return cls(os.path.join(cache_dir, "xref.sqlite3"))
+
+    def attach(self, client: "MevzuatApiClient") -> "ReferenceGraph":
+        self.citation_index = client.citation_index
+        client.add_content_listener(self.add_article)
+        return self
+
+    def add_article(self, content: MevzuatArticleContent) -> None:
+        """Content listener: replaces the outgoing references of an article with those found in its Markdown."""
+        if content.error_message:
+            return
+        scanned_at = time.time()
+        def write(conn: sqlite3.Connection) -> None:
+            rows = self._rows(content)
+            conn.execute("DELETE FROM refs WHERE source_madde_id = ?", (content.madde_id,))
+            conn.executemany(f"INSERT INTO refs ({_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            conn.execute("INSERT OR REPLACE INTO scanned VALUES (?, ?)", (content.madde_id, scanned_at))
+            self._stats["references_extracted"] += len(rows)
+        self._writer.submit(write)
+        self._stats["articles_scanned"] += 1
+
+    @staticmethod
+    def _rows(content: MevzuatArticleContent) -> List[Tuple]:
+        """Edges of an article; only references to its own legislation carry a target_mevzuat_id."""
+        rows = []
+        for citation in parse_citations(content.markdown_content, self_references=True):
+            rows.append((
+                content.mevzuat_id, content.madde_id, citation.mevzuat_no, citation.tur.value if citation.tur is not None else None,
+                content.mevzuat_id if citation.mevzuat_no is None else None, citation.madde_no, citation.kind.value, citation.text
+            ))
+        # An article citing the same provision twice keeps a single edge.
+        return ReferenceGraph._dedupe(rows)
+
+    @staticmethod
+    def _dedupe(rows: List[Tuple]) -> List[Tuple]:
+        seen = set()
+        unique = []
+        for row in rows:
+            if row[2:7] not in seen:
+                seen.add(row[2:7])
+                unique.append(row)
+        return unique
+
+    def outbound(self, mevzuat_id: str, madde_id: Optional[str] = None, limit: int = 100) -> List[MevzuatReference]:
+        """References made by one article, or by every scanned article of a legislation."""
+        if madde_id is not None:
+            rows = self._conn.execute(f"SELECT {_COLUMNS} FROM refs WHERE source_madde_id = ? LIMIT ?", (madde_id, limit))
+        else:
+            rows = self._conn.execute(f"SELECT {_COLUMNS} FROM refs WHERE source_mevzuat_id = ? LIMIT ?", (mevzuat_id, limit))
+        return self._resolve([_reference(row) for row in rows])
+
+    def _resolve(self, references: List[MevzuatReference]) -> List[MevzuatReference]:
+        """Fills in the target_mevzuat_id of cited numbers the citation index knows."""
+        if self.citation_index is None:
+            return references
+        for reference in references:
+            if reference.target_mevzuat_id is None and reference.target_mevzuat_no is not None:
+                found = self.citation_index.lookup_document(reference.target_mevzuat_no, reference.target_mevzuat_tur)
+                reference.target_mevzuat_id = found[0] if found is not None else None
+        return references
+
+    def inbound(self, mevzuat_id: Optional[str] = None, mevzuat_no: Optional[int] = None, mevzuat_tur: Optional[MevzuatTurEnum] = None,
+                madde_no: Optional[int] = None, kind: MaddeKindEnum = MaddeKindEnum.MADDE, limit: int = 100) -> List[MevzuatReference]:
+        """
+        References to a legislation, given by mevzuat_id and/or number, or to one of its articles with madde_no.
+        A mevzuat_id also matches citations by number once the citation index knows the legislation's number.
+        """
+        numbers: List[Tuple[int, Optional[str]]] = [(mevzuat_no, mevzuat_tur.value if mevzuat_tur is not None else None)] if mevzuat_no is not None else []
+        if mevzuat_id is not None and self.citation_index is not None:
+            numbers.extend(self.citation_index.document_numbers(mevzuat_id))
+        targets = []
+        params: List = []
+        if mevzuat_id is not None:
+            targets.append("target_mevzuat_id = ?")
+            params.append(mevzuat_id)
+        for number, tur in numbers:
+            # A citation without a type ("5237 sayılı Türk Ceza Kanunu") matches a legislation of any type.
+            targets.append("(target_mevzuat_no = ? AND (target_mevzuat_tur IS NULL OR ? IS NULL OR target_mevzuat_tur = ?))")
+            params.extend((number, tur, tur))
+        if not targets:
+            return []
+        query = f"SELECT {_COLUMNS} FROM refs WHERE ({' OR '.join(targets)})"
+        if madde_no is not None:
+            query += " AND target_madde_no = ? AND target_kind = ?"
+            params.extend((madde_no, kind.value))
+        rows = self._conn.execute(query + " LIMIT ?", (*params, limit))
+        return self._resolve([_reference(row) for row in rows])
+
+    def inbound_citation(self, citation: str, limit: int = 100) -> List[MevzuatReference]:
+        """References to the legislation or article named by a citation string; ValueError if none is recognized."""
+        parsed = parse_citations(citation)
+        if not parsed:
+            raise ValueError(f"No legislation citation was recognized in '{citation}'.")
+        target = parsed[0]
+        document = self.citation_index.lookup_document(target.mevzuat_no, target.tur) if self.citation_index is not None else None
+        return self.inbound(
+            mevzuat_id=document[0] if document is not None else None, mevzuat_no=target.mevzuat_no, mevzuat_tur=target.tur,
+            madde_no=target.madde_no, kind=target.kind, limit=limit
+        )
+
+    def flush(self) -> None:
+        """Blocks until every queued article's edges are visible to queries."""
+        self._writer.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self._stats,
+            "articles": self._conn.execute("SELECT COUNT(*) FROM scanned").fetchone()[0],
+            "references": self._conn.execute("SELECT COUNT(*) FROM refs").fetchone()[0],
+            "writer": self._writer.stats(),
+        }
+
+    def close(self) -> None:
+        self._writer.close()
+        self._conn.close()
@@ -1,13 +1,65 @@
-from fastapi import FastAPI, Request
-from fastapi.responses import StreamingResponse
-from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+# simple_mevzuat_api.py
+"""
+HTTP gateway for n8n and other webhook clients.
+Calls MevzuatApiClient directly; each worker process owns one pooled client,
+created and closed by the application lifespan. Run several workers with
+WEB_CONCURRENCY (read by uvicorn) to scale horizontally.
+"""
+
+import contextlib
+import datetime
 import json
-import asyncio
+import logging
 import os
-import sys
+from typing import List, Optional, Union
+
+from fastapi import FastAPI, HTTPException, Query
+from fastapi.responses import Response, StreamingResponse
+from fastapi.middleware.cors import CORSMiddleware
+from pydantic import BaseModel, Field
+
+from mevzuat_client import MevzuatApiClient, MevzuatApiError
+from mevzuat_json import FastJSONResponse
+from mevzuat_logging import configure_logging
+from mevzuat_metrics import watch_client
+from mevzuat_models import (
+    MevzuatSearchRequest, MevzuatSearchResult, MevzuatTurEnum, SortFieldEnum, SortDirectionEnum,
+    MevzuatArticleNode, MevzuatArticleContent, MevzuatChange, MevzuatArticleTreePage, MevzuatCitation, MevzuatReference, MaddeKindEnum
+)
+from mevzuat_citations import resolve_citations
+
+logger = logging.getLogger(__name__)
 
-app = FastAPI(title="Mevzuat MCP Server for n8n")
+_client: Optional[MevzuatApiClient] = None
+
+def get_client() -> MevzuatApiClient:
+    """Returns this worker's API client, building it from the environment on first use."""
+    global _client
+    if _client is None:
+        _client = MevzuatApiClient.from_env()
+        watch_client(_client)
+    return _client
+
+def set_client(client: MevzuatApiClient) -> None:
+    """Replaces this worker's API client, e.g. with one pointed at a local stand-in of the API."""
+    global _client
+    _client = client
+    watch_client(client)
+
+@contextlib.asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Runs once per worker process: one connection pool, cache and converter per worker.
+    global _client
+    configure_logging()
+    get_client()
+    try:
+        yield
+    finally:
+        if _client is not None:
+            client, _client = _client, None
+            await client.close()
+
+app = FastAPI(title="Mevzuat MCP Server for n8n", default_response_class=FastJSONResponse, lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -16,258 +68,214 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# MCP import - GÜVENLI YAKLAŞIM
-MCP_AVAILABLE = False
-search_mevzuat = None
-get_mevzuat_article_tree = None
-get_mevzuat_article_content = None
-
-try:
-    print("🔄 MCP Server import deneniyor...")
-    sys.path.append('.')
-    sys.path.append('/app')
-    
-    # Farklı import yöntemlerini dene
-    try:
-        from mevzuat_mcp_server import search_mevzuat, get_mevzuat_article_tree, get_mevzuat_article_content
-        print("✅ Method 1: Direct import başarılı")
-    except ImportError:
-        print("❌ Method 1: Direct import başarısız, Method 2 deneniyor...")
-        import mevzuat_mcp_server
-        search_mevzuat = mevzuat_mcp_server.search_mevzuat
-        get_mevzuat_article_tree = mevzuat_mcp_server.get_mevzuat_article_tree
-        get_mevzuat_article_content = mevzuat_mcp_server.get_mevzuat_article_content
-        print("✅ Method 2: Module import başarılı")
-    
-    # Test fonksiyonları
-    if callable(search_mevzuat):
-        MCP_AVAILABLE = True
-        print("✅ MCP Server başarıyla yüklendi - GERÇEK DATA AKTIF")
-    else:
-        raise Exception("search_mevzuat fonksiyonu callable değil")
-        
-except ImportError as e:
-    print(f"❌ MCP Server import hatası: {e}")
-    print("🔄 Fallback mode aktif")
-    MCP_AVAILABLE = False
-except Exception as e:
-    print(f"❌ MCP Server genel hatası: {e}")
-    print("🔄 Fallback mode aktif")
-    MCP_AVAILABLE = False
-
-# Fallback fonksiyonları (MCP bulunamadığında)
-if not MCP_AVAILABLE:
-    print("🔄 Fallback fonksiyonları yükleniyor...")
-    
-    async def search_mevzuat(mevzuat_adi: str = "", page_size: int = 10, **kwargs):
-        # Biraz daha gerçekçi fallback data
-        return {
-            "results": [
-                {
-                    "id": "fallback_001", 
-                    "title": f"[FALLBACK] {mevzuat_adi} - 4857 Sayılı İş Kanunu",
-                    "url": "https://mevzuat.gov.tr/MevzuatMetin/1.5.4857.pdf",
-                    "type": "kanun",
-                    "status": "fallback_mode"
-                },
-                {
-                    "id": "fallback_002",
-                    "title": f"[FALLBACK] {mevzuat_adi} - 6098 Sayılı Türk Borçlar Kanunu", 
-                    "url": "https://mevzuat.gov.tr/MevzuatMetin/1.5.6098.pdf",
-                    "type": "kanun",
-                    "status": "fallback_mode"
-                }
-            ],
-            "total_count": 2,
-            "status": "fallback_mode",
-            "note": "MCP server bulunamadı - fallback data"
-        }
-    
-    async def get_mevzuat_article_tree(mevzuat_id: str):
-        return [
-            {"id": "fallback_tree_1", "title": "Fallback - Birinci Bölüm"},
-            {"id": "fallback_tree_2", "title": "Fallback - İkinci Bölüm"}
-        ]
-    
-    async def get_mevzuat_article_content(mevzuat_id: str, madde_id: str):
-        return {
-            "content": f"Fallback content for mevzuat_id: {mevzuat_id}, madde_id: {madde_id}",
-            "status": "fallback_mode"
-        }
-
 # Request models
 class SearchRequest(BaseModel):
     query: str
-    page_size: int = 10
-    mevzuat_turleri: list = []
+    page_size: int = Field(10, ge=1, le=50)
+    mevzuat_turleri: List[MevzuatTurEnum] = []
     resmi_gazete_sayisi: str = ""
     search_in_title: bool = True
 
+class ArticleTreeRequest(BaseModel):
+    mevzuat_id: str
+
+class ArticleContentRequest(BaseModel):
+    mevzuat_id: str
+    madde_id: str
+
+def _search_request(query: str, search_in_title: bool = True, **fields) -> MevzuatSearchRequest:
+    # Title search goes through mevzuat_adi, full-text search through phrase.
+    fields = {name: value for name, value in fields.items() if value}
+    return MevzuatSearchRequest(**{"mevzuat_adi" if search_in_title else "phrase": query}, **fields)
+
+def _envelope(result: BaseModel, **extra) -> FastJSONResponse:
+    error = getattr(result, "error_message", None)
+    if error and not getattr(result, "documents", None):
+        return FastJSONResponse({"success": False, "error": error, **extra})
+    return FastJSONResponse({"success": True, "data": result, **extra})
+
 @app.get("/")
 def root():
     return {
         "message": "Mevzuat MCP Server for n8n",
         "status": "online",
-        "mcp_available": MCP_AVAILABLE,
-        "mcp_status": "REAL_DATA" if MCP_AVAILABLE else "FALLBACK_MODE",
-        "system_info": {
-            "python_path": sys.path[:3],  # İlk 3 path'i göster
-            "current_dir": os.getcwd(),
-            "files_in_dir": os.listdir(".") if os.path.exists(".") else []
-        },
         "endpoints": {
-            "search": "/search (GET)",
+            "search": "/v1/search (GET)",
+            "article_tree": "/v1/mevzuat/{mevzuat_id}/tree (GET)",
+            "article_content": "/v1/mevzuat/{mevzuat_id}/articles/{madde_id} (GET)",
+            "changes": "/v1/changes (GET)",
+            "citations": "/v1/citations?q=... (GET)",
+            "references": "/v1/references (GET)",
+            "search_stream": "/search/stream (GET, NDJSON)",
             "webhook_search": "/webhook/search (POST)",
-            "article_tree": "/webhook/article-tree (POST)",
-            "article_content": "/webhook/article-content (POST)",
-            "debug": "/debug (GET)"
+            "webhook_article_tree": "/webhook/article-tree (POST)",
+            "webhook_article_content": "/webhook/article-content (POST)",
+            "debug": "/debug (GET)",
+            "metrics": "/metrics (GET, Prometheus)"
         }
     }
 
+@app.get("/health")
+def health():
+    return {"status": "healthy"}
+
 @app.get("/debug")
 def debug_info():
-    """Debug endpoint - MCP durumunu detaylı göster"""
+    """Bu işçinin istemci, önbellek ve dönüşüm havuzu istatistikleri."""
+    return {"pid": os.getpid(), "client": get_client().stats()}
+
+@app.get("/metrics")
+def metrics():
+    """Prometheus metin formatında sunucu metrikleri (istek hangi işçiye düştüyse onun)."""
+    from mevzuat_metrics import CONTENT_TYPE, REGISTRY
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+@app.get("/v1/search", response_model=MevzuatSearchResult)
+async def search(
+    mevzuat_adi: Optional[str] = None,
+    phrase: Optional[str] = None,
+    mevzuat_no: Optional[str] = None,
+    resmi_gazete_sayisi: Optional[str] = None,
+    mevzuat_turleri: Optional[List[MevzuatTurEnum]] = Query(None),
+    page_number: int = Query(1, ge=1),
+    page_size: int = Query(10, ge=1, le=50),
+    sort_field: SortFieldEnum = SortFieldEnum.RESMI_GAZETE_TARIHI,
+    sort_direction: SortDirectionEnum = SortDirectionEnum.DESC,
+):
+    """Mevzuat araması; MCP 'search_mevzuat' aracıyla aynı parametreler ve sonuç modeli."""
+    if not mevzuat_adi and not phrase and not mevzuat_no:
+        raise HTTPException(422, "En az biri gerekli: 'mevzuat_adi', 'phrase' veya 'mevzuat_no'.")
+    if mevzuat_adi and phrase:
+        raise HTTPException(422, "'mevzuat_adi' ve 'phrase' birlikte kullanılamaz.")
+    search_req = MevzuatSearchRequest(
+        mevzuat_adi=mevzuat_adi, phrase=phrase, mevzuat_no=mevzuat_no, resmi_gazete_sayisi=resmi_gazete_sayisi,
+        page_number=page_number, page_size=page_size, sort_field=sort_field, sort_direction=sort_direction,
+        **({"mevzuat_tur_list": mevzuat_turleri} if mevzuat_turleri else {})
+    )
+    result = await get_client().search_documents(search_req)
+    return FastJSONResponse(result, status_code=502 if result.error_message else 200)
+
+@app.get("/v1/mevzuat/{mevzuat_id}/tree", response_model=Union[List[MevzuatArticleNode], MevzuatArticleTreePage])
+async def article_tree(
+    mevzuat_id: str,
+    max_depth: Optional[int] = Query(None, ge=1),
+    subtree_root: Optional[str] = None,
+    fields: Optional[List[str]] = Query(None),
+    offset: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+):
+    """Mevzuatın madde ağacı (içindekiler); sayfalama/derinlik parametreleriyle MevzuatArticleTreePage döner."""
+    flat = await get_client().get_flat_tree(mevzuat_id)
+    if flat is None:
+        raise HTTPException(502, "Madde ağacı alınamadı.")
+    if max_depth is None and subtree_root is None and fields is None and offset == 0 and limit is None:
+        return FastJSONResponse(flat.to_nodes())
     try:
-        import importlib.util
-        mcp_spec = importlib.util.find_spec("mevzuat_mcp_server")
-        mcp_file_exists = os.path.exists("mevzuat_mcp_server.py")
-        
-        return {
-            "mcp_available": MCP_AVAILABLE,
-            "mcp_spec_found": mcp_spec is not None,
-            "mcp_file_exists": mcp_file_exists,
-            "current_directory": os.getcwd(),
-            "directory_contents": os.listdir("."),
-            "python_version": sys.version,
-            "sys_path": sys.path,
-            "search_function_type": str(type(search_mevzuat)),
-            "search_function_callable": callable(search_mevzuat)
-        }
-    except Exception as e:
-        return {"debug_error": str(e)}
+        return FastJSONResponse(flat.page(subtree_root=subtree_root, max_depth=max_depth, fields=fields, offset=offset, limit=limit))
+    except KeyError:
+        raise HTTPException(404, f"Madde ağacında '{subtree_root}' bulunamadı.")
+    except ValueError as e:
+        raise HTTPException(422, str(e))
+
+@app.get("/v1/mevzuat/{mevzuat_id}/articles/{madde_id}", response_model=MevzuatArticleContent)
+async def article_content(mevzuat_id: str, madde_id: str):
+    """Tek bir maddenin Markdown içeriği."""
+    result = await get_client().get_article_content(madde_id, mevzuat_id)
+    return FastJSONResponse(result, status_code=502 if result.error_message else 200)
+
+@app.get("/v1/changes", response_model=List[MevzuatChange])
+async def changes(since: Optional[datetime.datetime] = None, mevzuat_id: Optional[str] = None, limit: int = Query(100, ge=1, le=1000)):
+    """Yeniden getirilen mevzuatta tespit edilen değişiklikler, en yeniden eskiye."""
+    tracker = get_client().change_tracker
+    if tracker is None:
+        raise HTTPException(404, "Değişiklik takibi kapalı.")
+    return FastJSONResponse(tracker.changes(since=since.timestamp() if since is not None else None, mevzuat_id=mevzuat_id, limit=limit))
+
+@app.get("/v1/citations", response_model=List[MevzuatCitation])
+async def citations(q: List[str] = Query(..., min_length=1, max_length=50), include_content: bool = True):
+    """'5237 sayılı TCK m. 81' gibi atıfları mevzuat ve madde kimliklerine (ve madde içeriğine) çözer."""
+    return FastJSONResponse(await resolve_citations(get_client(), q, include_content=include_content))
+
+@app.get("/v1/references", response_model=List[MevzuatReference])
+async def references(
+    direction: str = Query("inbound", pattern="^(inbound|outbound)$"),
+    citation: Optional[str] = None,
+    mevzuat_id: Optional[str] = None,
+    madde_id: Optional[str] = None,
+    madde_no: Optional[int] = Query(None, ge=1),
+    kind: MaddeKindEnum = MaddeKindEnum.MADDE,
+    limit: int = Query(100, ge=1, le=1000),
+):
+    """Yerel atıf grafiğinden gelen (inbound) veya giden (outbound) atıflar; MCP 'get_mevzuat_references' aracıyla aynı."""
+    graph = get_client().reference_graph
+    if graph is None:
+        raise HTTPException(404, "Atıf grafiği kapalı.")
+    if direction == "outbound":
+        if not mevzuat_id:
+            raise HTTPException(422, "'mevzuat_id' gerekli.")
+        return FastJSONResponse(graph.outbound(mevzuat_id, madde_id=madde_id, limit=limit))
+    if citation:
+        try:
+            return FastJSONResponse(graph.inbound_citation(citation, limit=limit))
+        except ValueError:
+            raise HTTPException(422, f"'{citation}' içinde atıf bulunamadı.")
+    if not mevzuat_id:
+        raise HTTPException(422, "'citation' veya 'mevzuat_id' gerekli.")
+    return FastJSONResponse(graph.inbound(mevzuat_id=mevzuat_id, madde_no=madde_no, kind=kind, limit=limit))
 
 @app.get("/search")
-async def simple_search(q: str = "güncel mevzuat", page_size: int = 10):
+async def simple_search(q: str = "güncel mevzuat", page_size: int = Query(10, ge=1, le=50)):
+    result = await get_client().search_documents(_search_request(q, page_size=page_size))
+    return _envelope(result, query=q)
+
+@app.get("/search/stream")
+async def stream_search(q: str, max_results: int = Query(200, ge=1, le=1000), mevzuat_turleri: str = ""):
+    """Tüm sayfalardaki sonuçları satır başına bir JSON belge olacak şekilde (NDJSON) akıtır."""
+    turler = [tur.strip() for tur in mevzuat_turleri.split(",") if tur.strip()]
     try:
-        # MCP fonksiyonunu çağır
-        result = await search_mevzuat(
-            mevzuat_adi=q,
-            page_size=page_size,
-            search_in_title=True
-        )
-        
-        return {
-            "success": True, 
-            "data": result, 
-            "mcp_available": MCP_AVAILABLE,
-            "mode": "REAL_DATA" if MCP_AVAILABLE else "FALLBACK",
-            "query": q
-        }
-    except Exception as e:
-        return {
-            "success": False,
-            "error": str(e),
-            "mcp_available": MCP_AVAILABLE,
-            "query": q
-        }
+        search_req = MevzuatSearchRequest(mevzuat_adi=q, page_size=50, **({"mevzuat_tur_list": turler} if turler else {}))
+    except ValueError as e:
+        return {"success": False, "error": str(e)}
+
+    async def ndjson_lines():
+        try:
+            async for document in get_client().iter_search_documents(search_req, max_results=max_results):
+                yield document.model_dump_json(by_alias=True) + "\n"
+        except MevzuatApiError as e:
+            yield json.dumps({"error": str(e)}, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
 
 @app.post("/webhook/search")
 async def webhook_search(request: SearchRequest):
-    try:
-        # MCP search fonksiyonunu çağır
-        result = await search_mevzuat(
-            mevzuat_adi=request.query,
-            page_size=request.page_size,
-            search_in_title=request.search_in_title,
-            mevzuat_turleri=request.mevzuat_turleri or [],
-            resmi_gazete_sayisi=request.resmi_gazete_sayisi or ""
-        )
-        
-        return {
-            "success": True,
-            "data": result,
-            "query": request.query,
-            "mcp_available": MCP_AVAILABLE,
-            "mode": "REAL_DATA" if MCP_AVAILABLE else "FALLBACK"
-        }
-    except Exception as e:
-        return {
-            "success": False,
-            "error": str(e),
-            "query": request.query,
-            "mcp_available": MCP_AVAILABLE
-        }
+    search_req = _search_request(
+        request.query, request.search_in_title, page_size=request.page_size,
+        mevzuat_tur_list=request.mevzuat_turleri, resmi_gazete_sayisi=request.resmi_gazete_sayisi
+    )
+    result = await get_client().search_documents(search_req)
+    return _envelope(result, query=request.query)
 
 @app.post("/webhook/article-tree")
-async def webhook_article_tree(request: dict):
-    try:
-        result = await get_mevzuat_article_tree(request.get("mevzuat_id"))
-        return {
-            "success": True,
-            "data": result,
-            "mcp_available": MCP_AVAILABLE
-        }
-    except Exception as e:
-        return {
-            "success": False,
-            "error": str(e),
-            "mcp_available": MCP_AVAILABLE
-        }
+async def webhook_article_tree(request: ArticleTreeRequest):
+    flat = await get_client().get_flat_tree(request.mevzuat_id)
+    if flat is None:
+        return FastJSONResponse({"success": False, "error": "Madde ağacı alınamadı."})
+    return FastJSONResponse({"success": True, "data": flat.to_nodes()})
 
 @app.post("/webhook/article-content")
-async def webhook_article_content(request: dict):
-    try:
-        result = await get_mevzuat_article_content(
-            request.get("mevzuat_id"),
-            request.get("madde_id")
-        )
-        return {
-            "success": True,
-            "data": result,
-            "mcp_available": MCP_AVAILABLE
-        }
-    except Exception as e:
-        return {
-            "success": False,
-            "error": str(e),
-            "mcp_available": MCP_AVAILABLE
-        }
-
-@app.get("/health")
-def health():
-    return {
-        "status": "healthy", 
-        "mcp": MCP_AVAILABLE,
-        "mode": "REAL_DATA" if MCP_AVAILABLE else "FALLBACK"
-    }
+async def webhook_article_content(request: ArticleContentRequest):
+    result = await get_client().get_article_content(request.madde_id, request.mevzuat_id)
+    return _envelope(result)
 
 # GitHub Actions için özel endpoint
 @app.get("/github-actions-test")
 async def github_actions_test():
     """GitHub Actions için optimize edilmiş endpoint"""
-    try:
-        result = await search_mevzuat(
-            mevzuat_adi="güncel mevzuat",
-            page_size=20,
-            search_in_title=True
-        )
-        
-        return {
-            "success": True,
-            "data": result,
-            "query": "güncel mevzuat",
-            "timestamp": "2025-07-17",
-            "source": "github_actions",
-            "mcp_available": MCP_AVAILABLE
-        }
-    except Exception as e:
-        return {
-            "success": False,
-            "error": str(e),
-            "mcp_available": MCP_AVAILABLE
-        }
+    result = await get_client().search_documents(_search_request("güncel mevzuat", page_size=20))
+    return _envelope(result, query="güncel mevzuat", timestamp=datetime.date.today().isoformat(), source="github_actions")
 
 if __name__ == "__main__":
     import uvicorn
     port = int(os.environ.get("PORT", 3000))
-    uvicorn.run(app, host="0.0.0.0", port=port)
\ No newline at end of file
+    # Workers need an import string so each process builds its own app and client.
+    uvicorn.run("simple_mevzuat_api:app", host="0.0.0.0", port=port, workers=int(os.environ.get("WEB_CONCURRENCY", 1)))
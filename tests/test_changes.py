@@ -0,0 +1,48 @@
+import os
+
+from mevzuat_changes import ChangeTracker, payload_hash
+
+def _node(madde_id, title, children=()):
+    return {"maddeId": madde_id, "title": title, "children": list(children)}
+
+def _tracker(tmp_path):
+    return ChangeTracker(os.path.join(tmp_path, "changes.sqlite3"))
+
+def test_article_hash_is_visible_before_and_after_commit(tmp_path):
+    tracker = _tracker(tmp_path)
+    assert tracker.record_article("1", "m1", payload_hash("v1")) is False
+    # Queued but possibly not yet committed: the pending overlay answers.
+    assert tracker.article_hash("m1") == payload_hash("v1")
+    tracker.flush()
+    assert tracker._pending_articles == {}
+    assert tracker.article_hash("m1") == payload_hash("v1")
+    tracker.close()
+    reopened = _tracker(tmp_path)
+    assert reopened.article_hash("m1") == payload_hash("v1")
+    reopened.close()
+
+def test_modified_article_is_reported_once(tmp_path):
+    tracker = _tracker(tmp_path)
+    tracker.record_article("1", "m1", payload_hash("v1"))
+    assert tracker.record_article("1", "m1", payload_hash("v2")) is True
+    assert tracker.record_article("1", "m1", payload_hash("v2")) is False
+    tracker.flush()
+    assert [(change.madde_id, change.change) for change in tracker.changes()] == [("m1", "modified")]
+    tracker.close()
+
+def test_tree_changes(tmp_path):
+    tracker = _tracker(tmp_path)
+    assert tracker.record_tree("1", [_node("k1", "Birinci Kısım", [_node("m1", "Madde 1"), _node("m2", "Madde 2")])]) is False
+    assert tracker.record_tree("1", [_node("k1", "Birinci Kısım", [_node("m1", "Madde 1"), _node("m3", "Madde 3")])]) is True
+    tracker.flush()
+    assert tracker._pending_trees == {}
+    assert sorted((change.madde_id, change.change) for change in tracker.changes()) == [("m2", "removed"), ("m3", "added")]
+    # Same articles under a renamed heading.
+    assert tracker.record_tree("1", [_node("k1", "Genel Hükümler", [_node("m1", "Madde 1"), _node("m3", "Madde 3")])]) is True
+    tracker.flush()
+    assert (tracker.changes(limit=1)[0].madde_id, tracker.changes(limit=1)[0].change) == (None, "restructured")
+    assert tracker.record_tree("1", [_node("k1", "Genel Hükümler", [_node("m1", "Madde 1"), _node("m3", "Madde 3")])]) is False
+    tracker.flush()
+    assert len(tracker.changes()) == 3
+    assert tracker.tracked_documents() == ["1"]
+    tracker.close()
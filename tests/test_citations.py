@@ -0,0 +1,31 @@
+from mevzuat_citations import parse_citations
+from mevzuat_models import MaddeKindEnum, MevzuatTurEnum
+
+def _targets(text, **kwargs):
+    return [(c.mevzuat_no, c.tur, c.madde_no, c.kind) for c in parse_citations(text, **kwargs)]
+
+def test_numbered_law_with_abbreviation():
+    assert _targets("5237 sayılı TCK m. 81") == [(5237, MevzuatTurEnum.KANUN, 81, MaddeKindEnum.MADDE)]
+
+def test_article_list_yields_one_citation_per_article():
+    assert _targets("6098 sayılı Kanun madde 49, 50") == [
+        (6098, MevzuatTurEnum.KANUN, 49, MaddeKindEnum.MADDE),
+        (6098, MevzuatTurEnum.KANUN, 50, MaddeKindEnum.MADDE),
+    ]
+
+def test_inflected_abbreviation_with_ordinal():
+    assert _targets("TMK'nın 166. maddesi") == [(4721, MevzuatTurEnum.KANUN, 166, MaddeKindEnum.MADDE)]
+
+def test_provisional_article():
+    assert _targets("TCK geçici madde 1") == [(5237, MevzuatTurEnum.KANUN, 1, MaddeKindEnum.GECICI_MADDE)]
+
+def test_law_by_name():
+    assert _targets("Türk Ceza Kanununun 81 inci maddesi") == [(5237, MevzuatTurEnum.KANUN, 81, MaddeKindEnum.MADDE)]
+    assert _targets("İş Kanunu madde 17") == _targets("İşK m. 17") == [(4857, MevzuatTurEnum.KANUN, 17, MaddeKindEnum.MADDE)]
+
+def test_self_reference_only_when_requested():
+    assert _targets("bu Kanunun 17 nci maddesi") == []
+    assert _targets("bu Kanunun 17 nci maddesi", self_references=True) == [(None, None, 17, MaddeKindEnum.MADDE)]
+
+def test_text_without_citation():
+    assert parse_citations("Bu madde yayımı tarihinde yürürlüğe girer.") == []
@@ -0,0 +1,39 @@
+import asyncio
+
+from mevzuat_concurrency import AdaptiveLimiter, Priority, SingleFlight, current_priority, request_priority
+
+def test_interactive_call_is_not_blocked_behind_queued_background_request():
+    async def scenario():
+        limiter = AdaptiveLimiter(initial_limit=4, max_limit=4, background_share=0.75)
+        for _ in range(3):
+            await limiter.acquire(Priority.BACKGROUND)
+        # Background capacity (3 of 4) is used up, so this one queues.
+        queued_background = asyncio.ensure_future(limiter.acquire(Priority.BACKGROUND))
+        await asyncio.sleep(0)
+        assert not queued_background.done()
+        # The fourth slot is reserved for interactive calls and must be granted without any release.
+        await asyncio.wait_for(limiter.acquire(Priority.INTERACTIVE), timeout=1.0)
+        assert limiter.in_flight == 4
+        assert not queued_background.done()
+        queued_background.cancel()
+    asyncio.run(scenario())
+
+def test_interactive_caller_raises_the_priority_of_a_background_flight():
+    async def scenario():
+        limiter = AdaptiveLimiter(initial_limit=4, max_limit=4, background_share=0.75)
+        flights = SingleFlight()
+        for _ in range(3):
+            await limiter.acquire(Priority.BACKGROUND)
+        async def fetch():
+            await limiter.acquire(current_priority())
+            limiter.release()
+            return "content"
+        with request_priority(Priority.BACKGROUND):
+            prefetch = asyncio.ensure_future(flights.run("article", fetch))
+        await asyncio.sleep(0.01)
+        # The prefetch waits for a background slot; the interactive caller joining it must not.
+        assert not prefetch.done()
+        assert await asyncio.wait_for(flights.run("article", fetch), timeout=1.0) == "content"
+        assert flights.stats()["raised"] == 1
+        assert await prefetch == "content"
+    asyncio.run(scenario())
@@ -0,0 +1,9 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+from bench_converter import check_corpus
+
+def test_fast_path_and_markitdown_match_golden_markdown():
+    assert check_corpus() == []
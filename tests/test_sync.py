@@ -0,0 +1,54 @@
+import asyncio
+import os
+
+from mevzuat_sync import MevzuatSync, SyncState
+
+class _Document:
+    def __init__(self, mevzuat_id):
+        self.mevzuat_id = mevzuat_id
+
+class _ListingClient:
+    """Serves a KAYIT_TARIHI DESC listing from memory, page by page."""
+    change_tracker = None
+
+    def __init__(self, listing):
+        self.listing = listing
+
+    async def iter_search_documents(self, request, max_results=None, refresh=False):
+        for mevzuat_id in self.listing[(request.page_number - 1) * request.page_size:]:
+            yield _Document(mevzuat_id)
+
+def _discover(client, path, max_documents):
+    state = SyncState(path)
+    found = asyncio.run(MevzuatSync(client, state, max_documents=max_documents).discover())
+    discovered = set(state.pending)
+    state.pending = {}
+    state.save()
+    return found, discovered, SyncState(path)
+
+def test_capped_discovery_is_backfilled_by_later_runs(tmp_path):
+    path = os.path.join(tmp_path, "sync_state.json")
+    client = _ListingClient([f"d{number}" for number in range(180, 0, -1)])
+    found, seen, state = _discover(client, path, 70)
+    assert found == 70 and len(state.backfill) == 1
+    # Documents registered since the first run come first; the gap below is continued with the rest of the budget.
+    client.listing = [f"n{number}" for number in range(30, 0, -1)] + client.listing
+    for _ in range(3):
+        _, discovered, state = _discover(client, path, 70)
+        seen |= discovered
+    assert seen == set(client.listing)
+    assert state.backfill == []
+
+def test_reset_discards_backfill_cursors(tmp_path):
+    path = os.path.join(tmp_path, "sync_state.json")
+    client = _ListingClient([f"d{number}" for number in range(180, 0, -1)])
+    _discover(client, path, 70)
+    state = SyncState(path)
+    state.reset()
+    state.save()
+    state = SyncState(path)
+    assert state.watermark == [] and state.backfill == [] and state.pending == {}
+    # Discovery starts over from the top of the listing instead of resuming the old gap.
+    found, discovered, state = _discover(client, path, 10)
+    assert discovered == {f"d{number}" for number in range(180, 170, -1)}
+    assert state.backfill[0]["resume_after"][-1] == "d171"
@@ -0,0 +1,45 @@
+import pytest
+
+from mevzuat_tree import FlatArticleTree
+
+def _node(madde_id, title, madde_no=None, children=()):
+    return {"maddeId": madde_id, "mevzuatId": "1", "maddeNo": madde_no, "title": title, "children": list(children)}
+
+RAW_TREE = [
+    _node("k1", "BİRİNCİ KISIM", children=[
+        _node("b1", "BİRİNCİ BÖLÜM", children=[_node("m1", "Madde 1", 1), _node("m2", "Madde 2", 2)]),
+        _node("m3", "Madde 3", 3),
+    ]),
+    _node("k2", "İKİNCİ KISIM", children=[_node("m4", "Madde 4", 4)]),
+    _node("g1", "Geçici Madde 1", 1),
+]
+
+def _tree():
+    return FlatArticleTree.from_raw("1", RAW_TREE)
+
+def test_offset_and_limit_page_the_top_level():
+    page = _tree().page(max_depth=1, fields=["title"], offset=1, limit=1)
+    assert page.nodes == [{"madde_id": "k2", "title": "İKİNCİ KISIM", "child_count": 1}]
+    assert (page.offset, page.total_children, page.has_more) == (1, 3, True)
+    last = _tree().page(max_depth=1, fields=[], offset=2, limit=5)
+    assert last.nodes == [{"madde_id": "g1"}]
+    assert last.has_more is False
+
+def test_max_depth_cuts_off_with_child_count():
+    page = _tree().page(max_depth=2, fields=[], limit=1)
+    assert page.nodes == [{"madde_id": "k1", "children": [{"madde_id": "b1", "child_count": 2}, {"madde_id": "m3"}]}]
+    full = _tree().page(fields=["madde_no"], limit=1)
+    assert full.nodes[0]["children"][0]["children"] == [{"madde_id": "m1", "madde_no": 1}, {"madde_id": "m2", "madde_no": 2}]
+
+def test_subtree_root_lists_its_children():
+    page = _tree().page(subtree_root="b1", fields=["title"])
+    assert [node["madde_id"] for node in page.nodes] == ["m1", "m2"]
+    assert (page.subtree_root, page.total_children, page.has_more) == ("b1", 2, False)
+
+def test_unknown_field_raises_value_error():
+    with pytest.raises(ValueError):
+        _tree().page(fields=["title", "body"])
+
+def test_unknown_subtree_root_raises_key_error():
+    with pytest.raises(KeyError):
+        _tree().page(subtree_root="missing")